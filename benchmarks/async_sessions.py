@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding=utf-8 -*-
+r"""
+drives many sessions with the AsyncScriptEngine against the fake WebDriver server
+
+compares running the sessions one after another with running them concurrently on one event-loop
+
+python3 benchmarks/async_sessions.py [--sessions 50] [--latency 0.002]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import importlib
+import argparse as ap
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+aio = importlib.import_module("selenium-script.aio")
+testing = importlib.import_module("selenium-script.testing")
+
+SCRIPT = """\
+INIT Chrome --headless
+ACTION-DELAY 5ms
+VISIT https://example.com/$NAME
+WAIT-TILL PAGE-LOADED
+SELECT 'input[name="q"]'
+TYPE "hello $NAME" @TAB
+TAB 3
+SLEEP 20ms
+CLICK button
+QUIT
+"""
+
+
+async def run(source: str, sessions: int, latency: float, concurrency: int) -> float:
+    async with testing.FakeWebDriverServer(latency=latency) as server:
+        async with aio.HttpClient(server.url, pool_size=16) as client:
+            engines = [
+                aio.AsyncScriptEngine(source, client=client, context=dict(NAME=f"n{index}"), use_cache=False)
+                for index in range(sessions)
+            ]
+            start = time.perf_counter()
+            codes = await aio.run_engines(engines, concurrency=concurrency)
+            duration = time.perf_counter() - start
+    if any(codes):
+        raise RuntimeError(f"some sessions failed: {codes}")
+    return duration
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.002, help="seconds per webdriver-command")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "session.ss")
+        with open(source, 'w') as file:
+            file.write(SCRIPT)
+        sequential = asyncio.run(run(source, args.sessions, args.latency, concurrency=1))
+        concurrent = asyncio.run(run(source, args.sessions, args.latency, concurrency=None))
+
+    print(f"sessions:   {args.sessions}")
+    print(f"sequential: {sequential:8.3f}s")
+    print(f"concurrent: {concurrent:8.3f}s  ({sequential / concurrent:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding=utf-8 -*-
+r"""
+compares the cold (uncached) with the warm (cached) compile time of a large generated script
+
+python3 benchmarks/compile_cache.py [--lines 20000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import tempfile
+import importlib
+import argparse as ap
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+selenium_script = importlib.import_module("selenium-script")
+
+
+def generate_script(directory: str, lines: int) -> str:
+    r"""writes a main-script with an included helper that looks like our generated scripts"""
+    helper = os.path.join(directory, "helper.ss")
+    with open(helper, 'w') as file:
+        file.write("SELECT 'input[name=\"q\"]'\nTYPE \"$QUERY\" @RETURN\nWAIT-TILL PAGE-LOADED\n")
+    main = os.path.join(directory, "main.ss")
+    with open(main, 'w') as file:
+        file.write("DEFAULT QUERY 'selenium script'\nACTION-DELAY 200ms - 400ms\n")
+        for index in range(lines):
+            if index % 100 == 0:
+                file.write("@include helper.ss\n")
+            else:
+                file.write(f"TAB {index % 5 + 1}  # step {index}\n")
+    return main
+
+
+def measure(source: str, *, use_cache: bool, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        selenium_script.ScriptEngine(source, use_cache=use_cache)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = generate_script(directory, lines=args.lines)
+        cold = measure(source, use_cache=False, repeat=args.repeat)
+        selenium_script.ScriptEngine(source, use_cache=True)  # populate the cache
+        warm = measure(source, use_cache=True, repeat=args.repeat)
+
+    print(f"lines: {args.lines}")
+    print(f"cold:  {cold * 1000:8.1f}ms")
+    print(f"warm:  {warm * 1000:8.1f}ms  ({cold / warm:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
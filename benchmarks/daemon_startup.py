@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding=utf-8 -*-
+r"""
+wall-time of running a short script with a fresh interpreter vs. submitting it to `selenium-script serve`
+
+the script doesn't start a browser so only the interpreter-startup (imports, compile) is compared.
+with browsers the daemon additionally saves the browser-start of every INIT (--browser-pool)
+
+python3 benchmarks/daemon_startup.py [--runs 10]
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+import argparse as ap
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+SCRIPT = "SET NAME benchmark\nINFO hello $NAME\n"
+
+
+def run(arguments: list, runs: int) -> list:
+    environment = dict(os.environ, PYTHONPATH=SRC)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "selenium-script", *arguments], env=environment, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def wait_for(path: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise TimeoutError("the daemon didn't start")
+        time.sleep(0.05)
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "hello.ss")
+        with open(script, 'w') as file:
+            file.write(SCRIPT)
+        socket_path = os.path.join(directory, "daemon.sock")
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "selenium-script", "serve", f"unix:{socket_path}", "--logging", "ERROR"],
+            env=dict(os.environ, PYTHONPATH=SRC), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for(socket_path)
+            fresh = run([script], args.runs)
+            served = run(["--server", f"unix:{socket_path}", script], args.runs)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"{'mode':24}{'median (s)':>12}{'min (s)':>10}")
+    for name, timings in (("fresh interpreter", fresh), ("--server (daemon)", served)):
+        print(f"{name:24}{statistics.median(timings):12.3f}{min(timings):10.3f}")
+    print(f"speedup: {statistics.median(fresh) / statistics.median(served):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding=utf-8 -*-
+r"""
+memory of a compiled synthetic script as list of Token-tuples vs the compact Program
+and of the ScriptEngine that links it (the program plus the instructions that are executed)
+
+python3 benchmarks/program_memory.py [--lines 1000000]
+"""
+import os
+import sys
+import gc
+import time
+import marshal
+import pickle
+import random
+import tracemalloc
+import importlib
+import argparse as ap
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+program_module = importlib.import_module("selenium-script.program")
+engine_module = importlib.import_module("selenium-script.engine")
+Token, Program = program_module.Token, program_module.Program
+
+LINES = [
+    ("visit", lambda i: (f"https://example.com/page/{i % 5000}",)),
+    ("select", lambda i: (f'input[name="field{i % 40}"]',)),
+    ("type", lambda i: (f"value {i}", "@TAB")),
+    ("click", lambda i: ()),
+    ("sleep", lambda i: ("250ms",)),
+    ("wait_till", lambda i: ("VISIBLE", ".result")),
+    ("set", lambda i: (f"ROW{i % 100}", f"{i % 1000}")),
+]
+
+
+def generate(lines: int):
+    r"""tokens like the compiler creates them (fresh string objects per line)"""
+    rng = random.Random(0)
+    for index in range(lines):
+        action, arguments = rng.choice(LINES)
+        filename = "generated.ss" if index % 10 else "helpers/common.ss"
+        yield Token("".join(filename), index + 1, "".join(action), tuple("".join(a) for a in arguments(index)))
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    duration = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, duration
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tokens, token_bytes, token_time = measure(lambda: list(generate(args.lines)))
+    token_pickle = len(pickle.dumps([tuple(token) for token in tokens], protocol=pickle.HIGHEST_PROTOCOL))
+    token_marshal = len(marshal.dumps([tuple(token) for token in tokens]))
+    del tokens
+
+    program, program_bytes, program_time = measure(lambda: Program(generate(args.lines)))
+    program_pickle = len(pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL))
+    program_marshal = len(marshal.dumps(program.to_state()))
+    assert program[12345] == next(token for i, token in enumerate(generate(12346)) if i == 12345)
+    del program
+
+    # the tokens are compiled outside of the measurement (like loading them from the cache)
+    tokens = Program(generate(args.lines))
+    engine, engine_bytes, engine_time = measure(lambda: engine_module.ScriptEngine("generated.ss", tokens=tokens))
+    engine_bytes += program_bytes
+
+    mb = 1024 * 1024
+    print(f"lines:              {args.lines}")
+    print(f"{'':20}{'List[Token]':>14}{'Program':>14}{'ScriptEngine':>14}")
+    print(f"{'memory (MB)':20}{token_bytes / mb:14.1f}{program_bytes / mb:14.1f}{engine_bytes / mb:14.1f}"
+          f"  ({token_bytes / program_bytes:.1f}x smaller, linked {engine_bytes / program_bytes:.1f}x the program)")
+    print(f"{'pickle (MB)':20}{token_pickle / mb:14.1f}{program_pickle / mb:14.1f}")
+    print(f"{'cache/marshal (MB)':20}{token_marshal / mb:14.1f}{program_marshal / mb:14.1f}")
+    print(f"{'build (s, traced)':20}{token_time:14.2f}{program_time:14.2f}{engine_time:14.2f}")
+    print(f"unique strings:     {len(tokens.strings)}")
+    print(f"instructions:       {len(set(map(id, engine.instructions)))} distinct")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding=utf-8 -*-
+r"""
+startup of the interpreter for a script that never touches a browser
+
+time-to-first-action: from starting the process until the log-line of the first action arrives.
+the imports are measured with `-X importtime` (separate runs, importtime slows the imports down)
+and a script without INIT/WAIT-TILL/LOAD must not import `selenium.webdriver` (exits with 1 otherwise).
+the results can be written as json and compared against a previous run like the suite
+
+python3 benchmarks/startup.py [--runs 10] [--script my.ss] [--top 10] [--output startup.json]
+python3 benchmarks/startup.py --baseline startup.json [--threshold 0.15]
+"""
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import statistics
+import subprocess
+import argparse as ap
+import typing as t
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+SCRIPT = "SET NAME startup\nINFO hello $NAME\n"
+LAZY_MODULES = ("selenium.webdriver", "dotenv", "better_exceptions")  # only imported when a line needs them
+
+
+def first_action(script: str) -> t.Tuple[float, float]:
+    r"""(seconds till the first log-line, seconds till the process ended)"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "selenium-script", "--no-cache", script],
+                               env=dict(os.environ, PYTHONPATH=SRC), stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE)
+    first = process.stderr.readline()
+    first_line = time.perf_counter() - start
+    process.stderr.read()
+    if process.wait() != 0 or not first:
+        raise RuntimeError(f"{script!r} failed (exit-code {process.returncode})")
+    return first_line, time.perf_counter() - start
+
+
+def import_times(script: str) -> t.Dict[str, t.Tuple[int, int, bool]]:
+    r"""module -> (self, cumulative in microseconds, top-level import)"""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-m", "selenium-script", "--no-cache", script],
+                             env=dict(os.environ, PYTHONPATH=SRC), stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE, text=True, check=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():  # the header
+            continue
+        modules[name.strip()] = (int(self_time), int(cumulative), len(name) - len(name.lstrip()) == 1)
+    return modules
+
+
+def measure(script: str, runs: int) -> t.Tuple[t.Dict[str, t.Any], t.Dict[str, t.Tuple[int, int, bool]]]:
+    timings = [first_action(script) for _ in range(runs)]
+    imports = [import_times(script) for _ in range(runs)]
+    package = [modules["selenium-script"][1] for modules in imports]
+    total = [sum(cumulative for _, cumulative, top in modules.values() if top) for modules in imports]
+    result = dict(
+        first_action_s=statistics.median(first for first, _ in timings),
+        wall_s=statistics.median(wall for _, wall in timings),
+        package_import_s=statistics.median(package) / 1e6,
+        all_imports_s=statistics.median(total) / 1e6,
+        lazy_modules_imported=sorted(name for name in LAZY_MODULES if name in imports[-1]),
+    )
+    return result, imports[-1]
+
+
+def compare(result: t.Dict[str, t.Any], baseline: t.Dict[str, t.Any], threshold: float) -> t.List[str]:
+    previous = baseline.get('results', {})
+    regressions = []
+    print(f"\n{'vs. baseline':24}{'before (s)':>12}{'now (s)':>10}{'change':>10}")
+    for name in ("first_action_s", "wall_s", "package_import_s", "all_imports_s"):
+        if name not in previous:
+            continue
+        change = result[name] / previous[name] - 1
+        marker = "  REGRESSION" if change > threshold else ""
+        print(f"{name:24}{previous[name]:12.3f}{result[name]:10.3f}{change:+10.1%}{marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--script', help="measure this script instead of a SET/INFO script")
+    parser.add_argument('--top', type=int, default=10, help="list the slowest top-level imports")
+    parser.add_argument('--output', help="write the results as json into this file")
+    parser.add_argument('--baseline', help="compare with the results of a previous run")
+    parser.add_argument('--threshold', type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = args.script
+        if script is None:
+            script = os.path.join(directory, "startup.ss")
+            with open(script, 'w') as file:
+                file.write(SCRIPT)
+        result, modules = measure(os.path.abspath(script), args.runs)
+
+    print(f"{'top-level import':40}{'cumulative (ms)':>16}")
+    slowest = sorted(((cumulative, name) for name, (_, cumulative, top) in modules.items() if top), reverse=True)
+    for cumulative, name in slowest[:args.top]:
+        print(f"{name:40}{cumulative / 1000:16.1f}")
+    print()
+    print(f"time to first action: {result['first_action_s']:.3f}s (process ended after {result['wall_s']:.3f}s)")
+    print(f"imports: {result['all_imports_s']:.3f}s (selenium-script: {result['package_import_s']:.3f}s)")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(dict(
+                meta=dict(python=platform.python_version(), platform=platform.platform(),
+                          script=args.script or "<SET/INFO>", timestamp=time.strftime("%Y-%m-%dT%H:%M:%S")),
+                results=result,
+            ), file, indent=2)
+
+    failed = False
+    if result['lazy_modules_imported'] and args.script is None:
+        print(f"\nimported although no line needs them: {', '.join(result['lazy_modules_imported'])}")
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(result, json.load(file), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding=utf-8 -*-
+r"""
+micro-benchmarks of the interpreter (no browser needed)
+
+every benchmark reports the best time per operation out of --repeat runs.
+the results can be written as json and compared against a previous run (the baseline):
+a benchmark that got slower than its threshold makes the suite exit with 1.
+
+python3 benchmarks/suite.py [--filter parse] [--output results.json]
+python3 benchmarks/suite.py --baseline results.json [--threshold 0.15]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import tempfile
+import importlib
+import argparse as ap
+import typing as t
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+selenium_script = importlib.import_module("selenium-script")
+engine_module = importlib.import_module("selenium-script.engine")
+fill_module = importlib.import_module("selenium-script.util.fill")
+callutil = importlib.import_module("selenium-script.callutil")
+selenium_imports = importlib.import_module("selenium-script.selenium_imports")
+checkpoint = importlib.import_module("selenium-script.checkpoint")
+testing = importlib.import_module("selenium-script.testing")
+
+Benchmark = t.Callable[[str], t.Tuple[t.Callable[[], t.Any], int]]  # (directory) -> (function, operations per call)
+BENCHMARKS: t.Dict[str, Benchmark] = {}
+
+EXECUTE_SCRIPT = """\
+INIT Chrome --headless
+VISIT https://example.com/search
+WAIT-TILL PAGE-LOADED
+SELECT 'input[name="q"]'
+TYPE "selenium $QUERY" @TAB
+TAB 3
+SELECT-NAME password
+TYPE "secret"
+RETURN
+CLICK button.submit
+WAIT-TILL VISIBLE .result
+BACK
+"""
+
+
+def benchmark(name: str):
+    def decorator(function: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+
+def write(directory: str, filename: str, content: str) -> str:
+    path = os.path.join(directory, filename)
+    with open(path, 'w') as file:
+        file.write(content)
+    return path
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+@benchmark("compile")
+def _compile(directory: str):
+    lines = 1000
+    source = write(directory, "compile.ss", "".join(
+        EXECUTE_SCRIPT.splitlines(keepends=True)[1 + index % 11] for index in range(lines)
+    ))
+    engine = selenium_script.ScriptEngine(source, use_cache=False)
+
+    def run():
+        with open(source) as file:
+            engine.compile(file)
+    return run, lines
+
+
+@benchmark("fill")
+def _fill(directory: str):
+    context = dict(selenium_imports.keys_context(), NAME="world", OTHER="value")
+    return lambda: fill_module.fill("hello $NAME and ${OTHER} @TAB", context), 1
+
+
+_VALUES = ["42", "3.14", "yes", "250ms", "1m30s", "hello world"]
+
+
+@benchmark("parse_any")
+def _parse_any(directory: str):
+    parse_any = callutil.parse_any
+    return lambda: [parse_any(value) for value in _VALUES], len(_VALUES)
+
+
+@benchmark("parse_timedelta")
+def _parse_timedelta(directory: str):
+    return lambda: callutil.parse_timedelta("1m30s500ms"), 1
+
+
+def uncached(function: t.Callable) -> t.Callable:
+    r"""the parser without its memoization (cost of the first time a value is seen)"""
+    return getattr(function, '__wrapped__', function)
+
+
+@benchmark("parse_timedelta_uncached")
+def _parse_timedelta_uncached(directory: str):
+    parse_timedelta = uncached(callutil.parse_timedelta)
+    return lambda: parse_timedelta("1m30s500ms"), 1
+
+
+def _parse_value(value: str) -> Benchmark:
+    def setup(directory: str):
+        parse_any = uncached(callutil.parse_any)
+        return lambda: parse_any(value), 1
+    return setup
+
+
+for _value in _VALUES:
+    benchmark(f"parse_any_uncached[{_value}]")(_parse_value(_value))
+
+
+@benchmark("split_list")
+def _split_list(directory: str):
+    arguments = ["a", "--flag", "b", "--option", "value", "c"]
+    return lambda: callutil.split_list(arguments), 1
+
+
+@benchmark("call_function_with_arguments")
+def _call_function_with_arguments(directory: str):
+    def action(count: int, text: str, *, flag: bool = False, option: str = None):
+        pass
+
+    arguments = ["3", "text", "--flag", "yes", "--option", "value"]
+    return lambda: callutil.call_function_with_arguments(action, arguments), 1
+
+
+@benchmark("execute")
+def _execute(directory: str):
+    source = write(directory, "execute.ss", EXECUTE_SCRIPT + "QUIT\n")
+    engine = testing.FakeBrowserEngine(source, use_cache=False, context=dict(QUERY="script"))
+    engine.delay_between_actions = None
+    operations = len(engine.instructions)
+
+    def run():
+        engine.execute()
+        engine.delay_between_actions = None  # reset by INIT/ACTION-DELAY
+    return run, operations
+
+
+@benchmark("execute_loop")
+def _execute_loop(directory: str):
+    iterations = 200
+    source = write(directory, "loop.ss", (
+        "INIT Chrome --headless\n"
+        f"REPEAT {iterations}\n"
+        "    SELECT input\n"
+        "    TYPE \"$QUERY\" @TAB\n"
+        "    IF $QUERY\n"
+        "        CLICK\n"
+        "    END\n"
+        "END\n"
+        "QUIT\n"
+    ))
+    engine = testing.FakeBrowserEngine(source, use_cache=False, context=dict(QUERY="script"))
+    engine.delay_between_actions = None
+    return engine.execute, iterations * 6
+
+
+@benchmark("execute_checkpoint")
+def _execute_checkpoint(directory: str):
+    # like `execute` but with a checkpoint after every line (--checkpoint without CHECKPOINT lines)
+    source = write(directory, "checkpoint.ss", EXECUTE_SCRIPT + "QUIT\n")
+    engine = testing.FakeBrowserEngine(source, use_cache=False, context=dict(QUERY="script"))
+    engine.checkpoints = checkpoint.CheckpointFile(os.path.join(directory, "checkpoint.json"))
+    engine.delay_between_actions = None
+    operations = len(engine.instructions)
+
+    def run():
+        engine.execute()
+        engine.delay_between_actions = None  # reset by INIT/ACTION-DELAY
+    return run, operations
+
+
+@benchmark("extract_rows")
+def _extract_rows(directory: str):
+    rows = 20_000
+    source = write(directory, "extract.ss", (
+        "INIT Chrome --headless\n"
+        f"EXTRACT .item --fields text,href,attr:data-id --to {os.path.join(directory, 'rows.jsonl')}\n"
+        "QUIT\n"
+    ))
+    engine = testing.FakeBrowserEngine(source, use_cache=False)
+    engine.browser_options = dict(items=rows)
+    engine.delay_between_actions = None
+    return engine.execute, rows
+
+
+@benchmark("capture_screenshots")
+def _capture_screenshots(directory: str):
+    screenshots = 100
+    source = write(directory, "capture.ss", (
+        "INIT Chrome --headless\n"
+        f"FOR-EACH PAGE {' '.join(map(str, range(screenshots // 2)))}\n"
+        "    VISIT https://example.com/$PAGE\n"
+        f"    SCREENSHOT {os.path.join(directory, 'shots', '${PAGE}.png')}\n"
+        f"    SNAPSHOT {os.path.join(directory, 'shots', '${PAGE}.html.gz')}\n"
+        "END\n"
+        "QUIT\n"  # waits for the pending writes
+    ))
+    engine = testing.FakeBrowserEngine(source, use_cache=False)
+    engine.browser_options = dict(screenshot_size=512 * 1024)
+    engine.delay_between_actions = None
+    return engine.execute, screenshots
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+def measure(function: t.Callable[[], t.Any], operations: int, *, repeat: int, min_time: float) -> t.Dict[str, float]:
+    number = 1
+    while True:  # calibrate so one run takes at least min_time
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        duration = time.perf_counter() - start
+        if duration >= min_time:
+            break
+        number *= max(2, min(10, int(min_time / max(duration, 1e-9))))
+    timings = [duration]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append(time.perf_counter() - start)
+    per_operation = sorted(timing / number / operations * 1e9 for timing in timings)
+    return dict(
+        ns_per_op=round(per_operation[0], 1),
+        median_ns_per_op=round(per_operation[len(per_operation) // 2], 1),
+        operations=number * operations,
+    )
+
+
+def compare(results: t.Dict[str, t.Any], baseline: t.Dict[str, t.Any], threshold: float) -> t.List[str]:
+    r"""returns the names of the benchmarks that got slower than their threshold"""
+    regressions = []
+    thresholds = baseline.get('thresholds', {})
+    print(f"\n{'benchmark':40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f"{name:40}{'-':>12}{result['ns_per_op']:12.1f}{'new':>10}")
+            continue
+        change = result['ns_per_op'] / previous['ns_per_op'] - 1
+        limit = thresholds.get(name, threshold)
+        marker = "  REGRESSION" if change > limit else ""
+        print(f"{name:40}{previous['ns_per_op']:12.1f}{result['ns_per_op']:12.1f}{change:+10.1%}{marker}")
+        if change > limit:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds per measured run")
+    parser.add_argument('--output', help="write the results as json into this file")
+    parser.add_argument('--baseline', help="compare with the results of a previous run")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed slowdown against the baseline (0.15 = 15%%; "
+                             "per benchmark with a 'thresholds' object in the baseline)")
+    args = parser.parse_args()
+
+    # log-records are still created (part of the interpreter overhead) but not written
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+
+    results = dict(
+        meta=dict(
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            platform=platform.platform(),
+            interpreter=selenium_script.__version__,
+            timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        ),
+        results={},
+    )
+    print(f"{'benchmark':40}{'ns/op':>12}{'median':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, setup in BENCHMARKS.items():
+            if args.filter and args.filter not in name:
+                continue
+            function, operations = setup(directory)
+            result = measure(function, operations, repeat=args.repeat, min_time=args.min_time)
+            results['results'][name] = result
+            print(f"{name:40}{result['ns_per_op']:12.1f}{result['median_ns_per_op']:12.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
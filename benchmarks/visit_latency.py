@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding=utf-8 -*-
+r"""
+VISIT latency of a heavy page with the different INIT options (needs a local browser and its driver)
+
+the page is generated into a temporary directory and served from disk by a local http-server:
+images, web-fonts, a video and slow "third-party" tracker-scripts (--tracker-delay per request)
+
+python3 benchmarks/visit_latency.py [--browser chrome] [--visits 10] [--images 80] [--tracker-delay 0.3]
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+import statistics
+import importlib
+import argparse as ap
+import functools
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+selenium_script = importlib.import_module("selenium-script")
+
+CONFIGURATIONS = [
+    ("default", dict()),
+    ("--page-load eager", dict(page_load="eager")),
+    ("--block images,media,fonts", dict(block="images,media,fonts")),
+    ("--block-url *tracker*", dict(block_url="*tracker*")),
+    ("all of the above + --disable-*", dict(
+        page_load="eager", block="images,media,fonts", block_url="*tracker*",
+        disable_extensions=True, disable_background_networking=True,
+    )),
+]
+
+
+def generate_page(directory: str, *, images: int, fonts: int, trackers: int) -> None:
+    def write(name: str, size: int):
+        with open(os.path.join(directory, name), 'wb') as file:
+            file.write(os.urandom(size))
+
+    for index in range(images):
+        write(f"image{index}.png", 150_000)
+    for index in range(fonts):
+        write(f"font{index}.woff2", 80_000)
+    write("movie.mp4", 5_000_000)
+    font_faces = "".join(
+        f"@font-face {{ font-family: f{index}; src: url(font{index}.woff2); }}\n"
+        f".f{index} {{ font-family: f{index}; }}\n"
+        for index in range(fonts)
+    )
+    with open(os.path.join(directory, "style.css"), 'w') as file:
+        file.write(font_faces)
+    body = "\n".join(
+        [f'<p class="f{index}">text in font {index}</p>' for index in range(fonts)]
+        + [f'<img src="image{index}.png" width="10" height="10">' for index in range(images)]
+        + ['<video src="movie.mp4" preload="auto" muted></video>']
+        + [f'<script src="tracker/t{index}.js"></script>' for index in range(trackers)]
+    )
+    with open(os.path.join(directory, "index.html"), 'w') as file:
+        file.write(f'<!DOCTYPE html><html><head><link rel="stylesheet" href="style.css"></head>'
+                   f'<body><input name="q">\n{body}\n</body></html>')
+
+
+class Handler(SimpleHTTPRequestHandler):
+    tracker_delay: float = 0.0
+
+    def do_GET(self):
+        if self.path.startswith("/tracker/"):  # slow third-party
+            time.sleep(self.tracker_delay)
+            payload = b"window.tracked = (window.tracked || 0) + 1;"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/javascript")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        super().do_GET()
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")  # every VISIT loads everything again
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(url: str, browser: str, options: dict, visits: int) -> list:
+    engine = selenium_script.ScriptEngine("<visit-latency>", tokens=[])
+    engine.action_init(browser, headless=True, **options)
+    try:
+        engine.action_visit(f"{url}?warmup")
+        timings = []
+        for index in range(visits):
+            start = time.perf_counter()
+            engine.action_visit(f"{url}?{index}")
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        engine.action_quit()
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--browser', default="chrome")
+    parser.add_argument('--visits', type=int, default=10)
+    parser.add_argument('--images', type=int, default=80)
+    parser.add_argument('--fonts', type=int, default=10)
+    parser.add_argument('--trackers', type=int, default=5)
+    parser.add_argument('--tracker-delay', type=float, default=0.3, help="seconds per tracker-request")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate_page(directory, images=args.images, fonts=args.fonts, trackers=args.trackers)
+        handler = functools.partial(type("PageHandler", (Handler,), dict(tracker_delay=args.tracker_delay)),
+                                    directory=directory)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/index.html"
+
+        print(f"page: {args.images} images, {args.fonts} fonts, 1 video, "
+              f"{args.trackers} trackers ({args.tracker_delay}s each)")
+        print(f"{'INIT options':34}{'median (s)':>12}{'min (s)':>10}{'speedup':>10}")
+        baseline = None
+        try:
+            for name, options in CONFIGURATIONS:
+                try:
+                    timings = measure(url, args.browser, options, args.visits)
+                except Exception as error:
+                    print(f"{name:34}failed: {type(error).__name__}: {error}".splitlines()[0])
+                    continue
+                median = statistics.median(timings)
+                baseline = baseline or median
+                print(f"{name:34}{median:12.3f}{min(timings):10.3f}{baseline / median:9.1f}x")
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
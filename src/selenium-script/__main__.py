@@ -2,17 +2,25 @@
 r"""
 
 """
+import os
 import sys
+import json
+import signal
 import logging
+import threading
 import typing as t
 import os.path as p
 import argparse as ap
-import better_exceptions
 from . import (
     __version__ as interpreter_version,
     ScriptEngine,
     LoggingContextFilter,
 )
+from .browser_pool import BrowserPool
+from .remote import configure_pool
+from .profiler import Profiler
+from .logging_sink import JsonLinesFormatter, text_formatter, start_background_logging
+from .client import DEFAULT_ADDRESS, SERVER_ENVIRONMENT_VARIABLE
 from .exceptions import *
 
 
@@ -21,8 +29,51 @@ class Namespace:
         return f"<{vars(self)}>"
 
     debug: bool
+    cache: bool
+    check: bool
+    check_format: t.Literal["text", "json"]
+    stream: bool
+    lookahead: int
     logging: t.Literal["DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL"]
+    log_format: t.Literal["text", "jsonl"]
     script: str
+    var: t.List[str]
+    server: t.Optional[str]
+    data: t.Optional[str]
+    workers: int
+    retries: int
+    results: t.Optional[str]
+    use_async: bool
+    webdriver_url: t.Optional[str]
+    profile: bool
+    profile_output: t.Optional[str]
+    checkpoint: t.Optional[str]
+    checkpoint_interval: float
+    resume: bool
+    browser_pool: int
+    browser_max_uses: t.Optional[int]
+    browser_health_check: bool
+    remote_pool_size: int
+    remote_pool_block: bool
+    remote_keep_alive: bool
+    remote_connect_timeout: float
+    remote_timeout: float
+    remote_retries: int
+
+
+class ServeNamespace:
+    def __repr__(self):
+        return f"<{vars(self)}>"
+
+    address: str
+    concurrency: int
+    debug: bool
+    logging: t.Literal["DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL"]
+    log_format: t.Literal["text", "jsonl"]
+    browser_pool: t.Optional[int]
+    browser_max_uses: t.Optional[int]
+    browser_health_check: bool
+    prewarm: t.List[str]
 
 
 parser = ap.ArgumentParser(
@@ -32,44 +83,188 @@ parser.add_argument('-v', '--version', action="version", version=interpreter_ver
 parser.add_argument('--logging',
                     choices=["DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL"],
                     help="how much information to output")
+parser.add_argument('--log-format', choices=["text", "jsonl"], default="text",
+                    help="jsonl: one json-object per record with script, line, action and duration of the line")
 parser.add_argument('--debug', action=ap.BooleanOptionalAction,
                     help="run in debug mode (shows the browser)")
+parser.add_argument('--cache', action=ap.BooleanOptionalAction, default=True,
+                    help="cache the compiled script in __sscache__/")
+parser.add_argument('--stream', action=ap.BooleanOptionalAction, default=False,
+                    help="compile the script while it runs instead of upfront (for huge generated scripts)")
+parser.add_argument('--lookahead', type=int, default=1000, metavar="LINES",
+                    help="with --stream: how many lines ahead are validated before a line gets executed")
+parser.add_argument('--check', action=ap.BooleanOptionalAction, default=False,
+                    help="only check the arguments and estimate the minimum runtime (no browser is started)")
+parser.add_argument('--check-format', choices=["text", "json"], default="text",
+                    help="with --check: print the report as json to stdout")
+parser.add_argument('--var', action="append", default=[], metavar="NAME=VALUE",
+                    help="set a variable of the script (can be repeated)")
 parser.add_argument('script', type=p.abspath,
-                    help="script to run")
+                    help="script to run (or `serve` to start the daemon, see `selenium-script serve --help`)")
+server_group = parser.add_argument_group("daemon", "run the script on a running `selenium-script serve`")
+server_group.add_argument('--server', metavar="ADDRESS", default=os.environ.get(SERVER_ENVIRONMENT_VARIABLE),
+                          help=f"address of the daemon (unix:/path/to.sock or host:port, "
+                               f"default from ${SERVER_ENVIRONMENT_VARIABLE})")
+profile_group = parser.add_argument_group("profiling")
+profile_group.add_argument('--profile', action=ap.BooleanOptionalAction, default=False,
+                           help="measure the time spent per line and print the hot-spots at the end")
+profile_group.add_argument('--profile-output', type=p.abspath, metavar="FILE",
+                           help="write the profile as collapsed stacks for flamegraph tools (or json if FILE ends with .json)")
+checkpoint_group = parser.add_argument_group("checkpoints", "continue a failed run after its last successful line")
+checkpoint_group.add_argument('--checkpoint', type=p.abspath, metavar="FILE",
+                              help="store the state after every line (only at the CHECKPOINT lines if there are any)")
+checkpoint_group.add_argument('--checkpoint-interval', type=float, default=1.0, metavar="SECONDS",
+                              help="write the state at most this often (always when the script fails, 0: every line)")
+checkpoint_group.add_argument('--resume', action=ap.BooleanOptionalAction, default=False,
+                              help="continue after the checkpoint of --checkpoint FILE (from the start without one)")
+pool_group = parser.add_argument_group("browser pool")
+pool_group.add_argument('--browser-pool', type=int, default=0, metavar="SIZE",
+                        help="keep up to SIZE browsers warm and reuse them on INIT (0 disables the pool)")
+pool_group.add_argument('--browser-max-uses', type=int, metavar="N",
+                        help="quit a pooled browser after it was used N times")
+pool_group.add_argument('--browser-health-check', action=ap.BooleanOptionalAction, default=True,
+                        help="check that a pooled browser still responds before reusing it")
+remote_group = parser.add_argument_group("remote connections", "for INIT ... --remote URL")
+remote_group.add_argument('--remote-pool-size', type=int, default=16, metavar="N",
+                          help="kept-alive connections per grid/server (shared by all sessions)")
+remote_group.add_argument('--remote-pool-block', action=ap.BooleanOptionalAction, default=False,
+                          help="wait for a free connection instead of opening an extra one")
+remote_group.add_argument('--remote-keep-alive', action=ap.BooleanOptionalAction, default=True,
+                          help="reuse the connections between commands")
+remote_group.add_argument('--remote-connect-timeout', type=float, default=10, metavar="SECONDS",
+                          help="timeout for opening a connection")
+remote_group.add_argument('--remote-timeout', type=float, default=120, metavar="SECONDS",
+                          help="timeout for the response of a command")
+remote_group.add_argument('--remote-retries', type=int, default=3,
+                          help="how often a failed connection is retried")
+batch_group = parser.add_argument_group("batch mode")
+batch_group.add_argument('--data', type=p.abspath,
+                         help="run the script once per row of this .csv/.jsonl file (row is added to the variables)")
+batch_group.add_argument('--workers', type=int, default=1,
+                         help="number of parallel worker processes (each with its own browser)")
+batch_group.add_argument('--retries', type=int, default=0,
+                         help="how often a failed row is retried")
+batch_group.add_argument('--results', type=p.abspath,
+                         help="write the exit-status of every row as jsonl into this file")
+batch_group.add_argument('--async', dest="use_async", action=ap.BooleanOptionalAction, default=False,
+                         help="run the rows as concurrent sessions of one process "
+                              "(--workers sessions at once, needs --webdriver-url)")
+batch_group.add_argument('--webdriver-url',
+                         help="url of the running webdriver-server/selenium-grid for --async (eg. http://localhost:4444)")
 
-args = parser.parse_args(namespace=Namespace())
+serve_parser = ap.ArgumentParser(
+    prog="selenium-script serve", formatter_class=ap.ArgumentDefaultsHelpFormatter,
+    description="keep the interpreter and the browsers warm and run the scripts submitted with --server",
+)
+serve_parser.add_argument('address', nargs='?', default=DEFAULT_ADDRESS,
+                          help="unix:/path/to.sock or host:port to listen on")
+serve_parser.add_argument('--concurrency', type=int, default=4,
+                          help="scripts that run at once (more submitted scripts wait)")
+serve_parser.add_argument('--logging', choices=["DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL"],
+                          help="how much of the scripts' logs the daemon outputs itself")
+serve_parser.add_argument('--log-format', choices=["text", "jsonl"], default="text")
+serve_parser.add_argument('--debug', action=ap.BooleanOptionalAction,
+                          help="run the scripts in debug mode (shows the browser)")
+serve_parser.add_argument('--browser-pool', type=int, metavar="SIZE",
+                          help="warm browsers kept per INIT-configuration (default: --concurrency, 0 disables)")
+serve_parser.add_argument('--browser-max-uses', type=int, metavar="N",
+                          help="quit a pooled browser after it was used N times")
+serve_parser.add_argument('--browser-health-check', action=ap.BooleanOptionalAction, default=True,
+                          help="check that a pooled browser still responds before reusing it")
+serve_parser.add_argument('--prewarm', action="append", default=[], metavar="SCRIPT",
+                          help="launch the browsers of the INIT-lines of this script at startup (can be repeated)")
 
+if sys.argv[1:2] == ["serve"]:
+    args = serve_parser.parse_args(sys.argv[2:], namespace=ServeNamespace())
+else:
+    args = parser.parse_args(namespace=Namespace())
 
-def configure_logging():
-    class LogRecordFactory(logging.LogRecord):
-        def __init__(self, *a, **kw):
-            super().__init__(*a, **kw)
-            self.scriptLine = "---"
-            self.scriptName = "<unknown>"
 
-    logging.basicConfig(
-        format="{asctime} | {levelname:.3} | {scriptName:>15} | {scriptLine:>3} | {message}",
-        style="{",
-        level=args.logging or (logging.DEBUG if args.debug else logging.INFO),
+def configure_logging(*, worker: bool = False, extra_filters: t.Sequence[logging.Filter] = (),
+                      level: t.Union[int, str] = None):
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonLinesFormatter() if args.log_format == "jsonl" else text_formatter(worker=worker))
+    filters = [LoggingContextFilter(), *extra_filters]
+    if not args.debug:  # disable logging of other modules if not in debug-mode
+        filters.insert(0, logging.Filter(name="root"))
+    start_background_logging(
+        handler, filters=filters,
+        level=level or args.logging or (logging.DEBUG if args.debug else logging.INFO),
+    )
+
+
+def excepthook(*exc_info):
+    r"""better_exceptions is only imported when there is an uncaught exception to format"""
+    import better_exceptions
+    better_exceptions.excepthook(*exc_info)
+
+
+def variables() -> t.Dict[str, str]:
+    r"""the --var NAME=VALUE options"""
+    result = {}
+    for assignment in args.var:
+        name, sep, value = assignment.partition('=')
+        if not sep or not name:
+            raise ValueError(f"--var {assignment!r} has to be NAME=VALUE")
+        result[name] = value
+    return result
+
+
+def browser_pool_options() -> t.Optional[t.Dict[str, t.Any]]:
+    if args.browser_pool <= 0:
+        return None
+    return dict(size=args.browser_pool, max_uses=args.browser_max_uses, health_check=args.browser_health_check)
+
+
+def configure_remote_pool():
+    configure_pool(
+        pool_size=args.remote_pool_size, block=args.remote_pool_block, keep_alive=args.remote_keep_alive,
+        connect_timeout=args.remote_connect_timeout, read_timeout=args.remote_timeout, retries=args.remote_retries,
     )
-    logging.setLogRecordFactory(LogRecordFactory)
-    for handler in logging.root.handlers:
-        if not args.debug:  # disable logging of other modules if not in debug-mode
-            handler.addFilter(logging.Filter(name="root"))
-        handler.addFilter(LoggingContextFilter())
-    better_exceptions.log.patch()
 
 
 def main():
-    better_exceptions.hook()
-    configure_logging()
+    sys.excepthook = excepthook
+    if isinstance(args, ServeNamespace):
+        return run_server()
+    configure_logging(worker=bool(args.data))
     logging.debug(str(args))
+    try:
+        context = variables()
+    except ValueError as error:
+        logging.critical(str(error))
+        return 1
+    if args.resume and not args.checkpoint:
+        logging.critical("--resume needs the --checkpoint FILE to resume from")
+        return 1
+    if args.checkpoint and (args.data or args.server) and not args.check:
+        logging.critical("--checkpoint can't be combined with --data or --server")
+        return 1
+    if args.server and not args.check:
+        return run_client(context)
+    configure_remote_pool()
 
     try:
-        engine = ScriptEngine(args.script, debug=args.debug)
+        engine = ScriptEngine(args.script, debug=args.debug, use_cache=args.cache, context=context,
+                              streaming=args.stream and not args.data and not args.check, lookahead=args.lookahead)
     except FileNotFoundError:
         logging.critical(f"script-file {args.script!r} could not be found")
         return 1
+    if args.check:
+        return run_check(engine)
+    if args.data:
+        return run_batch_mode(engine, context)
+    pool_options = browser_pool_options()
+    if pool_options is not None:
+        engine.browser_pool = BrowserPool(**pool_options)
+    if args.profile or args.profile_output:
+        engine.profiler = Profiler(root=p.basename(args.script))
+    if args.checkpoint:
+        try:
+            configure_checkpoints(engine)
+        except ValueError as error:
+            logging.critical(str(error))
+            return 1
     try:
         engine.execute()
     except ScriptRuntimeError as error:
@@ -78,9 +273,120 @@ def main():
     except Exception as error:
         logging.critical(f"Internal Error: {type(error).__name__} ({error})", exc_info=error)
         return 1
+    finally:
+        if engine.browser_pool is not None:
+            engine.browser_pool.close()
+        if engine.profiler is not None:
+            write_profile(engine.profiler)
+    return 0
+
+
+def configure_checkpoints(engine: ScriptEngine):
+    from .checkpoint import CheckpointFile
+    engine.checkpoints = CheckpointFile(args.checkpoint, interval=args.checkpoint_interval)
+    if not args.resume:
+        return
+    engine.resume_state = engine.checkpoints.read()
+    if engine.resume_state is None:
+        logging.warning(f"no checkpoint in {args.checkpoint!r} (starting from the beginning)")
+    elif engine.resume_state.get('script') != engine.source:
+        raise ValueError(f"the checkpoint in {args.checkpoint!r} belongs to {engine.resume_state.get('script')!r}")
+
+
+def run_client(context: t.Dict[str, str]) -> int:
+    from .client import submit_job, script_environment
+
+    if args.data or args.profile or args.profile_output:
+        logging.critical("--server only runs the script (--data and --profile run locally)")
+        return 1
+    try:
+        return submit_job(args.server, args.script, context={**script_environment(args.script), **context}, log_format=args.log_format,
+                          level=args.logging or ("DEBUG" if args.debug else None), cache=args.cache)
+    except (OSError, ValueError) as error:
+        logging.critical(f"could not run the script on {args.server!r} ({error})")
+        return 1
+
+
+def run_server() -> int:
+    from .daemon import ScriptDaemon, JobLogFilter
+
+    level = logging.getLevelName(args.logging) if args.logging else logging.DEBUG if args.debug else logging.INFO
+    # the records of every level reach the filters (a job can ask for DEBUG), JobLogFilter applies `level`
+    configure_logging(worker=True, extra_filters=[JobLogFilter(level)], level=logging.DEBUG)
+    pool_size = args.concurrency if args.browser_pool is None else args.browser_pool
+    pool = BrowserPool(size=pool_size, max_uses=args.browser_max_uses, health_check=args.browser_health_check) \
+        if pool_size > 0 else None
+    try:
+        daemon = ScriptDaemon(args.address, concurrency=args.concurrency, browser_pool=pool, debug=args.debug)
+    except (OSError, ValueError) as error:
+        logging.critical(f"could not listen on {args.address!r} ({error})")
+        return 1
+    if args.prewarm and pool is None:
+        logging.warning("--prewarm needs the browser-pool (ignored)")
+    daemon.prewarm(args.prewarm)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=daemon.shutdown).start())
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    logging.info("Daemon stopped")
     return 0
 
 
+def run_check(engine: ScriptEngine) -> int:
+    from .check import check_script
+
+    report = check_script(engine.tokens, engine.instructions)
+    if args.check_format == "json":
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        logging.info(f"{report.checked} lines checked, {report.unchecked} lines with variables are checked at runtime")
+        logging.info(f"estimated minimum runtime: {format_seconds(report.minimum_runtime)}")
+        if report.errors:
+            logging.critical(f"Script failed the check with {len(report.errors)} error(s)")
+    return 0 if report.ok else 1
+
+
+def format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}h {minutes:02}m {seconds:06.3f}s" if hours else f"{minutes}m {seconds:06.3f}s"
+
+
+def write_profile(profiler: Profiler):
+    print(profiler.report(), file=sys.stderr)
+    if args.profile_output:
+        profiler.write(args.profile_output)
+        logging.info(f"Profile written to {args.profile_output!r}")
+
+
+def run_batch_mode(engine: ScriptEngine, context: t.Dict[str, str]) -> int:
+    from .batch import read_rows, run_batch, run_batch_async, log_summary, write_results
+
+    try:
+        rows = read_rows(args.data)
+        rows = [{**context, **row} for row in rows]
+    except FileNotFoundError:
+        logging.critical(f"data-file {args.data!r} could not be found")
+        return 1
+    except (ValueError, ScriptRuntimeError) as error:
+        logging.critical(f"data-file {args.data!r} could not be read ({error})")
+        return 1
+    if args.use_async:
+        if not args.webdriver_url:
+            logging.critical("--async needs the --webdriver-url of a running webdriver-server")
+            return 1
+        results = run_batch_async(engine, rows, webdriver_url=args.webdriver_url,
+                                  concurrency=args.workers, retries=args.retries)
+    else:
+        results = run_batch(engine, rows, workers=args.workers, retries=args.retries,
+                            pool_options=browser_pool_options())
+    log_summary(results)
+    if args.results:
+        write_results(args.results, results)
+    return 0 if all(result.return_code == 0 for result in results) else 1
+
+
 if __name__ == '__main__':
     try:
         sys.exit(main() or 0)
@@ -0,0 +1,13 @@
+# -*- coding=utf-8 -*-
+r"""
+asyncio based engine to drive many browser-sessions from one process
+"""
+from .http import *
+from .webdriver import *
+from .engine import *
+
+__all__ = [
+    'HttpClient', 'HttpResponse', 'HttpError',
+    'AsyncWebDriver', 'AsyncWebElement', 'WebDriverError',
+    'AsyncScriptEngine', 'run_engines',
+]
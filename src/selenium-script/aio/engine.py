@@ -0,0 +1,470 @@
+# -*- coding=utf-8 -*-
+r"""
+asyncio based ScriptEngine
+
+runs the same compiled token-stream as ScriptEngine but the browser-actions talk the WebDriver protocol
+through an async HTTP client. SLEEP and ACTION-DELAY don't block, so one event-loop can drive many sessions.
+the browser (driver/grid) has to run already: `INIT` only creates a new session on the server of the `client`.
+"""
+import time
+import asyncio
+import inspect
+import logging
+import typing as t
+from ..exceptions import *
+from ..engine import ScriptEngine
+from ..selenium_imports import keys_class, focus_changing_keys
+from ..conditions import CONDITIONS, lookup_condition, lookup_check
+from ..logging_context import script_position
+from ..callutil import parse_timedelta
+from ..browser_options import BrowserSettings, browser_settings, build_options
+from ..extract import Step
+from .http import HttpClient
+from .webdriver import AsyncWebDriver, AsyncWebElement, WebDriverError
+
+
+__all__ = ['AsyncScriptEngine', 'run_engines']
+
+
+CSS_SELECTOR = "css selector"
+
+
+def css_string(value: str) -> str:
+    r"""quoted css-string (W3C has no "name" strategy, it is looked up as '[name="value"]' like selenium does)"""
+    return '"' + ''.join(f"\\{ord(char):x} " if char in '"\\\n\r\f' else char for char in value) + '"'
+
+
+def browser_capabilities(browser: str, settings: BrowserSettings = BrowserSettings()) -> t.Dict[str, t.Any]:
+    r"""W3C-capabilities of the session (--block-url needs the DevTools-protocol and is ignored)"""
+    if settings.block_urls:
+        logging.warning("--block-url needs a local chromium-browser (ignored)")
+    return build_options(browser, settings).to_capabilities()
+
+
+class AsyncScriptEngine(ScriptEngine):
+    _browser: t.Optional[AsyncWebDriver] = None
+    _web_element: t.Optional[AsyncWebElement] = None
+    client: HttpClient
+
+    def __init__(self, source: str, *, client: HttpClient, **kwargs):
+        super().__init__(source, **kwargs)
+        self.client = client
+
+    async def execute(self):
+        try:
+            for tokens, instructions in self.segments():
+                await self.execute_segment(tokens, instructions)
+        finally:
+            self.close_outputs()
+            await asyncio.to_thread(self.close_captures)
+            if self._browser is not None:
+                logging.warning("Abnormally quitting the browser")
+                await self.release_browser()
+
+    async def execute_segment(self, tokens, instructions):
+        pointer, end = 0, len(instructions)
+        while pointer < end:
+            instruction = instructions[pointer]
+            position = script_position.set((*tokens.location(pointer), time.time()))
+            try:
+                result = self.run_instruction(instruction)
+                if inspect.isawaitable(result):
+                    result = await result
+            except ScriptRuntimeError as error:
+                logging.critical(f"{type(error).__name__}: {error}")
+                raise QuietExit(1)
+            finally:
+                script_position.reset(position)
+            if instruction.control:
+                pointer += 1 if result is None else result
+            else:
+                pointer += 1
+                if instruction.delay is not None:
+                    await self.wait_action_delay(instruction.delay)
+
+    async def wait_action_delay(self, kind: str = "input"):
+        r"""the other sessions run during the delay so nothing is prepared ahead"""
+        delay = self.action_delay(kind)
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def release_browser(self):
+        browser, self._browser = self._browser, None
+        self.invalidate_web_element()
+        try:
+            await browser.quit()
+        except (WebDriverError, OSError) as error:
+            logging.debug(f"failed to quit the session ({error})")
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    @property
+    def web_element(self):
+        raise ScriptRuntimeError("use `await engine.current_element()` in the AsyncScriptEngine")
+
+    async def current_element(self) -> AsyncWebElement:
+        if self._web_element is not None:
+            self.element_lookups_saved += 1
+            return self._web_element
+        self._web_element = await self.browser.active_element()
+        self.element_lookups += 1
+        return self._web_element
+
+    async def select_element(self, element: t.Optional[AsyncWebElement]):
+        r"""sets the current element and focuses it"""
+        self._web_element = element
+        if element is not None:
+            await self.browser.execute_script("arguments[0].focus()", element)
+        else:
+            await self.browser.execute_script("document.documentElement.focus()")
+
+    async def on_current_element(self, function: t.Callable[[AsyncWebElement], t.Awaitable[t.Any]]) -> t.Any:
+        r"""see ScriptEngine.retry_stale (the function gets the current element)"""
+        cached = self._web_element is not None
+        try:
+            return await function(await self.current_element())
+        except WebDriverError as error:
+            if not cached or error.error != "stale element reference":
+                raise
+            logging.debug("cached element got stale")
+            self.invalidate_web_element()
+            return await function(await self.current_element())
+
+    async def send_keys(self, *keys: str):
+        await self.on_current_element(lambda element: element.send_keys(*keys))
+        focus_keys = focus_changing_keys()
+        if any(char in focus_keys for key in keys for char in key):  # "name@TAB" is a single argument
+            self.invalidate_web_element()
+
+    async def press_key(self, key: str):
+        await self.browser.press_keys(key)
+        if self._web_element is None:  # sending it to the element would have looked up the active element
+            self.element_lookups_saved += 1
+        self.invalidate_web_element()
+
+    ####################################################################################################################
+    # Actions
+    ####################################################################################################################
+
+    async def action_init(self, browser: str, *, headless: bool = False, page_load: str = "normal",
+                          block: str = None, block_url: str = None, disable_extensions: bool = False,
+                          disable_background_networking: bool = False):
+        r"""
+        create a new session on the webdriver-server
+
+        INIT Chrome --headless --page-load eager --block images
+        """
+        settings = browser_settings(
+            headless=headless, page_load=page_load, block=block, block_url=block_url,
+            disable_extensions=disable_extensions, disable_background_networking=disable_background_networking,
+        )
+        logging.info(f"Initializing {'headless' if headless else ''} {browser!r} browser")
+        capabilities = browser_capabilities(browser, settings)
+        if self._browser is not None:
+            await self.release_browser()
+        driver = AsyncWebDriver(self.client)
+        await driver.start(capabilities)
+        self._browser = driver
+
+    async def action_new_tab(self):
+        r"""opens a new tab"""
+        logging.info("Opening a new tab")
+        await self.browser.new_window("tab")
+        self.invalidate_web_element()
+
+    async def action_new_window(self):
+        r"""opens a new window"""
+        logging.info("Opening a new window")
+        await self.browser.new_window("window")
+        self.invalidate_web_element()
+
+    async def action_close(self):
+        r"""close the current window/tab"""
+        logging.info("Closing the current window")
+        await self.browser.close()
+        self.invalidate_web_element()
+
+    async def action_quit(self):
+        r"""quit the current browser (session)"""
+        logging.info("Quitting the browser")
+        if self._browser is None:
+            raise ScriptRuntimeError("you need to run `INIT browser` to initialize the browser")
+        await self.release_browser()
+        await asyncio.to_thread(self.flush_captures)
+
+    async def action_visit(self, url: str):
+        r"""visit a certain url"""
+        logging.info(f"Visiting {url!r}")
+        await self.browser.get(url)
+        self.invalidate_web_element()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def action_select(self, query: str, *extra: str):
+        r"""select an element"""
+        query = ' '.join((query,) + extra)
+        await self.select_element(await self.browser.find_element(CSS_SELECTOR, query))
+
+    async def action_waiting_select(self, query: str, *extra: str):
+        r"""Like SELECT but waits for the element"""
+        query = ' '.join((query,) + extra)
+        await self.wait_for(CONDITIONS['element'], query, message=f"WAITING-SELECT {query}")
+        await self.select_element(await self.browser.find_element(CSS_SELECTOR, query))
+
+    async def action_select_name(self, name: str):
+        r"""SELECT '[name="value"]'"""
+        await self.select_element(await self.browser.find_element(CSS_SELECTOR, f'[name={css_string(name)}]'))
+
+    async def action_select_xpath(self, xpath: str):
+        r"""select element by xpath"""
+        await self.select_element(await self.browser.find_element("xpath", xpath))
+
+    async def action_select_link_text(self, *text: str):
+        r"""Select link that contains text"""
+        await self.select_element(
+            await self.on_current_element(lambda element: element.find_element("link text", ' '.join(text)))
+        )
+
+    async def action_select_link_partial_text(self, *text: str):
+        r"""select link that contains partially text"""
+        await self.select_element(
+            await self.on_current_element(lambda element: element.find_element("partial link text", ' '.join(text)))
+        )
+
+    async def action_unselect(self, *, unfocus: bool = True):
+        r"""unselect the current element"""
+        if unfocus:
+            await self.select_element(None)
+        self.invalidate_web_element()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def action_type(self, *keys: str):
+        r"""type some keys"""
+        await self.send_keys(*keys)
+
+    async def action_hotkey(self, *keys: str):
+        r"""trigger a hotkey event"""
+        await self.send_keys(*(getattr(keys_class(), key.upper(), key.lower()) for key in keys))
+
+    async def action_return(self):
+        r"""type @RETURN"""
+        await self.send_keys(keys_class().RETURN)
+
+    async def action_space(self):
+        r"""type @SPACE"""
+        await self.send_keys(keys_class().SPACE)
+
+    async def action_backspace(self, times: int = 1):
+        r"""type @BACKSPACE x times"""
+        for i in range(times):
+            if i > 0:
+                await self.wait_action_delay()
+            await self.send_keys(keys_class().BACKSPACE)
+
+    action_back_space = action_backspace
+
+    async def action_tab(self, times: int = 1):
+        r"""type @TAB x times"""
+        for i in range(times):
+            if i > 0:
+                await self.wait_action_delay()
+            await self.press_key(keys_class().TAB)
+
+    async def action_escape(self):
+        r"""type @ESCAPE"""
+        await self.send_keys(keys_class().ESCAPE)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def action_breakpoint(self):
+        r"""not supported in the AsyncScriptEngine"""
+        logging.debug("Breakpoint (ignored in async mode)")
+
+    def action_wait_for_user_interrupt(self):
+        raise ScriptRuntimeError("WAIT-FOR-USER-INTERRUPT is not supported in async mode")
+
+    action_wait_for_user = action_wait_for_user_interrupt
+
+    @staticmethod
+    async def action_sleep(*deltas: str):
+        r"""
+        just wait for a bit (without blocking the other sessions)
+
+        SLEEP 200ms
+        SLEEP 200ms - 400ms
+        """
+        total = ScriptEngine.sleep_duration(*deltas)
+        logging.info(f"Sleeping for {total:.3}s")
+        await asyncio.sleep(total)
+
+    async def action_wait_till(self, what: str, query: str = None):
+        r"""see ScriptEngine.action_wait_till"""
+        message = ' '.join(("WAIT-TILL", what.upper()) + ((query,) if query else ()))
+        condition, negate = lookup_condition(what)
+        await self.wait_for(condition, query, negate=negate, message=message)
+
+    async def wait_for(self, condition, query: t.Optional[str], *, negate: bool = False, message: str = ""):
+        r"""waits (event-driven or polling) till the condition is true"""
+        deadline = time.monotonic() + self.wait_for_timeout
+
+        if condition.script is None:  # alert / new-window
+            is_alert = condition is CONDITIONS['alert']
+            initial = None if is_alert else await self.browser.window_handles()
+            while time.monotonic() < deadline:
+                if is_alert:
+                    try:
+                        await self.browser.alert_text()
+                        result = True
+                    except WebDriverError:
+                        result = False
+                else:
+                    result = len(await self.browser.window_handles()) > len(initial)
+                if result != negate:
+                    return
+                await asyncio.sleep(self.wait_poll_frequency)
+            raise ScriptRuntimeError(f"Timeout: {message}")
+
+        element = await self.current_element() if condition.uses_element and not query else None
+        initial = await self.browser.current_url() if condition.initial is not None else None
+        if self.wait_mode == "event":
+            script = condition.event_script()
+            while time.monotonic() < deadline:
+                remaining = deadline - time.monotonic()
+                try:
+                    if await self.browser.execute_async_script(
+                            script, query, element, initial, negate, round(min(remaining, 5) * 1000)
+                    ):
+                        return
+                except WebDriverError:
+                    await asyncio.sleep(0.05)  # page is probably navigating
+        else:
+            script = condition.poll_script()
+            while time.monotonic() < deadline:
+                if await self.browser.execute_script(script, query, element, initial) != negate:
+                    return
+                await asyncio.sleep(self.wait_poll_frequency)
+        raise ScriptRuntimeError(f"Timeout: {message}")
+
+    async def check_condition(self, what: str, query: t.Optional[str] = None) -> bool:
+        r"""see ScriptEngine.check_condition"""
+        condition, negate = lookup_check(what)
+        if condition.script is None:  # alert
+            try:
+                result = await self.browser.alert_text() is not None
+            except WebDriverError:
+                result = False
+        else:
+            element = await self.current_element() if condition.uses_element and not query else None
+            result = bool(await self.browser.execute_script(condition.poll_script(), query, element, None))
+        return result != negate
+
+    async def control_if_not(self, offset: int, what: str, query: str = None) -> int:
+        return 1 if await self.check_condition(what, query) else offset
+
+    async def action_page_load_timeout(self, *deltas: str):
+        r"""set the page-load-timeout"""
+        await self.browser.set_timeouts(pageLoad=parse_timedelta(''.join(deltas)).total_seconds())
+
+    async def action_implicitly_wait(self, *deltas: str):
+        r"""set the implicit wait time when selecting an element"""
+        await self.browser.set_timeouts(implicit=parse_timedelta(''.join(deltas)).total_seconds())
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def action_refresh(self):
+        r"""refresh the current page"""
+        logging.info("Refreshing the Page")
+        await self.browser.refresh()
+        self.invalidate_web_element()
+
+    async def action_forward(self):
+        r"""go forwards on page"""
+        logging.debug("Going one step forward in the browser history")
+        await self.browser.forward()
+        self.invalidate_web_element()
+
+    async def action_back(self):
+        r"""go backwards on page"""
+        logging.debug("Going one step backward in the browser history")
+        await self.browser.back()
+        self.invalidate_web_element()
+
+    async def action_click(self, *query: str):
+        r"""clicks the current element"""
+        if query:
+            logging.debug(f"CLICK {' '.join(query)!r}")
+            await (await self.browser.find_element(CSS_SELECTOR, ' '.join(query))).click()
+        else:
+            await self.on_current_element(lambda element: element.click())
+        self.invalidate_web_element()
+
+    action_press = action_click
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def action_screenshot(self, path: str, *, element: bool = False):
+        r"""saves a screenshot of the page or the selected element (written in the background)"""
+        if element:
+            payload = await self.on_current_element(lambda element: element.screenshot())
+        else:
+            payload = await self.browser.screenshot()
+        await self.capture(path, payload, encoding="base64")
+
+    async def action_snapshot(self, path: str):
+        r"""saves the html of the current page (written in the background)"""
+        await self.capture(path, await self.browser.page_source(), encoding="text")
+
+    async def capture(self, path: str, payload: str, *, encoding: str):
+        r"""only waits in a thread when the capture-queue is full (the other sessions keep running)"""
+        if not self.capture_queue.capture(path, payload, encoding=encoding, block=False):
+            await asyncio.to_thread(self.capture_queue.capture, path, payload, encoding=encoding)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def action_extract(self, *query: str, to: str, fields: str = "text", chunk: int = 500,
+                             next_page: str = None, pages: int = None, append: bool = False):
+        r"""writes the matches of the query into a .csv/.jsonl file (see ScriptEngine.action_extract)"""
+        await self.run_steps(self.extract_steps(' '.join(query), to=to, fields=fields, chunk=chunk,
+                                                next_page=next_page, pages=pages, append=append))
+
+    async def run_steps(self, steps: t.Generator[Step, t.Any, t.Any]) -> t.Any:
+        r"""executes the scripts that the generator yields (the pauses let the other sessions run)"""
+        try:
+            script, arguments = next(steps)
+            while True:
+                try:
+                    if script is None:
+                        await asyncio.sleep(*arguments)
+                        result = None
+                    else:
+                        result = await self.browser.execute_script(script, *arguments)
+                except WebDriverError as error:
+                    script, arguments = steps.throw(error)
+                else:
+                    script, arguments = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+
+async def run_engines(engines: t.Iterable[AsyncScriptEngine], *, concurrency: int = None) -> t.List[int]:
+    r"""executes the engines concurrently and returns their exit-codes"""
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def run(engine: AsyncScriptEngine) -> int:
+        if semaphore is not None:
+            async with semaphore:
+                return await run_one(engine)
+        return await run_one(engine)
+
+    async def run_one(engine: AsyncScriptEngine) -> int:
+        try:
+            await engine.execute()
+        except QuietExit as exc:
+            return exc.return_code
+        except Exception as error:
+            logging.critical(f"Internal Error: {type(error).__name__} ({error})", exc_info=error)
+            return 1
+        return 0
+
+    return list(await asyncio.gather(*(run(engine) for engine in engines)))
@@ -0,0 +1,143 @@
+# -*- coding=utf-8 -*-
+r"""
+minimal asyncio HTTP/1.1 client for the JSON based WebDriver protocol
+
+connections are kept alive and pooled so many sessions can share them
+"""
+import json
+import asyncio
+import typing as t
+import urllib.parse
+
+
+__all__ = ['HttpClient', 'HttpResponse', 'HttpError']
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpResponse(t.NamedTuple):
+    status: int
+    headers: t.Dict[str, str]
+    body: bytes
+
+    def json(self) -> t.Any:
+        return json.loads(self.body) if self.body else None
+
+
+Connection = t.Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class HttpClient:
+    r"""
+    base_url: eg http://localhost:4444 (only plain http is supported)
+    pool_size: max number of parallel connections
+    timeout: timeout of a single request in seconds
+    """
+
+    def __init__(self, base_url: str, *, pool_size: int = 16, timeout: float = 120):
+        url = urllib.parse.urlsplit(base_url)
+        if url.scheme != "http":
+            raise ValueError(f"unsupported scheme {url.scheme!r} (only http)")
+        self.host = url.hostname or "localhost"
+        self.port = url.port or 80
+        self.prefix = url.path.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: t.List[Connection] = []
+        self._semaphore: t.Optional[asyncio.Semaphore] = None
+        self.connections_opened = 0
+        self.requests = 0
+
+    def __repr__(self):
+        return f"<{type(self).__name__} http://{self.host}:{self.port}{self.prefix} idle={len(self._idle)}>"
+
+    async def request(self, method: str, path: str, payload: t.Any = None) -> HttpResponse:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+        body = b"" if payload is None else json.dumps(payload).encode('utf-8')
+        head = (
+            f"{method} {self.prefix}{path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Accept: application/json\r\n"
+            f"Content-Type: application/json;charset=UTF-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: keep-alive\r\n"
+            f"\r\n"
+        ).encode('latin-1')
+
+        async with self._semaphore:
+            self.requests += 1
+            for attempt in range(2):
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await self._connect()
+                try:
+                    writer.write(head + body)
+                    await writer.drain()
+                    response = await asyncio.wait_for(self._read_response(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as error:
+                    writer.close()
+                    if reused and attempt == 0:  # the server closed the idle connection
+                        continue
+                    raise HttpError(f"{method} {path}: {error}") from error
+                except BaseException:
+                    writer.close()
+                    raise
+                if response.headers.get('connection', '').lower() == "close":
+                    writer.close()
+                else:
+                    self._idle.append((reader, writer))
+                return response
+        raise AssertionError("unreachable")
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def _connect(self) -> Connection:
+        self.connections_opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> HttpResponse:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by the server")
+        try:
+            status = int(status_line.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            raise HttpError(f"bad status-line {status_line!r}")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode('latin-1').partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            headers['connection'] = "close"
+        return HttpResponse(status, headers, body)
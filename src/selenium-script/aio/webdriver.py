@@ -0,0 +1,163 @@
+# -*- coding=utf-8 -*-
+r"""
+async client for the W3C WebDriver protocol
+
+only the subset of commands the actions need is implemented
+"""
+import typing as t
+from ..exceptions import ScriptRuntimeError
+from .http import HttpClient
+
+
+__all__ = ['AsyncWebDriver', 'AsyncWebElement', 'WebDriverError', 'ELEMENT_KEY']
+
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+class WebDriverError(ScriptRuntimeError):
+    def __init__(self, error: str, message: str):
+        super().__init__(f"{error}: {message}")
+        self.error = error
+        self.message = message
+
+
+class AsyncWebElement:
+    __slots__ = ('driver', 'id')
+
+    def __init__(self, driver: 'AsyncWebDriver', element_id: str):
+        self.driver = driver
+        self.id = element_id
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id}>"
+
+    def to_json(self) -> t.Dict[str, str]:
+        return {ELEMENT_KEY: self.id}
+
+    async def send_keys(self, *keys: str) -> None:
+        await self.driver.command("POST", f"/element/{self.id}/value", {"text": "".join(keys)})
+
+    async def click(self) -> None:
+        await self.driver.command("POST", f"/element/{self.id}/click", {})
+
+    async def screenshot(self) -> str:
+        r"""base64 of the png"""
+        return await self.driver.command("GET", f"/element/{self.id}/screenshot")
+
+    async def find_element(self, using: str, value: str) -> 'AsyncWebElement':
+        return self.driver.to_element(
+            await self.driver.command("POST", f"/element/{self.id}/element", {"using": using, "value": value})
+        )
+
+
+class AsyncWebDriver:
+    r"""one WebDriver session. many sessions can share one HttpClient"""
+    session_id: t.Optional[str]
+    capabilities: t.Dict[str, t.Any]
+
+    def __init__(self, client: HttpClient):
+        self.client = client
+        self.session_id = None
+        self.capabilities = {}
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.session_id}>"
+
+    async def start(self, capabilities: t.Dict[str, t.Any]) -> None:
+        value = await self._request("POST", "/session", {"capabilities": {"alwaysMatch": capabilities}})
+        self.session_id = value['sessionId']
+        self.capabilities = value.get('capabilities', {})
+
+    async def quit(self) -> None:
+        if self.session_id is not None:
+            await self._request("DELETE", f"/session/{self.session_id}")
+            self.session_id = None
+
+    async def command(self, method: str, path: str, payload: t.Any = None) -> t.Any:
+        if self.session_id is None:
+            raise ScriptRuntimeError("the session was not started or is already quit")
+        return await self._request(method, f"/session/{self.session_id}{path}", payload)
+
+    async def _request(self, method: str, path: str, payload: t.Any = None) -> t.Any:
+        response = await self.client.request(method, path, payload)
+        data = response.json() or {}
+        value = data.get('value') if isinstance(data, dict) else None
+        if response.status >= 400:
+            if isinstance(value, dict):
+                raise WebDriverError(value.get('error', str(response.status)), value.get('message', ""))
+            raise WebDriverError(str(response.status), response.body.decode('utf-8', 'replace'))
+        return value
+
+    def to_element(self, value: t.Dict[str, str]) -> AsyncWebElement:
+        return AsyncWebElement(self, value[ELEMENT_KEY])
+
+    def _to_json(self, value: t.Any) -> t.Any:
+        if isinstance(value, AsyncWebElement):
+            return value.to_json()
+        if isinstance(value, (list, tuple)):
+            return [self._to_json(item) for item in value]
+        return value
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def get(self, url: str) -> None:
+        await self.command("POST", "/url", {"url": url})
+
+    async def current_url(self) -> str:
+        return await self.command("GET", "/url")
+
+    async def refresh(self) -> None:
+        await self.command("POST", "/refresh", {})
+
+    async def back(self) -> None:
+        await self.command("POST", "/back", {})
+
+    async def forward(self) -> None:
+        await self.command("POST", "/forward", {})
+
+    async def window_handles(self) -> t.List[str]:
+        return await self.command("GET", "/window/handles")
+
+    async def new_window(self, kind: str) -> None:
+        value = await self.command("POST", "/window/new", {"type": kind})
+        await self.command("POST", "/window", {"handle": value['handle']})
+
+    async def close(self) -> None:
+        handles = await self.command("DELETE", "/window")
+        if handles:
+            await self.command("POST", "/window", {"handle": handles[0]})
+
+    async def screenshot(self) -> str:
+        r"""base64 of the png"""
+        return await self.command("GET", "/screenshot")
+
+    async def page_source(self) -> str:
+        return await self.command("GET", "/source")
+
+    async def alert_text(self) -> str:
+        return await self.command("GET", "/alert/text")
+
+    async def set_timeouts(self, **timeouts: float) -> None:
+        r"""implicit=, pageLoad=, script= in seconds"""
+        await self.command("POST", "/timeouts", {key: round(value * 1000) for key, value in timeouts.items()})
+
+    async def find_element(self, using: str, value: str) -> AsyncWebElement:
+        return self.to_element(await self.command("POST", "/element", {"using": using, "value": value}))
+
+    async def active_element(self) -> AsyncWebElement:
+        return self.to_element(await self.command("GET", "/element/active"))
+
+    async def execute_script(self, script: str, *args: t.Any) -> t.Any:
+        return await self.command("POST", "/execute/sync", {"script": script, "args": self._to_json(args)})
+
+    async def execute_async_script(self, script: str, *args: t.Any) -> t.Any:
+        return await self.command("POST", "/execute/async", {"script": script, "args": self._to_json(args)})
+
+    async def press_keys(self, *keys: str) -> None:
+        r"""presses the keys on the focused element"""
+        actions = []
+        for key in keys:
+            actions.append({"type": "keyDown", "value": key})
+            actions.append({"type": "keyUp", "value": key})
+        await self.command("POST", "/actions", {"actions": [{"type": "key", "id": "keyboard", "actions": actions}]})
@@ -0,0 +1,197 @@
+# -*- coding=utf-8 -*-
+r"""
+data-driven batch mode
+
+runs the same compiled script once per input row (csv or jsonl) on a pool of worker processes
+"""
+import csv
+import json
+import time
+import asyncio
+import logging
+import typing as t
+import multiprocessing as mp
+from collections import namedtuple
+from .exceptions import *
+from .engine import ScriptEngine
+from .program import Program
+from .browser_pool import BrowserPool
+from .logging_context import LoggingContext
+
+
+__all__ = ['RowResult', 'read_rows', 'run_batch', 'run_batch_async', 'log_summary', 'write_results']
+
+
+RowResult = namedtuple("RowResult", ('index', 'return_code', 'attempts', 'duration', 'error'))
+Row = t.Dict[str, t.Any]
+
+
+def read_rows(path: str) -> t.List[Row]:
+    r"""reads the rows from a .csv (with header) or .jsonl file"""
+    with open(path, newline='') as file:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in file if line.strip()]
+        else:
+            rows = list(csv.DictReader(file))
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ScriptValueParsingError(f"{path}: row {index + 1} is not an object")
+    return rows
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+class _WorkerState:
+    engine: ScriptEngine  # linked once per worker, every row is a new run of it
+    retries: int
+    browser_pool: t.Optional[BrowserPool]
+
+
+_worker = _WorkerState()
+
+
+def _init_worker(source: str, tokens: Program, debug: bool, retries: int,
+                 pool_options: t.Optional[t.Dict[str, t.Any]]):
+    _worker.retries = retries
+    _worker.browser_pool = None
+    if pool_options is not None:
+        # the browsers of the worker stay warm between rows and are quit when the worker exits
+        import multiprocessing.util  # only needed (and imported) by the workers with a browser-pool
+        _worker.browser_pool = BrowserPool(**pool_options)
+        mp.util.Finalize(_worker.browser_pool, _worker.browser_pool.close, exitpriority=10)
+    _worker.engine = ScriptEngine(source, debug=debug, tokens=tokens, browser_pool=_worker.browser_pool)
+    if _worker.browser_pool is not None:
+        # the browsers of the INIT-lines are launched before the first row (one per configuration)
+        try:
+            _worker.engine.prewarm_browsers(count=1)
+        except Exception as error:
+            logging.warning(f"could not launch the browsers ahead of time ({type(error).__name__}: {error})")
+
+
+def _run_once(row: Row) -> int:
+    try:
+        engine = _worker.engine
+        engine.reset_run(row)
+        engine.execute()
+    except QuietExit as exc:
+        return exc.return_code
+    except ScriptRuntimeError as error:
+        logging.critical(f"{type(error).__name__}: {error}")
+        return 1
+    except Exception as error:
+        logging.critical(f"Internal Error: {type(error).__name__} ({error})", exc_info=error)
+        return 1
+    return 0
+
+
+def _run_row(task: t.Tuple[int, Row]) -> RowResult:
+    index, row = task
+    process_name = mp.current_process().name
+    worker_name = "main" if process_name == "MainProcess" else f"w{process_name.rsplit('-', 1)[-1]}"
+    start = time.perf_counter()
+    return_code, attempts, error = 1, 0, None
+    with LoggingContext(workerName=worker_name, dataRow=index + 1):
+        while attempts <= _worker.retries:
+            attempts += 1
+            if attempts > 1:
+                logging.warning(f"Retrying row (attempt {attempts} of {_worker.retries + 1})")
+            return_code = _run_once(row)
+            if return_code == 0:
+                break
+        if return_code != 0:
+            error = f"failed with exit-code {return_code}"
+    return RowResult(index + 1, return_code, attempts, time.perf_counter() - start, error)
+
+
+def run_batch(engine: ScriptEngine, rows: t.List[Row], *, workers: int = 1, retries: int = 0,
+              pool_options: t.Optional[t.Dict[str, t.Any]] = None) -> t.List[RowResult]:
+    r"""
+    runs the compiled script of `engine` once per row (the row is added to the context)
+
+    every worker is a separate process with its own browser
+    (`pool_options` are passed to a BrowserPool per worker to reuse the browser between rows)
+    """
+    workers = max(1, min(workers, len(rows) or 1))
+    initargs = (engine.source, engine.tokens, engine.debug_mode, retries, pool_options)
+    tasks = list(enumerate(rows))
+
+    if workers == 1:
+        _init_worker(*initargs)
+        try:
+            return [_run_row(task) for task in tasks]
+        finally:
+            if _worker.browser_pool is not None:
+                _worker.browser_pool.close()
+
+    # fork keeps the logging-configuration and the already imported modules
+    context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+    logging.info(f"Running {len(rows)} rows on {workers} workers")
+    pool = context.Pool(processes=workers, initializer=_init_worker, initargs=initargs)
+    try:
+        results = list(pool.imap(_run_row, tasks))
+    except BaseException:
+        pool.terminate()
+        raise
+    pool.close()
+    pool.join()  # lets the workers exit normally so their browsers are quit
+    return results
+
+
+def run_batch_async(engine: ScriptEngine, rows: t.List[Row], *, webdriver_url: str, concurrency: int = 1,
+                    retries: int = 0) -> t.List[RowResult]:
+    r"""
+    like run_batch but the rows run as tasks of one event-loop (AsyncScriptEngine)
+
+    every row gets its own session on the already running webdriver-server/grid at `webdriver_url`
+    """
+    from .aio import AsyncScriptEngine, HttpClient, run_engines
+
+    concurrency = max(1, min(concurrency, len(rows) or 1))
+    logging.info(f"Running {len(rows)} rows with {concurrency} concurrent sessions")
+
+    async def run_row(idle: asyncio.Queue, index: int, row: Row) -> RowResult:
+        row_engine: AsyncScriptEngine = await idle.get()  # one linked engine per concurrent session
+        try:
+            start = time.perf_counter()
+            return_code, attempts = 1, 0
+            with LoggingContext(workerName="aio", dataRow=index + 1):
+                while attempts <= retries:
+                    attempts += 1
+                    if attempts > 1:
+                        logging.warning(f"Retrying row (attempt {attempts} of {retries + 1})")
+                    row_engine.reset_run(row)
+                    return_code, = await run_engines([row_engine])
+                    if return_code == 0:
+                        break
+            error = None if return_code == 0 else f"failed with exit-code {return_code}"
+            return RowResult(index + 1, return_code, attempts, time.perf_counter() - start, error)
+        finally:
+            idle.put_nowait(row_engine)
+
+    async def run_all() -> t.List[RowResult]:
+        async with HttpClient(webdriver_url, pool_size=concurrency) as client:
+            idle = asyncio.Queue()
+            for _ in range(concurrency):
+                idle.put_nowait(AsyncScriptEngine(engine.source, client=client, debug=engine.debug_mode,
+                                                  tokens=engine.tokens))
+            return list(await asyncio.gather(*(run_row(idle, index, row) for index, row in enumerate(rows))))
+
+    return asyncio.run(run_all())
+
+
+def log_summary(results: t.List[RowResult]) -> None:
+    failed = [result for result in results if result.return_code != 0]
+    retried = sum(1 for result in results if result.attempts > 1)
+    total = sum(result.duration for result in results)
+    for result in failed:
+        logging.error(f"row {result.index}: {result.error} after {result.attempts} attempt(s)")
+    logging.info(f"Summary: {len(results) - len(failed)} succeeded, {len(failed)} failed, {retried} retried "
+                 f"({total:.1f}s total row-time, {total / (len(results) or 1):.2f}s per row)")
+
+
+def write_results(path: str, results: t.List[RowResult]) -> None:
+    r"""writes the per-row exit status as jsonl"""
+    with open(path, 'w') as file:
+        for result in results:
+            file.write(json.dumps(result._asdict()) + "\n")
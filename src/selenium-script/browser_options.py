@@ -0,0 +1,144 @@
+# -*- coding=utf-8 -*-
+r"""
+options of INIT that make navigation cheaper
+
+INIT Chrome --headless --page-load eager --block images,fonts --block-url *://*.doubleclick.net/*
+INIT Chrome --disable-extensions --disable-background-networking
+
+- page-load: normal (wait for everything), eager (DOMContentLoaded) or none (return immediately)
+- block: resource-types that aren't loaded (images, media, fonts, stylesheets)
+- block-url: comma-separated url-patterns (`*` wildcard) that aren't loaded
+
+images/stylesheets are blocked with the content-settings of the browser, chromium-browsers additionally block
+the types (by file-extension) and the url-patterns with the DevTools-protocol once the session started
+"""
+import logging
+import typing as t
+from .exceptions import ScriptValueParsingError
+from .selenium_imports import BROWSER_NAMES, options_classes
+if t.TYPE_CHECKING:
+    from selenium.webdriver.common.options import ArgOptions
+
+
+__all__ = ['BrowserSettings', 'PAGE_LOAD_STRATEGIES', 'RESOURCE_PATTERNS',
+           'browser_settings', 'build_options', 'blocked_url_patterns', 'apply_blocking']
+
+
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+RESOURCE_PATTERNS: t.Dict[str, t.Tuple[str, ...]] = dict(
+    images=("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    media=("mp4", "webm", "ogg", "ogv", "mp3", "wav", "m4a", "m3u8", "mov"),
+    fonts=("woff", "woff2", "ttf", "otf", "eot"),
+    stylesheets=("css",),
+)
+CHROMIUM_CONTENT_SETTINGS = dict(images="images", stylesheets="stylesheets")
+FIREFOX_BLOCK_PREFERENCES: t.Dict[str, t.Dict[str, t.Any]] = dict(
+    images={"permissions.default.image": 2},
+    media={"media.autoplay.default": 5, "media.preload.default": 0},
+    fonts={"browser.display.use_document_fonts": 0, "gfx.downloadable_fonts.enabled": False},
+    stylesheets={"permissions.default.stylesheet": 2},
+)
+CHROMIUM_BACKGROUND_ARGUMENTS = (
+    "--disable-background-networking", "--disable-component-update", "--disable-sync",
+    "--disable-default-apps", "--disable-domain-reliability", "--no-first-run", "--metrics-recording-only",
+)
+FIREFOX_BACKGROUND_PREFERENCES: t.Dict[str, t.Any] = {
+    "app.update.auto": False,
+    "browser.safebrowsing.downloads.remote.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "browser.search.update": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "extensions.update.enabled": False,
+    "network.dns.disablePrefetch": True,
+    "network.prefetch-next": False,
+    "toolkit.telemetry.enabled": False,
+}
+
+
+class BrowserSettings(t.NamedTuple):
+    headless: bool = False
+    page_load: str = "normal"
+    block: t.Tuple[str, ...] = ()  # keys of RESOURCE_PATTERNS
+    block_urls: t.Tuple[str, ...] = ()
+    disable_extensions: bool = False
+    disable_background_networking: bool = False
+
+
+def _split(value: t.Optional[str]) -> t.Tuple[str, ...]:
+    return tuple(part.strip() for part in (value or "").split(',') if part.strip())
+
+
+def browser_settings(*, headless: bool = False, page_load: str = "normal", block: str = None, block_url: str = None,
+                     disable_extensions: bool = False, disable_background_networking: bool = False) -> BrowserSettings:
+    r"""validates the INIT options"""
+    page_load = page_load.lower()
+    if page_load not in PAGE_LOAD_STRATEGIES:
+        raise ScriptValueParsingError(f"unknown page-load strategy {page_load!r} ({'|'.join(PAGE_LOAD_STRATEGIES)})")
+    blocked = tuple(sorted({kind.lower() for kind in _split(block)}))
+    for kind in blocked:
+        if kind not in RESOURCE_PATTERNS:
+            raise ScriptValueParsingError(f"can't block {kind!r} ({'|'.join(RESOURCE_PATTERNS.keys())})")
+    return BrowserSettings(
+        headless=headless, page_load=page_load, block=blocked, block_urls=_split(block_url),
+        disable_extensions=disable_extensions, disable_background_networking=disable_background_networking,
+    )
+
+
+def blocked_url_patterns(settings: BrowserSettings) -> t.List[str]:
+    r"""url-patterns of the blocked resource-types and urls (for Network.setBlockedURLs)"""
+    patterns = [
+        pattern
+        for kind in settings.block
+        for extension in RESOURCE_PATTERNS[kind]
+        for pattern in (f"*.{extension}", f"*.{extension}?*")
+    ]
+    return patterns + list(settings.block_urls)
+
+
+def build_options(browser: str, settings: BrowserSettings) -> 'ArgOptions':
+    r"""options-object of the browser with the settings applied"""
+    try:
+        options = options_classes()[browser.lower()]()
+    except KeyError:
+        raise ScriptValueParsingError(f"unknown browser {browser!r} ({'|'.join(BROWSER_NAMES)})")
+    from selenium.webdriver import ChromeOptions, FirefoxOptions, EdgeOptions
+    options.page_load_strategy = settings.page_load
+    if settings.headless:
+        options.add_argument('--headless')
+    if isinstance(options, (ChromeOptions, EdgeOptions)):
+        content_settings = {
+            f"profile.managed_default_content_settings.{CHROMIUM_CONTENT_SETTINGS[kind]}": 2
+            for kind in settings.block if kind in CHROMIUM_CONTENT_SETTINGS
+        }
+        if content_settings:
+            options.add_experimental_option("prefs", content_settings)
+        if settings.disable_extensions:
+            options.add_argument("--disable-extensions")
+        if settings.disable_background_networking:
+            for argument in CHROMIUM_BACKGROUND_ARGUMENTS:
+                options.add_argument(argument)
+    elif isinstance(options, FirefoxOptions):  # a new geckodriver-profile has no extensions
+        for kind in settings.block:
+            for name, value in FIREFOX_BLOCK_PREFERENCES[kind].items():
+                options.set_preference(name, value)
+        if settings.disable_background_networking:
+            for name, value in FIREFOX_BACKGROUND_PREFERENCES.items():
+                options.set_preference(name, value)
+    elif settings.block:
+        logging.warning(f"--block is not supported by {browser!r} (ignored)")
+    return options
+
+
+def apply_blocking(driver: t.Any, settings: BrowserSettings) -> None:
+    r"""blocks the url-patterns in a started chromium-session (other drivers don't have `execute_cdp_cmd`)"""
+    patterns = blocked_url_patterns(settings)
+    if not patterns:
+        return
+    if not hasattr(driver, 'execute_cdp_cmd'):
+        if settings.block_urls:
+            logging.warning("--block-url needs a local chromium-browser (ignored)")
+        return  # the content-settings/preferences of build_options still block the types
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
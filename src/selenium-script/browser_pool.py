@@ -0,0 +1,183 @@
+# -*- coding=utf-8 -*-
+r"""
+pool of warm browser sessions
+
+`INIT` checks a session out of the pool and `QUIT` returns it after resetting its state
+(extra windows closed, cookies and storage cleared, about:blank) instead of killing it.
+
+only a local chromium-session (chrome/edge) can be reset completely: the cookies of every domain and the storage
+of every site that was opened in one of its windows are cleared over the devtools-protocol.
+the other browsers and remote sessions can only clear the cookies and storage of the page that is currently loaded,
+so they are quit instead of reused (the pool still launches them ahead of time, see `prewarm()`).
+the storage of sites that were only embedded (iframes) and the http-cache are not cleared
+"""
+import weakref
+import logging
+import urllib.parse
+import threading
+import typing as t
+from collections import defaultdict
+from selenium.common.exceptions import WebDriverException
+if t.TYPE_CHECKING:
+    from selenium.webdriver import Remote as BrowserType
+
+
+__all__ = ['BrowserPool', 'BrowserKey']
+
+
+BrowserKey = t.Tuple[str, t.Tuple[t.Tuple[str, t.Any], ...]]  # (browser-name, sorted options)
+BrowserFactory = t.Callable[[], 'BrowserType']
+
+
+class BrowserPool:
+    r"""
+    size: how many idle sessions are kept per key
+    max_uses: a session is quit after it was checked out this often (None for unlimited)
+    health_check: check that an idle session still responds before handing it out
+    """
+
+    def __init__(self, size: int = 1, *, max_uses: t.Optional[int] = None, health_check: bool = True):
+        self.size = size
+        self.max_uses = max_uses
+        self.health_check = health_check
+        self._lock = threading.Lock()  # the sessions are checked out/in from several threads (daemon)
+        self._idle: t.Dict[BrowserKey, t.List['BrowserType']] = defaultdict(list)
+        self._uses: t.MutableMapping['BrowserType', int] = weakref.WeakKeyDictionary()  # check-outs per session
+        self.created = 0
+        self.reused = 0
+
+    def __repr__(self):
+        return f"<{type(self).__name__} size={self.size} idle={sum(map(len, self._idle.values()))}>"
+
+    def checkout(self, key: BrowserKey, factory: BrowserFactory) -> 'BrowserType':
+        r"""returns an idle session for `key` or creates a new one"""
+        while True:
+            with self._lock:
+                idle = self._idle[key]
+                browser = idle.pop() if idle else None
+            if browser is None:
+                break
+            if not self.health_check or self.is_healthy(browser):
+                with self._lock:
+                    self.reused += 1
+                    self._uses[browser] = self._uses.get(browser, 0) + 1
+                logging.debug(f"Reusing pooled browser session {browser.session_id}")
+                return browser
+            logging.debug(f"Discarding unhealthy browser session {browser.session_id}")
+            self._quit(browser)
+
+        browser = factory()
+        with self._lock:
+            self.created += 1
+            self._uses[browser] = 1
+        return browser
+
+    def release(self, key: BrowserKey, browser: 'BrowserType') -> None:
+        r"""resets the session and returns it to the pool (or quits it if the pool is full)"""
+        with self._lock:
+            uses = self._uses.get(browser, 0)
+        if self.max_uses is not None and uses >= self.max_uses:
+            logging.debug(f"Browser session {browser.session_id} reached its max-uses")
+            self._quit(browser)
+            return
+        if not self.can_reset(browser):
+            logging.debug(f"Browser session {browser.session_id} can't be reset completely (not reused)")
+            self._quit(browser)
+            return
+        try:
+            self.reset(browser)
+        except WebDriverException as error:
+            logging.debug(f"Failed to reset browser session ({error.msg})")
+            self._quit(browser)
+            return
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.size:
+                idle.append(browser)
+                return
+        self._quit(browser)
+
+    def prewarm(self, key: BrowserKey, factory: BrowserFactory, count: int = None) -> None:
+        r"""launches sessions till `count` (default: size) are idle for `key`"""
+        count = self.size if count is None else min(count, self.size)
+        with self._lock:
+            missing = count - len(self._idle[key])
+        for _ in range(missing):
+            browser = factory()  # outside of the lock (takes seconds)
+            with self._lock:
+                self.created += 1
+                self._uses[browser] = 0
+                self._idle[key].append(browser)
+
+    def close(self) -> None:
+        r"""quits all idle sessions"""
+        with self._lock:
+            browsers = [browser for idle in self._idle.values() for browser in idle]
+            self._idle.clear()
+        for browser in browsers:
+            self._quit(browser)
+        if self.created:
+            logging.debug(f"Browser-pool: {self.created} sessions created, {self.reused} reused")
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    @staticmethod
+    def is_healthy(browser: 'BrowserType') -> bool:
+        try:
+            browser.current_window_handle  # noqa
+        except WebDriverException:
+            return False
+        return True
+
+    @staticmethod
+    def can_reset(browser: 'BrowserType') -> bool:
+        r"""only (local) chromium can clear the cookies and the storage of other sites than the current one"""
+        return hasattr(browser, 'execute_cdp_cmd')
+
+    @staticmethod
+    def reset(browser: 'BrowserType') -> None:
+        r"""
+        brings the session back into a clean state
+
+        the first window is kept (the url-blocking of INIT belongs to it), its history is cleared
+        """
+        origins = set()
+        handles = browser.window_handles
+        for handle in reversed(handles):
+            browser.switch_to.window(handle)
+            origins.update(visited_origins(browser))
+            if handle != handles[0]:
+                browser.close()
+        browser.get("about:blank")
+        browser.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        browser.execute_cdp_cmd("DOMStorage.enable", {})
+        for origin in sorted(origins):
+            browser.execute_cdp_cmd("Storage.clearDataForOrigin", dict(origin=origin, storageTypes="all"))
+            # the sessionStorage lives as long as the window and isn't part of "all"
+            browser.execute_cdp_cmd("DOMStorage.clear", dict(storageId=dict(securityOrigin=origin,
+                                                                             isLocalStorage=False)))
+        browser.execute_cdp_cmd("DOMStorage.disable", {})
+        browser.execute_cdp_cmd("Page.resetNavigationHistory", {})
+        browser.implicitly_wait(0)
+        browser.set_page_load_timeout(300)
+        browser.set_script_timeout(30)
+
+    def _quit(self, browser: 'BrowserType') -> None:
+        with self._lock:
+            self._uses.pop(browser, None)
+        try:
+            browser.quit()
+        except WebDriverException:
+            pass
+
+
+def visited_origins(browser: 'BrowserType') -> t.Set[str]:
+    r"""origins of the pages in the history of the current window of a chromium-session"""
+    history = browser.execute_cdp_cmd("Page.getNavigationHistory", {})
+    origins = set()
+    for entry in history.get('entries', ()):
+        url = urllib.parse.urlsplit(entry.get('url', ""))
+        if url.scheme in ("http", "https") and url.hostname:
+            port = f":{url.port}" if url.port else ""
+            origins.add(f"{url.scheme}://{url.hostname}{port}")
+    return origins
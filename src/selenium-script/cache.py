@@ -0,0 +1,102 @@
+# -*- coding=utf-8 -*-
+r"""
+persistent cache for compiled scripts (similar to __pycache__)
+
+every entry is stored next to the script in `__sscache__/`
+and keyed by the content-hash of the script, the format of the compiled program and the interpreter version.
+the entry also records the content-hash of every file that was `@include`d
+so the entry gets invalid as soon as any member of the include-graph changes.
+"""
+import os
+import sys
+import marshal
+import hashlib
+import logging
+import typing as t
+from . import __version__ as interpreter_version
+from .program import Program
+
+
+__all__ = ['CACHE_DIRNAME', 'CACHE_FORMAT', 'CACHE_TAG', 'file_digest', 'cache_path', 'load_cached', 'store_cached']
+
+
+CACHE_DIRNAME = "__sscache__"
+# has to be bumped with every change of the compiled layout (the interpreter version isn't bumped for these)
+# 1: token-tuples, 2: Program-state (string-pool and arrays), 3: blocks lowered to jump-tokens
+CACHE_FORMAT = 3
+CACHE_TAG = f"ss{interpreter_version}-f{CACHE_FORMAT}-{sys.implementation.cache_tag}"
+
+
+def file_digest(path: str) -> str:
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def cache_path(source: str, digest: str) -> str:
+    directory, filename = os.path.split(os.path.abspath(source))
+    return os.path.join(directory, CACHE_DIRNAME, f"{filename}.{digest[:16]}.{CACHE_TAG}.cache")
+
+
+def load_cached(source: str) -> t.Optional[Program]:
+    r"""returns the cached program or None if there is no (valid) entry"""
+    try:
+        digest = file_digest(source)
+        with open(cache_path(source, digest), 'rb') as file:
+            entry = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if entry.get('tag') != CACHE_TAG or 'program' not in entry:
+        return None
+    for dependency, dependency_digest in entry['dependencies'].items():
+        try:
+            if file_digest(dependency) != dependency_digest:
+                logging.debug(f"cache of {source!r} is outdated ({dependency!r} changed)")
+                return None
+        except OSError:
+            return None
+    logging.debug(f"loaded {source!r} from cache")
+    try:
+        return Program.from_state(entry['program'])
+    except (TypeError, ValueError):
+        return None
+
+
+def store_cached(source: str, dependencies: t.Dict[str, str], program: Program) -> None:
+    r"""writes the program into the cache. failing to write is not an error"""
+    source = os.path.abspath(source)
+    try:
+        digest = dependencies[source]
+    except KeyError:
+        return
+    path = cache_path(source, digest)
+    entry = dict(
+        tag=CACHE_TAG,
+        dependencies=dependencies,
+        program=program.to_state(),
+    )
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            marshal.dump(entry, file)
+        os.replace(temporary, path)
+    except OSError as error:
+        logging.debug(f"failed to write cache for {source!r} ({error})")
+        return
+    # remove the outdated entries of the same script (older content or the tag of another version/format)
+    directory, current = os.path.split(path)
+    for filename in os.listdir(directory):
+        if filename != current and _is_entry_of(filename, os.path.basename(source)):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
+
+
+def _is_entry_of(filename: str, script: str) -> bool:
+    r"""`{script}.{digest[:16]}.{any tag}.cache` (not the entry of another script whose name starts the same)"""
+    prefix = f"{script}."
+    if not filename.startswith(prefix) or not filename.endswith(".cache"):
+        return False
+    digest, dot, _ = filename[len(prefix):].partition(".")
+    return bool(dot) and len(digest) == 16 and all(char in "0123456789abcdef" for char in digest)
@@ -4,9 +4,11 @@ r"""
 """
 from .splitlist import *
 from .calling import *
+from .binding import *
 from .parsing import *
 
 __all__ = [
-    'split_list', 'call_function_with_arguments',
+    'split_list', 'call_function_with_arguments', 'BindingPlan', 'binding_plan',
     'parse_any', 'parse_string', 'parse_int', 'parse_number', 'parse_bool', 'parse_timedelta',
+    'parse_timedelta_range',
 ]
@@ -0,0 +1,108 @@
+# -*- coding=utf-8 -*-
+r"""
+
+"""
+import typing as t
+import inspect
+from ..exceptions import *
+from .splitlist import split_list
+from .parsing import parse_any, PARSE_MAP
+
+
+__all__ = ['BindingPlan', 'binding_plan']
+
+
+Parser = t.Callable[[str], t.Any]
+
+
+class BindingPlan:
+    r"""
+    precomputed layout of a function-signature
+
+    the signature is inspected once and then only applied for every call
+    """
+    __slots__ = ('parameters', 'positional', 'var_positional', 'keyword', 'var_keyword')
+
+    parameters: t.Tuple[str, ...]
+    positional: t.Tuple[t.Tuple[str, Parser, bool], ...]  # (name, parser, required)
+    var_positional: t.Optional[Parser]
+    keyword: t.Tuple[t.Tuple[str, Parser, bool], ...]  # (name, parser, required)
+    var_keyword: t.Optional[Parser]
+
+    def __init__(self, signature: inspect.Signature):
+        positional, keyword = [], []
+        self.var_positional = None
+        self.var_keyword = None
+
+        for parameter in signature.parameters.values():
+            if parameter.annotation == parameter.empty:
+                parser = parse_any
+            else:
+                parser = PARSE_MAP[parameter.annotation]
+            required = parameter.default == parameter.empty
+
+            if parameter.kind in {parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD}:
+                positional.append((parameter.name, parser, required))
+            elif parameter.kind == parameter.VAR_POSITIONAL:
+                self.var_positional = parser
+            elif parameter.kind == parameter.KEYWORD_ONLY:
+                keyword.append((parameter.name, parser, required))
+            elif parameter.kind == parameter.VAR_KEYWORD:
+                self.var_keyword = parser
+
+        self.parameters = tuple(signature.parameters.keys())
+        self.positional = tuple(positional)
+        self.keyword = tuple(keyword)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} ({' '.join(self.parameters)})>"
+
+    def bind(self, arguments: t.List[str]) -> t.Tuple[t.List[t.Any], t.Dict[str, t.Any]]:
+        r"""parses and orders the arguments according to the signature"""
+        raw_args, raw_kwargs = split_list(arguments)
+        if raw_kwargs:  # --page-load -> page_load
+            raw_kwargs = {key.replace('-', '_'): value for key, value in raw_kwargs.items()}
+        args, kwargs = [], {}
+
+        if len(raw_args) > len(self.positional) and self.var_positional is None:
+            raise ScriptSyntaxError(f"Bad parameters (expected at most {len(self.positional)} arguments)")
+        for index, (name, parser, required) in enumerate(self.positional):
+            if index < len(raw_args):
+                args.append(parser(raw_args[index]))
+            elif required:
+                raise ScriptSyntaxError(f"Bad parameters (missing {name!r})")
+            else:
+                break
+        if self.var_positional is not None:
+            args.extend(map(self.var_positional, raw_args[len(self.positional):]))
+
+        for name, parser, required in self.keyword:
+            if name in raw_kwargs:
+                kwargs[name] = parser(raw_kwargs.pop(name))
+            elif required:
+                raise ScriptSyntaxError(f"Bad parameters (missing '--{name.replace('_', '-')}')")
+        if raw_kwargs:
+            if self.var_keyword is None:
+                raise ScriptSyntaxError(
+                    f"Bad parameters (unknown {', '.join(f'--{k}'.replace('_', '-') for k in raw_kwargs)})"
+                )
+            kwargs.update((key, self.var_keyword(value)) for key, value in raw_kwargs.items())
+
+        return args, kwargs
+
+    def __call__(self, function: t.Callable, arguments: t.List[str]) -> t.Any:
+        args, kwargs = self.bind(arguments)
+        return function(*args, **kwargs)
+
+
+__plans: t.Dict[t.Tuple[t.Callable, bool], BindingPlan] = {}
+
+
+def binding_plan(function: t.Callable) -> BindingPlan:
+    r"""returns the (cached) binding-plan of a function or bound method"""
+    key = (getattr(function, '__func__', function), inspect.ismethod(function))
+    try:
+        return __plans[key]
+    except KeyError:
+        plan = __plans[key] = BindingPlan(inspect.signature(function))
+        return plan
@@ -3,6 +3,7 @@ r"""
 
 """
 import re
+import functools
 import typing as t
 import datetime as dt
 from ..exceptions import ScriptValueParsingError
@@ -10,47 +11,57 @@ from ..exceptions import ScriptValueParsingError
 
 __all__ = [
     'parse_any', 'parse_string', 'parse_int', 'parse_number', 'parse_bool', 'parse_timedelta',
-    'PARSE_MAP',
+    'parse_timedelta_range', 'PARSE_MAP',
 ]
 
 
-def filtertrue(iterable: t.Iterable) -> t.Iterable:
-    return (e for e in iterable if e)
-
-
 UNIT2FACTOR: t.Dict[str, float] = dict(
     ms=1/1000,
     s=1,
     m=60,
     h=60*60,
 )
-
-__RE_INT = re.compile(r'(?P<digits>\d+)')
-__RE_NUMBER = re.compile(r'(?P<number>\d*.\d+)')
-__RE_BOOLEAN = re.compile(r'(?P<true>true|yes|on)|(?P<false>false|no|off)')
-__RE_TIMEDELTA = re.compile(rf'(?:(?:\d+|\d*.\d+)(?:{"|".join(UNIT2FACTOR.keys())}))+')
-__RE_TIMEDELTA_SPLIT = re.compile(rf'((?:\d+|\d*.\d+)(?:{"|".join(UNIT2FACTOR.keys())}))')
-__RE_SINGLE_TIMEDELTA = re.compile(rf'(?P<amount>\d+|\d*.\d+)(?P<unit>(?:{"|".join(UNIT2FACTOR.keys())}))')
+CACHE_SIZE = 4096  # recently parsed literals per parser
+
+__AMOUNT = r'(?:\d*\.\d+|\d+)'
+__UNIT = f"(?:{'|'.join(sorted(UNIT2FACTOR.keys(), key=len, reverse=True))})"  # 'ms' before 'm'
+# one alternation classifies the value, `lastgroup` is the name of the converter
+__RE_VALUE = re.compile(
+    r'(?P<int>\d+)'
+    r'|(?P<number>\d*\.\d+)'
+    r'|(?P<true>true|yes|on)'
+    r'|(?P<false>false|no|off)'
+    rf'|(?P<timedelta>(?:{__AMOUNT}{__UNIT})+)'
+)
+__RE_TIMEDELTA_PART = re.compile(rf'({__AMOUNT})({__UNIT})')
+
+
+def _to_timedelta(string: str) -> t.Optional[dt.timedelta]:
+    r"""sums the `<amount><unit>` parts in one scan (None if anything else is in between)"""
+    seconds, length = 0.0, 0
+    for amount, unit in __RE_TIMEDELTA_PART.findall(string):
+        seconds += float(amount) * UNIT2FACTOR[unit]
+        length += len(amount) + len(unit)
+    if length == 0 or length != len(string):  # the parts don't overlap so they cover the string if the length matches
+        return None
+    return dt.timedelta(seconds=seconds)
+
+
+__CONVERTERS: t.Dict[str, t.Callable[[str], t.Any]] = dict(
+    int=int,
+    number=float,
+    true=lambda _: True,
+    false=lambda _: False,
+    timedelta=_to_timedelta,
+)
 
 
+@functools.lru_cache(maxsize=CACHE_SIZE)
 def parse_any(string: str) -> t.Any:
-    int_match = __RE_INT.fullmatch(string)
-    if int_match:
-        return int(int_match.group('digits'))
-    number_match = __RE_NUMBER.fullmatch(string)
-    if number_match:
-        return float(number_match.group('number'))
-    boolean_match = __RE_BOOLEAN.fullmatch(string)
-    if boolean_match:
-        return boolean_match.group('true') is not None
-    timedelta_match = __RE_TIMEDELTA.fullmatch(string)
-    if timedelta_match:
-        parts = filtertrue(__RE_TIMEDELTA_SPLIT.split(string))
-        return dt.timedelta(seconds=sum(
-            float(match.group("amount")) * UNIT2FACTOR[match.group("unit")]
-            for match in map(__RE_SINGLE_TIMEDELTA.fullmatch, parts)
-        ))
-    return parse_string(string)
+    match = __RE_VALUE.fullmatch(string)
+    if match is None:
+        return parse_string(string)
+    return __CONVERTERS[match.lastgroup](string)
 
 
 def parse_string(string: str) -> str:
@@ -81,15 +92,22 @@ def parse_bool(string: str) -> bool:
         raise ScriptValueParsingError(f"Can't parse to boolean: {string!r}")
 
 
+@functools.lru_cache(maxsize=CACHE_SIZE)
 def parse_timedelta(string: str) -> dt.timedelta:
-    timedelta_match = __RE_TIMEDELTA.fullmatch(string)
-    if timedelta_match is None:
+    delta = _to_timedelta(string)
+    if delta is None:
         raise ScriptValueParsingError(f"Can't parse to timedelta: {string!r}")
-    parts = filtertrue(__RE_TIMEDELTA_SPLIT.split(string))
-    return dt.timedelta(seconds=sum(
-        float(match.group("amount")) * UNIT2FACTOR[match.group("unit")]
-        for match in map(__RE_SINGLE_TIMEDELTA.fullmatch, parts)
-    ))
+    return delta
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_timedelta_range(string: str) -> t.Tuple[dt.timedelta, dt.timedelta]:
+    r"""`200ms` or `200ms-400ms` as (minimum, maximum)"""
+    minimum, separator, maximum = string.partition('-')
+    if not separator:
+        delta = parse_timedelta(string)
+        return delta, delta
+    return parse_timedelta(minimum), parse_timedelta(maximum)
 
 
 PARSE_MAP: t.Dict[t.Type, t.Callable[[str], t.Any]] = {
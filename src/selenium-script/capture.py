@@ -0,0 +1,158 @@
+# -*- coding=utf-8 -*-
+r"""
+background-writer of SCREENSHOT and SNAPSHOT
+
+the interpreter only grabs the raw payload (base64 of the png or the html) and hands it to a small thread-pool
+that decodes, deduplicates (content-hash), compresses (paths ending with .gz) and writes it.
+at most `queue_size` captures wait for a worker: when the disk falls behind, the next capture blocks (backpressure)
+instead of piling up screenshots in memory. QUIT and the end of the script wait for the pending writes (flush)
+"""
+import os
+import gzip
+import base64
+import shutil
+import hashlib
+import logging
+import threading
+import typing as t
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+
+
+__all__ = ['CaptureQueue', 'CaptureError']
+
+
+Encoding = t.Literal["base64", "text"]
+DedupKey = t.Tuple[bytes, bool]  # (digest of the raw data, compressed)
+
+
+class CaptureError(t.NamedTuple):
+    path: str
+    error: BaseException
+
+    def __str__(self):
+        return f"{self.path!r}: {type(self.error).__name__}: {self.error}"
+
+
+class _Written:
+    __slots__ = ('path', 'done')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = threading.Event()
+
+
+class CaptureQueue:
+    r"""
+    workers: threads that encode and write
+    queue_size: captures that can wait for a worker before `capture` blocks
+    compress_level: gzip-level of the .gz paths
+    """
+
+    def __init__(self, *, workers: int = 2, queue_size: int = 8, compress_level: int = 6):
+        self.compress_level = compress_level
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capture")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._pending: t.Set[Future] = set()
+        self._errors: t.List[CaptureError] = []
+        self._written: t.Dict[DedupKey, _Written] = {}
+        self._keys: t.Dict[str, DedupKey] = {}  # path -> key of its current content
+        self.captured = 0
+        self.duplicates = 0
+
+    def __repr__(self):
+        return f"<{type(self).__name__} captured={self.captured} duplicates={self.duplicates}>"
+
+    def capture(self, path: str, payload: t.Union[str, bytes], *, encoding: Encoding, block: bool = True) -> bool:
+        r"""queues the write (returns False without `block` when the queue is full)"""
+        if not self._slots.acquire(blocking=block):
+            return False
+        path = os.path.abspath(path)
+        future = self._executor.submit(self._write, path, payload, encoding)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(lambda done: self._done(done, path))
+        return True
+
+    def flush(self) -> t.List[CaptureError]:
+        r"""waits for the pending writes and returns (and forgets) the errors since the last flush"""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def close(self) -> t.List[CaptureError]:
+        errors = self.flush()
+        self._executor.shutdown(wait=True)
+        return errors
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def _done(self, future: Future, path: str) -> None:
+        with self._lock:
+            self._pending.discard(future)
+            if future.exception() is not None:
+                self._errors.append(CaptureError(path, future.exception()))
+        self._slots.release()
+
+    def _write(self, path: str, payload: t.Union[str, bytes], encoding: Encoding) -> None:
+        if encoding == "base64":
+            data = base64.b64decode(payload)
+        else:
+            data = payload.encode('utf-8') if isinstance(payload, str) else payload
+        compressed = path.endswith(".gz")
+        key = (hashlib.blake2b(data, digest_size=16).digest(), compressed)
+        with self._lock:
+            previous = self._keys.get(path)
+            if previous is not None and previous != key:
+                written = self._written.get(previous)
+                if written is not None and written.path == path:
+                    del self._written[previous]  # the file gets overwritten with a different frame
+            self._keys[path] = key
+            original = self._written.get(key)
+            first = original is None
+            if first:
+                original = self._written[key] = _Written(path)
+        if not first:
+            original.done.wait()
+            if original.path != path:
+                self._link(original.path, path)
+            with self._lock:
+                self.duplicates += 1
+            return
+        try:
+            if compressed:
+                data = gzip.compress(data, compresslevel=self.compress_level)
+            self._replace(path, data)
+            with self._lock:
+                self.captured += 1
+        except BaseException:
+            with self._lock:
+                if self._written.get(key) is original:
+                    del self._written[key]
+            raise
+        finally:
+            original.done.set()
+
+    @staticmethod
+    def _replace(path: str, data: bytes) -> None:
+        r"""writes a new file (hard-links of the previous frame with this path keep their content)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _link(source: str, path: str) -> None:
+        r"""identical frames are hard-links of the first file (copies where links aren't supported)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.lexists(path):
+            os.remove(path)
+        try:
+            os.link(source, path)
+        except OSError:
+            shutil.copyfile(source, path)
+        logging.debug(f"{os.path.basename(path)!r} is identical to {os.path.basename(source)!r}")
@@ -0,0 +1,252 @@
+# -*- coding=utf-8 -*-
+r"""
+static check of a compiled script (--check)
+
+every line whose arguments are literals gets parsed against the signature of its action and the values that
+the actions parse themselves (durations, conditions, browser-names, ...) are validated. nothing is executed.
+lines with $VAR/@KEY references can only be checked while the script runs and are counted as unchecked.
+
+the minimum runtime is estimated from the SLEEP/ACTION-DELAY/TAB/BACKSPACE delays
+(ACTION-DELAY only applies to the actions in DELAY_CLASSES):
+REPEAT/FOR-EACH with literal values are multiplied out, IF takes the cheaper branch and WHILE is skipped
+"""
+import logging
+import typing as t
+from .exceptions import ScriptRuntimeError, ScriptValueParsingError
+from .callutil import parse_timedelta, parse_timedelta_range
+from .conditions import lookup_condition, lookup_check
+from .controlflow import jump_offset
+from .logging_context import script_position
+from .browser_options import browser_settings
+from .extract import check_chunk, output_extension, parse_fields
+from .selenium_imports import BROWSER_NAMES
+from .program import Program
+from .engine import DELAY_CLASS_NAMES, Instruction, ScriptEngine
+
+
+__all__ = ['CheckReport', 'CheckError', 'StaticChecker', 'check_script', 'duration_range']
+
+
+Bound = t.Tuple[t.List[t.Any], t.Dict[str, t.Any]]
+BLOCK_NAMES = {'.repeat_init': 'repeat', '.for_init': 'for_each', '.if_not': 'if', '.if_not_var': 'if'}
+JUMPS = frozenset({'.jump', '.loop_next'})  # generated only (nothing to check)
+
+
+class CheckError(t.NamedTuple):
+    filename: str
+    line: int
+    action: str
+    message: str
+
+    def __str__(self):
+        return f"{self.filename}:{self.line}: {self.action.upper().replace('_', '-')}: {self.message}"
+
+
+class CheckReport(t.NamedTuple):
+    errors: t.List[CheckError]
+    checked: int  # lines with only literal arguments
+    unchecked: int  # lines with $VAR/@KEY references
+    minimum_runtime: float  # seconds
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return dict(
+            ok=self.ok,
+            errors=[error._asdict() for error in self.errors],
+            checked=self.checked,
+            unchecked=self.unchecked,
+            minimum_runtime=round(self.minimum_runtime, 3),
+        )
+
+
+def duration_range(parts: t.Sequence[str]) -> t.Tuple[float, float]:
+    r"""(minimum, maximum) seconds of `200ms` or `200ms - 400ms`"""
+    minimum, maximum = parse_timedelta_range(''.join(parts))
+    if minimum > maximum:
+        raise ScriptValueParsingError(f"minimum is greater than maximum: {' '.join(parts)!r}")
+    return minimum.total_seconds(), maximum.total_seconds()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+class StaticChecker:
+    r"""
+    `check_<action>` validates what the action would parse itself and returns the minimum seconds it takes.
+    ACTION-DELAY changes `delay` (the minimum delay after the actions that interact with the page)
+    or `delays` (per delay-class)
+    """
+    delay: float
+    delays: t.Dict[str, float]
+
+    def __init__(self, tokens: Program, instructions: t.Sequence[Instruction]):
+        self.tokens = tokens
+        self.instructions = instructions
+        self.delay = 0.0
+        self.delays = {}
+        self.bound: t.List[t.Optional[Bound]] = [None] * len(instructions)
+
+    def check(self) -> CheckReport:
+        errors, checked, unchecked = [], 0, 0
+        for index, instruction in enumerate(self.instructions):
+            if instruction.action in JUMPS:
+                continue
+            if not all(isinstance(argument, str) for argument in instruction.arguments):
+                unchecked += 1
+                continue
+            checked += 1
+            try:
+                self.bound[index] = self.validate(instruction)
+            except ScriptRuntimeError as exc:
+                filename, line, action = self.tokens.location(index)
+                position = script_position.set((filename, line, action, None))
+                logging.error(f"{type(exc).__name__}: {exc}")
+                script_position.reset(position)
+                errors.append(CheckError(filename, line, BLOCK_NAMES.get(action, action), str(exc)))
+        self.delay, self.delays = 0.0, {}
+        return CheckReport(errors, checked, unchecked, self.estimate(0, len(self.instructions)))
+
+    def validate(self, instruction: Instruction) -> Bound:
+        args, kwargs = instruction.plan.bind(list(instruction.arguments))
+        checker = self.checker(instruction)
+        if checker is not None:
+            checker(*args, **kwargs)
+        return args, kwargs
+
+    def checker(self, instruction: Instruction) -> t.Optional[t.Callable[..., t.Optional[float]]]:
+        r"""aliases (WARN, BACK-SPACE, ...) share the check of their action"""
+        name = instruction.function.__name__.removeprefix('action_').removeprefix('control_')
+        return getattr(self, f'check_{name}', None)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def delay_of(self, kind: t.Optional[str]) -> float:
+        if kind is None:
+            return 0.0
+        return self.delays.get(kind, self.delay)
+
+    def cost(self, index: int) -> float:
+        r"""minimum seconds of a (non-control) instruction including the delay after it"""
+        seconds = 0.0
+        instruction = self.instructions[index]
+        bound = self.bound[index]
+        if bound is not None:
+            checker = self.checker(instruction)
+            if checker is not None:
+                seconds = checker(*bound[0], **bound[1]) or 0.0
+        return seconds + self.delay_of(instruction.delay)
+
+    def loop_count(self, index: int) -> int:
+        r"""iterations of a REPEAT/FOR-EACH head (0 if they are only known at runtime)"""
+        bound = self.bound[index]
+        if bound is None:
+            return 0
+        args, kwargs = bound
+        if self.instructions[index].action == ".repeat_init":
+            return max(args[0], 0)
+        split = kwargs.get('split')
+        if split is not None:
+            return sum(1 for value in args for part in value.split(split) if part)
+        return len(args)
+
+    def estimate(self, start: int, end: int) -> float:
+        r"""minimum seconds of the instructions[start:end] (a complete block-structure)"""
+        total = 0.0
+        pointer = start
+        while pointer < end:
+            instruction = self.instructions[pointer]
+            action = instruction.action
+            if action in (".repeat_init", ".for_init"):
+                head = pointer + 1  # .loop_next
+                after = head + jump_offset(self.instructions[head])
+                count = self.loop_count(pointer)
+                if count:  # the delay set in the first iteration applies to the following ones
+                    total += self.estimate(head + 1, after - 1)
+                if count > 1:
+                    total += (count - 1) * self.estimate(head + 1, after - 1)
+                pointer = after
+            elif action in (".if_not", ".if_not_var"):
+                target = pointer + jump_offset(instruction)
+                last = self.instructions[target - 1]
+                if last.action == ".jump" and target - 1 + jump_offset(last) == pointer:  # WHILE: can run 0 times
+                    pointer = target
+                elif last.action == ".jump":  # IF ... ELSE: the cheaper branch
+                    after = target - 1 + jump_offset(last)
+                    delays = self.delay, dict(self.delays)
+                    then_branch, then_delays = self.estimate(pointer + 1, target - 1), (self.delay, self.delays)
+                    self.delay, self.delays = delays
+                    else_branch = self.estimate(target, after)
+                    if then_branch < else_branch:
+                        self.delay, self.delays = then_delays
+                    total += min(then_branch, else_branch)
+                    pointer = after
+                else:  # IF without ELSE: can be skipped
+                    pointer = target
+            elif instruction.control:
+                pointer += 1
+            else:
+                total += self.cost(pointer)
+                pointer += 1
+        return total
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    @staticmethod
+    def check_init(browser: str, *, remote: str = None, **options):
+        if browser.lower() not in BROWSER_NAMES:
+            raise ScriptValueParsingError(f"unknown browser {browser!r} ({'|'.join(BROWSER_NAMES)})")
+        browser_settings(**options)
+
+    @staticmethod
+    def check_sleep(*deltas: str) -> float:
+        return duration_range(deltas)[0]
+
+    def check_action_delay(self, *parts: str, kind: str = None):
+        if len(parts) != 1 or parts[0].lower() not in {"off", "random"}:
+            duration_range(parts)
+        delay = ScriptEngine.parse_delay(*parts)
+        minimum = 0.0 if delay is None else delay[0] if isinstance(delay, tuple) else delay
+        if kind is None:
+            self.delay = minimum
+        elif kind.lower() in DELAY_CLASS_NAMES:
+            self.delays[kind.lower()] = minimum
+        else:
+            raise ScriptValueParsingError(f"unknown delay-class {kind!r} ({'|'.join(sorted(DELAY_CLASS_NAMES))})")
+
+    def check_tab(self, times: int = 1) -> float:
+        return max(times - 1, 0) * self.delay_of("input")
+
+    check_backspace = check_tab
+
+    @staticmethod
+    def check_wait_till(what: str, query: str = None):
+        lookup_condition(what)
+
+    @staticmethod
+    def check_wait_mode(mode: str):
+        if mode.lower() not in {"poll", "event"}:
+            raise ScriptValueParsingError(f"unknown wait-mode {mode!r} (poll|event)")
+
+    @staticmethod
+    def check_wait_poll_frequency(*deltas: str):
+        parse_timedelta(''.join(deltas))
+
+    check_wait_for_timeout = check_page_load_timeout = check_implicitly_wait = check_wait_poll_frequency
+
+    @staticmethod
+    def check_if_not(offset: int, what: str, query: str = None):
+        lookup_check(what)
+
+    @staticmethod
+    def check_extract(*query: str, to: str, fields: str = "text", chunk: int = 500, **options):
+        parse_fields(fields)
+        output_extension(to)
+        check_chunk(chunk)
+
+
+def check_script(tokens: Program, instructions: t.Sequence[Instruction]) -> CheckReport:
+    r"""checks the linked instructions of a (non-streaming) engine"""
+    return StaticChecker(tokens, instructions).check()
@@ -0,0 +1,135 @@
+# -*- coding=utf-8 -*-
+r"""
+checkpoints of a running script (--checkpoint FILE) and resuming from them (--resume)
+
+the state is taken after every successful line or, if the script has CHECKPOINT lines, only at these.
+it records the position of the last finished line, the variables (without the unchanged environment),
+the state of the open REPEAT/FOR-EACH loops, the settings of the waits/delays
+and the browser: the arguments of its INIT, the timeouts, the current url and its cookies.
+
+the state is only kept in memory and written at most every `interval` seconds,
+when the script fails (the usual case: a timeout or a missing element) and at every CHECKPOINT line.
+only a killed process loses the lines of the last interval.
+url and cookies are read when the state gets written (no extra WebDriver-commands for the other lines).
+when the script fails that is after the failed line (a page it changed is restored as it is then),
+CHECKPOINT lines are written right away and keep the page right after them.
+the file is replaced atomically and removed when the script ends successfully
+so a scheduled job can always be started with `--checkpoint FILE --resume`
+"""
+import os
+import json
+import time
+import logging
+import typing as t
+
+
+__all__ = ['CHECKPOINT_VERSION', 'CheckpointFile', 'Loop', 'loop_state', 'restore_loop', 'changed_variables']
+
+
+CHECKPOINT_VERSION = 1
+LoopState = t.Tuple[t.Union[range, t.Sequence[t.Any]], int]  # (values of the loop, position)
+PageState = t.Callable[[], t.Optional[t.Dict[str, t.Any]]]  # -> url and cookies of the current page
+
+
+class Loop:
+    r"""an active REPEAT/FOR-EACH block: its values and the index of the next one"""
+    __slots__ = ('values', 'index')
+
+    def __init__(self, values: t.Union[range, t.Sequence[t.Any]], index: int = 0):
+        self.values = values
+        self.index = index
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.index}/{len(self.values)}>"
+
+
+class CheckpointFile:
+    r"""the json-file of the checkpoints (only readable by the user, it contains the variables and cookies)"""
+
+    def __init__(self, path: str, *, interval: float = 1.0):
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        self.environment = dict(os.environ)  # the variables that aren't stored
+        self.written = 0
+        self._pending: t.Optional[t.Tuple[t.Dict[str, t.Any], t.Optional[PageState]]] = None
+        self._last_write = float('-inf')
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.path!r} written={self.written}>"
+
+    def read(self) -> t.Optional[t.Dict[str, t.Any]]:
+        r"""the last checkpoint or None if there is none"""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            raise ValueError(f"broken checkpoint-file {self.path!r} ({error})") from None
+        if not isinstance(state, dict) or state.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"checkpoint-file {self.path!r} was written by another version")
+        return state
+
+    def save(self, state: t.Dict[str, t.Any], *, page: PageState = None, force: bool = False) -> None:
+        r"""
+        keeps the state and writes it if the interval passed since the last write (or with `force`)
+
+        `context` is a copy of all variables, the ones of the environment are only left out when it gets written.
+        `page` is called when the state gets written (the result becomes the `page` of its `browser`)
+        """
+        self._pending = state, page
+        if force or time.monotonic() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        r"""writes the kept state (if it isn't written yet)"""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        state, page = pending
+        if page is not None:
+            state['browser']['page'] = page()
+        state = dict(state, context=changed_variables(state['context'], self.environment), version=CHECKPOINT_VERSION)
+        content = json.dumps(state, ensure_ascii=False, default=_encode)
+        temporary = f"{self.path}.tmp"
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(descriptor, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temporary, self.path)
+        self._last_write = time.monotonic()
+        self.written += 1
+
+    def remove(self) -> None:
+        r"""the script ended successfully: the kept state is dropped and the file removed"""
+        self._pending = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        else:
+            logging.debug(f"removed checkpoint-file {self.path!r} ({self.written} checkpoints written)")
+
+
+def _encode(value: t.Any) -> t.Any:
+    if isinstance(value, range):
+        return dict(range=[value.start, value.stop, value.step])
+    return str(value)
+
+
+def loop_state(loop: Loop) -> LoopState:
+    r"""
+    the values and the position of a REPEAT (range) or FOR-EACH (list/tuple) loop
+
+    the values aren't copied (they don't change while the loop runs), only the position
+    """
+    return loop.values, loop.index
+
+
+def restore_loop(state: LoopState) -> Loop:
+    values, index = state
+    return Loop(range(*values['range']) if isinstance(values, dict) else values, index)
+
+
+def changed_variables(context: t.Mapping[str, t.Any], environment: t.Mapping[str, str]) -> t.Dict[str, t.Any]:
+    r"""the variables that aren't just copies of the environment (the environment of the resumed run is used)"""
+    return {name: value for name, value in context.items() if environment.get(name) != value}
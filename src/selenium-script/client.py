@@ -0,0 +1,152 @@
+# -*- coding=utf-8 -*-
+r"""
+client of `selenium-script serve`
+
+submits a script to the running daemon and prints the streamed log-lines.
+only uses the standard-library so `--server` doesn't pay for importing selenium.
+http.client (and with it ssl) is imported on the first connection, not by every run of `__main__`
+
+address: unix:/path/to.sock, /path/to.sock, host:port, http://host:port or :port (localhost)
+"""
+import os
+import re
+import sys
+import json
+import shlex
+import socket
+import functools
+import tempfile
+import typing as t
+if t.TYPE_CHECKING:
+    import http.client
+
+
+__all__ = ['DEFAULT_ADDRESS', 'SERVER_ENVIRONMENT_VARIABLE', 'Address', 'parse_address', 'connect',
+           'submit_job', 'server_status', 'referenced_variables', 'script_environment']
+
+
+RE_VARIABLE = re.compile(r'\$\{([^}]+?)}|\$(\S+)')  # like the templates of the engine (util.fill)
+Address = t.Union[t.Tuple[t.Literal["unix"], str], t.Tuple[t.Literal["tcp"], t.Tuple[str, int]]]
+SERVER_ENVIRONMENT_VARIABLE = "SELENIUM_SCRIPT_SERVER"
+DEFAULT_PORT = 8765
+if hasattr(socket, 'AF_UNIX'):
+    DEFAULT_ADDRESS = f"unix:{os.path.join(tempfile.gettempdir(), f'selenium-script-{os.getuid()}.sock')}"
+else:
+    DEFAULT_ADDRESS = f"127.0.0.1:{DEFAULT_PORT}"
+
+
+def parse_address(address: str) -> Address:
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    if address.startswith("http://"):
+        address = address[len("http://"):].rstrip('/')
+    elif '/' in address:
+        return "unix", address
+    host, _, port = address.rpartition(':')
+    try:
+        return "tcp", (host or "127.0.0.1", int(port))
+    except ValueError:
+        raise ValueError(f"bad server-address {address!r} (unix:/path/to.sock or host:port)") from None
+
+
+@functools.cache
+def unix_connection_class() -> t.Type['http.client.HTTPConnection']:
+    import http.client
+
+    class UnixHTTPConnection(http.client.HTTPConnection):
+        def __init__(self, path: str, timeout: t.Optional[float] = None):
+            super().__init__("localhost", timeout=timeout)
+            self.socket_path = path
+
+        def connect(self):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self.sock = sock
+
+    return UnixHTTPConnection
+
+
+def connect(address: str, *, timeout: t.Optional[float] = None) -> 'http.client.HTTPConnection':
+    import http.client
+    kind, location = parse_address(address)
+    if kind == "unix":
+        return unix_connection_class()(location, timeout=timeout)
+    host, port = location
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+
+def _request(connection: 'http.client.HTTPConnection', method: str, path: str,
+             payload: t.Any = None) -> 'http.client.HTTPResponse':
+    body = None if payload is None else json.dumps(payload).encode('utf-8')
+    connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    if response.status != 200:
+        raise ConnectionError(f"server responded with {response.status}: {response.read().decode(errors='replace')}")
+    return response
+
+
+def submit_job(address: str, script: str, *, context: t.Dict[str, str] = None, log_format: str = "text",
+               level: str = None, cache: bool = True, output: t.TextIO = None) -> int:
+    r"""runs the script on the server, writes the log-lines to `output` (stderr) and returns the exit-code"""
+    output = sys.stderr if output is None else output
+    connection = connect(address)
+    try:
+        response = _request(connection, "POST", "/run", dict(
+            script=os.path.abspath(script), context=context or {}, log_format=log_format, level=level, cache=cache,
+        ))
+        for line in response:
+            message = json.loads(line)
+            if 'log' in message:
+                print(message['log'], file=output, flush=True)
+            elif 'exit' in message:
+                return message['exit']
+        raise ConnectionError("the server closed the connection before the script ended")
+    finally:
+        connection.close()
+
+
+def referenced_variables(script: str) -> t.Set[str]:
+    r"""the $VAR/${VAR} names of the script and of the scripts it @includes"""
+    names = set()
+    pending, seen = [os.path.abspath(script)], set()
+    while pending:
+        path = os.path.realpath(pending.pop())
+        if path in seen:
+            continue
+        seen.add(path)
+        try:
+            with open(path) as file:
+                lines = file.readlines()
+        except OSError:
+            continue  # reported by the daemon when it compiles the script
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            names.update(match.group(match.lastindex) for match in RE_VARIABLE.finditer(line))
+            action, *arguments = line.split(maxsplit=1)
+            if action.lower() == "@include" and arguments:
+                try:
+                    pending.append(os.path.join(os.path.dirname(path), *shlex.split(arguments[0])))
+                except ValueError:
+                    pass
+    return names
+
+
+def script_environment(script: str, environment: t.Mapping[str, str] = None) -> t.Dict[str, str]:
+    r"""
+    the environment-variables that the script references
+
+    only those are sent to the daemon (which might be reached over tcp), not the whole environment with its secrets
+    """
+    environment = os.environ if environment is None else environment
+    return {name: environment[name] for name in referenced_variables(script) if name in environment}
+
+
+def server_status(address: str, *, timeout: float = 5) -> t.Dict[str, t.Any]:
+    connection = connect(address, timeout=timeout)
+    try:
+        return json.loads(_request(connection, "GET", "/status").read())
+    finally:
+        connection.close()
@@ -0,0 +1,195 @@
+# -*- coding=utf-8 -*-
+r"""
+conditions for WAIT-TILL
+
+every condition is only built when it is requested (no eager WebDriver round-trips).
+conditions with a javascript predicate can also be awaited event-driven (WAIT-MODE EVENT):
+a MutationObserver/readystatechange listener is injected and the wait returns as soon as the predicate is true
+"""
+import typing as t
+from .exceptions import ScriptValueParsingError
+from .util import format_action
+from .selenium_imports import By
+
+
+__all__ = ['Condition', 'CONDITIONS', 'register_condition', 'lookup_condition', 'lookup_check', 'EVENT_SCRIPT', 'POLL_SCRIPT']
+
+
+PollCondition = t.Callable[[t.Any], t.Any]
+
+
+class Condition:
+    r"""
+    poll: (engine, query) -> condition for WebDriverWait
+    script: javascript function-body with `query`, `element` and `initial` that returns a boolean
+    initial: (engine) -> value that is passed as `initial` to the script
+    change: compares against the state at the start of the wait (only usable by WAIT-TILL, not by IF/WHILE)
+    """
+    __slots__ = ('poll', 'script', 'initial', 'change')
+
+    def __init__(self, poll: t.Callable[[t.Any, t.Optional[str]], PollCondition],
+                 script: t.Optional[str] = None, initial: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+                 change: bool = False):
+        self.poll = poll
+        self.script = script
+        self.initial = initial
+        self.change = change
+
+    @property
+    def uses_element(self) -> bool:
+        return self.script is not None and 'element' in self.script
+
+    def event_script(self) -> str:
+        return EVENT_SCRIPT.replace("/*PREDICATE*/", self.script)
+
+    def poll_script(self) -> str:
+        return POLL_SCRIPT.replace("/*PREDICATE*/", self.script)
+
+
+CONDITIONS: t.Dict[str, Condition] = {}
+
+
+def register_condition(*names: str, script: str = None, initial: t.Callable[[t.Any], t.Any] = None,
+                       change: bool = False):
+    def decorator(poll):
+        for name in names:
+            CONDITIONS[name] = Condition(poll, script=script, initial=initial, change=change)
+        return poll
+    return decorator
+
+
+def lookup_condition(what: str) -> t.Tuple[Condition, bool]:
+    r"""returns the condition and if it is negated ('!VISIBLE')"""
+    negate = False
+    if what.startswith("!"):
+        negate = True
+        what = what[1:].lstrip('-')
+    try:
+        return CONDITIONS[format_action(what)], negate
+    except KeyError:
+        names = '|'.join(name.upper().replace('_', '-') for name in CONDITIONS.keys())
+        raise ScriptValueParsingError(f"unknown condition {what!r} ({names})")
+
+
+def lookup_check(what: str) -> t.Tuple[Condition, bool]:
+    r"""like `lookup_condition()` for the conditions of IF/WHILE (checked once, so there is no start of a wait)"""
+    condition, negate = lookup_condition(what)
+    if condition.change:
+        name = what.lstrip('!-').upper()
+        raise ScriptValueParsingError(f"{name} can only be waited for (WAIT-TILL {name}), not checked by IF/WHILE")
+    return condition, negate
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+EVENT_SCRIPT = r"""
+var query = arguments[0], element = arguments[1], initial = arguments[2], negate = arguments[3];
+var timeout = arguments[4], done = arguments[arguments.length - 1];
+function predicate(query, element, initial) { /*PREDICATE*/ }
+function test() {
+    var result;
+    try { result = !!predicate(query, element, initial); } catch (e) { result = false; }
+    return negate ? !result : result;
+}
+if (test()) { return done(true); }
+var observer = new MutationObserver(check);
+var interval = setInterval(check, 100);  // fallback for changes without dom-mutation (eg. url)
+var timer = setTimeout(function () { cleanup(); done(false); }, timeout);
+function cleanup() {
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    document.removeEventListener('readystatechange', check);
+    window.removeEventListener('load', check);
+}
+function check() {
+    if (test()) { cleanup(); done(true); }
+}
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+document.addEventListener('readystatechange', check);
+window.addEventListener('load', check);
+"""
+
+POLL_SCRIPT = r"""
+function predicate(query, element, initial) { /*PREDICATE*/ }
+try { return !!predicate(arguments[0], arguments[1], arguments[2]); } catch (e) { return false; }
+"""
+
+_JS_ELEMENT = "var el = query ? document.querySelector(query) : element;"
+_JS_VISIBLE = (
+    "return !!el && !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)"
+    " && window.getComputedStyle(el).visibility !== 'hidden';"
+)
+_JS_HIDDEN = (
+    "return !(el.offsetWidth || el.offsetHeight || el.getClientRects().length)"
+    " || window.getComputedStyle(el).visibility === 'hidden';"
+)
+
+
+def _located(query: str) -> t.Tuple[str, str]:
+    return By.CSS_SELECTOR, query
+
+
+@register_condition('element', 'element_exists', script=f"{_JS_ELEMENT} return !!el;")
+def _element(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    if query:
+        return expected_conditions.presence_of_element_located(_located(query))
+    element = engine.web_element
+    return lambda driver: element
+
+
+@register_condition('alert')
+def _alert(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    return expected_conditions.alert_is_present()
+
+
+@register_condition('new_window', change=True)
+def _new_window(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    return expected_conditions.new_window_is_opened(engine.browser.window_handles)
+
+
+@register_condition('clickable', script=f"{_JS_ELEMENT} if (!el || el.disabled) return false; {_JS_VISIBLE}")
+def _clickable(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    return expected_conditions.element_to_be_clickable(_located(query) if query else engine.web_element)
+
+
+@register_condition('visible', 'visibility', script=f"{_JS_ELEMENT} {_JS_VISIBLE}")
+def _visible(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    if query:
+        return expected_conditions.visibility_of_element_located(_located(query))
+    return expected_conditions.visibility_of(engine.web_element)
+
+
+@register_condition('invisibility', 'invisible', script=f"{_JS_ELEMENT} if (!el) return true; {_JS_HIDDEN}")
+def _invisibility(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    return expected_conditions.invisibility_of_element(_located(query) if query else engine.web_element)
+
+
+@register_condition('url_change', script="return window.location.href !== initial;",
+                    initial=lambda engine: engine.browser.current_url, change=True)
+def _url_change(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    return expected_conditions.url_changes(engine.browser.current_url)
+
+
+@register_condition('url', 'url_to_be', script="return window.location.href === query;")
+def _url_to_be(engine, query):
+    from selenium.webdriver.support import expected_conditions
+    return expected_conditions.url_to_be(query)
+
+
+@register_condition('interactive', 'page_interactive', script="return document.readyState === 'interactive';")
+def _page_interactive(engine, query):
+    return lambda driver: driver.execute_script("return document.readyState") == "interactive"
+
+
+@register_condition('loaded', 'page_loaded', script="return document.readyState === 'complete';")
+def _page_loaded(engine, query):
+    return lambda driver: driver.execute_script("return document.readyState") == "complete"
@@ -0,0 +1,142 @@
+# -*- coding=utf-8 -*-
+r"""
+block constructs (REPEAT/FOR-EACH/IF/ELSE/WHILE/END)
+
+the blocks are lowered into a flat token-stream with relative jumps so the engine
+only follows an instruction-pointer. the generated tokens keep the filename and line of the
+block-keyword so logging still reports the original source line.
+
+REPEAT 3                .repeat_init 3
+    TAB                 .loop_next +3           (leaves the loop when the counter is exhausted)
+END                     TAB
+                        .jump -2
+
+IF ELEMENT-EXISTS .x    .if_not +3 ELEMENT-EXISTS .x
+    CLICK               CLICK
+ELSE                    .jump +2
+    TAB                 TAB
+END
+"""
+import typing as t
+from .program import Token
+from .conditions import lookup_check
+from .exceptions import ScriptValueParsingError
+if t.TYPE_CHECKING:
+    from .engine import Instruction
+
+
+__all__ = ['BLOCK_KEYWORDS', 'JUMP_OPERATIONS', 'CONTROL_PREFIX', 'lower_blocks', 'jump_offset']
+
+
+BLOCK_KEYWORDS = frozenset({'repeat', 'for_each', 'while', 'if', 'else', 'end'})
+CONTROL_PREFIX = "."  # can't be written in a script because the action-name would be '.something'
+JUMP_OPERATIONS = frozenset({'.jump', '.if_not', '.if_not_var', '.loop_next'})  # first argument is the offset
+ErrorCallback = t.Callable[[str], None]
+
+
+class _Block:
+    __slots__ = ('token', 'start', 'branch')
+
+    def __init__(self, token: Token, start: int, branch: t.Optional[int] = None):
+        self.token = token
+        self.start = start  # index of the instruction the loop jumps back to
+        self.branch = branch  # index of the forward-jump that has to be patched at ELSE/END
+
+
+def jump_offset(token: t.Union[Token, 'Instruction']) -> t.Optional[int]:
+    r"""relative jump-target of a control-token or its instruction (None for the others)"""
+    if token.action in JUMP_OPERATIONS:
+        return int(token.arguments[0])
+    return None
+
+
+def _control(token: Token, operation: str, *arguments: str) -> Token:
+    return Token(token.filename, token.line, f"{CONTROL_PREFIX}{operation}", arguments)
+
+
+def _condition(token: Token, error: ErrorCallback) -> Token:
+    r"""IF/WHILE condition: `$VAR`, `!$VAR` or a WAIT-TILL condition like `ELEMENT-EXISTS .cookie-banner`"""
+    if not token.arguments:
+        error(f"line {token.line}: {token.action.upper()} needs a condition")
+        return _control(token, 'if_not_var', "0", "")
+    what, *query = token.arguments
+    variable = what.lstrip('!')
+    if variable.startswith('$'):
+        if query:
+            error(f"line {token.line}: only one variable can be tested ({token.action.upper()} $VAR)")
+        name = variable[2:-1] if variable.startswith('${') and variable.endswith('}') else variable[1:]
+        return _control(token, 'if_not_var', "0", "!" * (len(what) - len(variable)) + name)
+    if '$' not in what:
+        try:
+            lookup_check(what)
+        except ScriptValueParsingError as exc:
+            error(f"line {token.line}: {exc}")
+    if len(query) > 1:
+        error(f"line {token.line}: too many parameters ({token.action.upper()} condition [query])")
+    return _control(token, 'if_not', "0", what, *query)
+
+
+def _patch(buffer: t.List[Token], index: int, target: int) -> None:
+    token = buffer[index]
+    buffer[index] = token._replace(arguments=(str(target - index), *token.arguments[1:]))
+
+
+def lower_blocks(tokens: t.Iterable[Token], error: ErrorCallback) -> t.Iterator[Token]:
+    r"""
+    replaces the block-keywords with control-tokens
+
+    tokens outside of blocks are passed through directly, a block is yielded as a whole once its END is reached
+    (the jumps are relative so an already lowered @include can be placed anywhere)
+    """
+    stack: t.List[_Block] = []
+    buffer: t.List[Token] = []
+
+    for token in tokens:
+        action = token.action
+        if action not in BLOCK_KEYWORDS:
+            if not stack:
+                yield token
+                continue
+            buffer.append(token)
+        elif action == 'repeat':
+            if len(token.arguments) != 1:
+                error(f"line {token.line}: REPEAT needs exactly one count")
+            buffer.append(_control(token, 'repeat_init', *token.arguments[:1]))
+            stack.append(_Block(token, len(buffer), branch=len(buffer)))
+            buffer.append(_control(token, 'loop_next', "0"))
+        elif action == 'for_each':
+            if not token.arguments:
+                error(f"line {token.line}: FOR-EACH needs a variable-name (FOR-EACH NAME values...)")
+            name, *values = token.arguments or ("",)
+            buffer.append(_control(token, 'for_init', *values))
+            stack.append(_Block(token, len(buffer), branch=len(buffer)))
+            buffer.append(_control(token, 'loop_next', "0", name))
+        elif action in ('while', 'if'):
+            stack.append(_Block(token, len(buffer), branch=len(buffer)))
+            buffer.append(_condition(token, error))
+        elif action == 'else':
+            if not stack or stack[-1].token.action != 'if':
+                error(f"line {token.line}: ELSE without IF")
+                continue
+            block = stack[-1]
+            if buffer[block.branch].action == f"{CONTROL_PREFIX}jump":
+                error(f"line {token.line}: IF (line {block.token.line}) has more than one ELSE")
+                continue
+            buffer.append(_control(token, 'jump', "0"))
+            _patch(buffer, block.branch, len(buffer))
+            block.branch = len(buffer) - 1
+        else:  # end
+            if not stack:
+                error(f"line {token.line}: END without block")
+                continue
+            block = stack.pop()
+            if block.token.action != 'if':  # loops jump back to their head
+                buffer.append(_control(token, 'jump', str(block.start - len(buffer))))
+            _patch(buffer, block.branch, len(buffer))
+
+        if not stack and buffer:
+            yield from buffer
+            buffer.clear()
+
+    for block in stack:
+        error(f"line {block.token.line}: {block.token.action.upper().replace('_', '-')} is never closed (missing END)")
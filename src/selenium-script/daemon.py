@@ -0,0 +1,321 @@
+# -*- coding=utf-8 -*-
+r"""
+`selenium-script serve`: long-running daemon that keeps the interpreter and the browsers warm
+
+the client (`selenium-script --server ADDRESS script.ss`) posts the script-path and its variables,
+the daemon runs it on a thread of its job-pool (at most `concurrency` scripts at once, the others wait)
+with the shared BrowserPool and streams the log-lines and finally the exit-code back as json-lines.
+
+POST /run      {"script": path, "context": {...}, "log_format": "text|jsonl", "level": "INFO", "cache": true}
+               -> {"log": line} ... {"exit": code}
+GET  /status   -> running/queued/finished jobs and the reuse of the browsers
+
+compiled scripts stay in memory and are only compiled again when the script or one of its includes changes
+"""
+import os
+import json
+import queue
+import socket
+import logging
+import threading
+import contextvars
+import typing as t
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .exceptions import *
+from .engine import ScriptEngine
+from .program import Program
+from .browser_pool import BrowserPool
+from .logging_context import LoggingContext
+from .logging_sink import JsonLinesFormatter, text_formatter
+from .client import parse_address
+
+
+__all__ = ['ScriptDaemon', 'Job', 'JobLogFilter', 'ProgramCache', 'current_job']
+
+
+class Job:
+    r"""one submitted script. `lines` gets the log-lines ({"log": ...}) and at last the exit-code ({"exit": ...})"""
+    __slots__ = ('id', 'script', 'context', 'level', 'cache', 'formatter', 'lines', 'detached')
+
+    def __init__(self, job_id: int, script: str, *, context: t.Dict[str, str], log_format: str = "text",
+                 level: t.Optional[str] = None, cache: bool = True):
+        self.id = job_id
+        self.script = script
+        self.context = context
+        self.level = logging.getLevelName(level.upper()) if level else logging.INFO
+        if not isinstance(self.level, int):
+            raise ValueError(f"unknown logging-level {level!r}")
+        self.cache = cache
+        self.formatter = JsonLinesFormatter() if log_format == "jsonl" else text_formatter()
+        self.lines: queue.SimpleQueue = queue.SimpleQueue()
+        self.detached = False  # the client disconnected (the script still runs till its end)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} #{self.id} {self.script!r}>"
+
+
+current_job: contextvars.ContextVar[t.Optional[Job]] = contextvars.ContextVar("current_job", default=None)
+
+
+class JobLogFilter(logging.Filter):
+    r"""
+    passes the records of a job to its client (formatted in the job's thread so the lines are in the stream
+    before the exit-code) and only lets the records of `level` through to the log of the daemon
+    """
+
+    def __init__(self, level: int):
+        super().__init__()
+        self.level = level
+
+    def filter(self, record):
+        job = current_job.get()
+        if job is not None and not job.detached and record.levelno >= job.level:
+            job.lines.put({'log': job.formatter.format(record)})
+        return record.levelno >= self.level
+
+
+class ProgramCache:
+    r"""compiled scripts by path (valid as long as the modification-times of the script and its includes match)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._programs: t.Dict[str, t.Tuple[t.Dict[str, int], Program]] = {}
+
+    @staticmethod
+    def _mtimes(paths: t.Iterable[str]) -> t.Optional[t.Dict[str, int]]:
+        try:
+            return {path: os.stat(path).st_mtime_ns for path in paths}
+        except OSError:
+            return None
+
+    def get(self, script: str) -> t.Optional[Program]:
+        with self._lock:
+            entry = self._programs.get(script)
+        if entry is None:
+            return None
+        mtimes, program = entry
+        return program if self._mtimes(mtimes.keys()) == mtimes else None
+
+    def store(self, script: str, engine: ScriptEngine) -> None:
+        if not engine.dependencies:  # loaded from the __sscache__ (the includes aren't known)
+            return
+        mtimes = self._mtimes(engine.dependencies.keys())
+        if mtimes is not None:
+            with self._lock:
+                self._programs[script] = mtimes, engine.tokens
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+class ScriptDaemon:
+    r"""
+    concurrency: scripts that run at once (more jobs wait for a free slot)
+    browser_pool: the warm browsers shared by the jobs (INIT/QUIT check them out/in)
+    """
+
+    def __init__(self, address: str, *, concurrency: int = 4, browser_pool: BrowserPool = None,
+                 debug: bool = False):
+        self.address = address
+        self.concurrency = concurrency
+        self.browser_pool = browser_pool
+        self.debug = debug
+        self.programs = ProgramCache()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.queued = self.running = self.finished = self.failed = 0
+        self.server = self._create_server()
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.address} running={self.running} queued={self.queued}>"
+
+    def _create_server(self) -> socketserver.BaseServer:
+        kind, location = parse_address(self.address)
+        handler = type("Handler", (_RequestHandler,), dict(daemon=self))
+        if kind == "unix":
+            if os.path.exists(location):
+                _remove_stale_socket(location)
+            umask = os.umask(0o077)  # only the user that started the daemon may submit scripts (from bind on)
+            try:
+                return _UnixHTTPServer(location, handler)
+            finally:
+                os.umask(umask)
+        return ThreadingHTTPServer(location, handler)
+
+    def prewarm(self, scripts: t.Iterable[str]) -> None:
+        r"""launches the browsers of the INIT-lines of the scripts before the first job arrives (and compiles them)"""
+        if self.browser_pool is None:
+            return
+        for script in scripts:
+            script = os.path.abspath(script)
+            try:
+                engine = ScriptEngine(script, debug=self.debug, browser_pool=self.browser_pool)
+            except FileNotFoundError:
+                logging.error(f"script-file {script!r} to prewarm could not be found")
+                continue
+            except QuietExit:  # the compile-errors are already logged
+                continue
+            self.programs.store(script, engine)
+            configurations = engine.prewarm_browsers()
+            logging.info(f"Launched the browsers of {configurations} INIT-configuration(s) of {script!r}")
+
+    def serve_forever(self) -> None:
+        logging.info(f"Serving on {self.address} ({self.concurrency} scripts at once)")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        r"""stops serve_forever (from another thread)"""
+        self.server.shutdown()
+
+    def close(self) -> None:
+        r"""waits for the running jobs (queued ones are cancelled) and quits the warm browsers"""
+        self.server.server_close()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+        kind, location = parse_address(self.address)
+        if kind == "unix" and os.path.exists(location):
+            os.remove(location)
+
+    def status(self) -> t.Dict[str, t.Any]:
+        pool = self.browser_pool
+        return dict(
+            concurrency=self.concurrency, queued=self.queued, running=self.running,
+            finished=self.finished, failed=self.failed,
+            browsers=None if pool is None else dict(created=pool.created, reused=pool.reused),
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def submit(self, request: t.Dict[str, t.Any]) -> Job:
+        script = request.get('script')
+        context = request.get('context') or {}
+        if not isinstance(script, str) or not isinstance(context, dict):
+            raise ValueError("`script` has to be a path and `context` an object")
+        with self._lock:
+            self._next_id += 1
+            job = Job(self._next_id, os.path.abspath(script), context={str(k): str(v) for k, v in context.items()},
+                      log_format=request.get('log_format', "text"), level=request.get('level'),
+                      cache=bool(request.get('cache', True)))
+            self.queued += 1
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        token = current_job.set(job)
+        return_code = 1
+        try:
+            with LoggingContext(workerName=f"j{job.id}"):
+                return_code = self.execute(job)
+        finally:
+            current_job.reset(token)
+            with self._lock:
+                self.running -= 1
+                self.finished += 1
+                if return_code != 0:
+                    self.failed += 1
+            job.lines.put({'exit': return_code})  # even if the job broke (the client would wait forever)
+
+    def execute(self, job: Job) -> int:
+        try:
+            engine = self.engine(job)
+            engine.execute()
+        except FileNotFoundError:
+            logging.critical(f"script-file {job.script!r} could not be found")
+            return 1
+        except QuietExit as exc:
+            return exc.return_code
+        except ScriptRuntimeError as error:
+            logging.critical(f"{type(error).__name__}: {error}")
+            return 1
+        except Exception as error:
+            logging.critical(f"Internal Error: {type(error).__name__} ({error})", exc_info=error)
+            return 1
+        return 0
+
+    def engine(self, job: Job) -> ScriptEngine:
+        program = self.programs.get(job.script) if job.cache else None
+        if program is not None:
+            return ScriptEngine(job.script, debug=self.debug, context=job.context, tokens=program,
+                                browser_pool=self.browser_pool)
+        engine = ScriptEngine(job.script, debug=self.debug, context=job.context, use_cache=job.cache,
+                              browser_pool=self.browser_pool)
+        if job.cache:
+            self.programs.store(job.script, engine)
+        return engine
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("local", 0)  # BaseHTTPRequestHandler expects a (host, port) client-address
+
+
+def _remove_stale_socket(path: str) -> None:
+    r"""a socket-file of a crashed daemon is removed, a running daemon isn't replaced"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        raise OSError(f"another daemon is already listening on {path!r}")
+    finally:
+        probe.close()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    daemon: ScriptDaemon
+    server_version = "selenium-script"
+
+    def log_message(self, format: str, *args):
+        logging.debug(f"{self.command} {self.path}")
+
+    def send_json(self, status: int, payload: t.Any) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/status":
+            return self.send_json(404, dict(error=f"unknown path {self.path!r}"))
+        self.send_json(200, self.daemon.status())
+
+    def do_POST(self):
+        if self.path != "/run":
+            return self.send_json(404, dict(error=f"unknown path {self.path!r}"))
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            job = self.daemon.submit(request)
+        except (ValueError, TypeError, AttributeError) as error:
+            return self.send_json(400, dict(error=str(error)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()  # HTTP/1.0: the stream ends with the connection
+        while True:
+            message = job.lines.get()
+            try:
+                self.wfile.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n")
+            except OSError:
+                job.detached = True
+                logging.warning(f"client of job #{job.id} disconnected (the script keeps running)")
+                return
+            if 'exit' in message:
+                return
@@ -6,71 +6,200 @@ import os
 import time
 import shlex
 import random
-import inspect
 import logging
+import functools
 import typing as t
-from collections import namedtuple
-from dotenv import dotenv_values
-from selenium.webdriver import (
-    Keys,
-    Chrome as ChromeBrowser,
-    ChromeOptions,
-    Firefox as FirefoxBrowser,
-    FirefoxOptions,
-    Edge as EdgeBrowser,
-    EdgeOptions,
-    Safari as SafariBrowser,
-    SafariOptions,
-    Remote as BrowserType,
-)
-from selenium.webdriver.remote.webelement import WebElement, By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions
+from collections import namedtuple, deque
 from selenium.common.exceptions import *
 from .exceptions import *
 from .util import *
 from .callutil import *
-from .logging_context import LoggingContext
-
-
-KEYS_CONTEXT = {
-    f'@{name}': getattr(Keys, name)
-    for name in dir(Keys)
-    if name.isupper()
+from .logging_context import script_position
+from .cache import file_digest, load_cached, store_cached
+from .program import Token, Program
+from .browser_pool import BrowserPool, BrowserKey
+from .selenium_imports import By, BROWSER_NAMES, keys_class, keys_context, focus_changing_keys, browser_classes
+from .browser_options import BrowserSettings, browser_settings, build_options, apply_blocking
+from .capture import CaptureQueue
+from .checkpoint import CheckpointFile, Loop, loop_state, restore_loop
+from .extract import RowWriter, Step, extraction, open_row_writer, parse_fields
+from .profiler import Profiler
+from .conditions import Condition, lookup_condition, lookup_check
+from .controlflow import BLOCK_KEYWORDS, CONTROL_PREFIX, lower_blocks, jump_offset
+if t.TYPE_CHECKING:
+    from selenium.webdriver import Remote as BrowserType
+    from selenium.webdriver.remote.webelement import WebElement
+
+
+# ACTION-DELAY only paces the actions that interact with the page (per class, see `action_delays`)
+DELAY_CLASSES: t.Dict[str, str] = {
+    **dict.fromkeys(('init', 'new_tab', 'new_window', 'close', 'quit', 'visit', 'refresh', 'forward', 'back'),
+                    "navigation"),
+    **dict.fromkeys(('select', 'waiting_select', 'select_name', 'select_xpath', 'select_link_text',
+                     'select_link_partial_text', 'unselect'), "select"),
+    **dict.fromkeys(('type', 'hotkey', 'return', 'space', 'backspace', 'tab', 'escape', 'click'), "input"),
+    'wait_till': "wait",
+    'extract': "navigation",  # can click through the pages
+}
+DELAY_CLASS_NAMES = frozenset(DELAY_CLASSES.values())
+# engine-settings that are stored in a checkpoint (the browser-timeouts are part of the browser-setup)
+CHECKPOINT_SETTINGS = ('wait_for_timeout', 'wait_poll_frequency', 'wait_mode', 'delay_between_actions',
+                       'action_delays')
+TIMEOUT_SETTERS = dict(page_load="set_page_load_timeout", implicit="implicitly_wait")
+# selections that are already looked up while the delay before them runs
+PRELOCATE_BY = dict(action_select=By.CSS_SELECTOR, action_select_name=By.NAME, action_select_xpath=By.XPATH)
+# the look-up ahead is a script: it never blocks in the implicit-wait (a missing element is only waited for by the line)
+PRELOCATE_SCRIPTS = {
+    By.CSS_SELECTOR: "return document.querySelector(arguments[0]);",
+    By.NAME: "return document.getElementsByName(arguments[0])[0] || null;",
+    By.XPATH: "return document.evaluate(arguments[0], document, null, "
+              "XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;",
 }
-Token = namedtuple("Tokens", ('filename', 'line', 'action', 'arguments'))
-MacroFunction = t.Callable[[t.TextIO, int, t.Tuple[str, ...]], t.Optional[t.List[Token]]]
+Delay = t.Optional[t.Union[float, t.Tuple[float, float]]]
+# control-instructions (jumps/loops) return the relative offset of the next instruction
+# delay: class of the action in DELAY_CLASSES (None if it isn't delayed)
+# the lines with the same action and arguments share their instruction (the position is kept in the Program)
+Instruction = namedtuple("Instruction", ('action', 'function', 'plan', 'arguments', 'bound', 'control', 'delay'))
+Location = t.Tuple[str, int, str]  # (filename, line, action)
+Segment = t.Tuple[Program, t.List[Instruction]]  # the lines of a self-contained piece and their instructions
+# attributes that a run changes from their class-defaults (reset_run goes back to these)
+RUN_STATE = ('_browser', '_browser_key', '_web_element', 'element_lookups', 'element_lookups_saved',
+             'delay_between_actions', '_prelocated', 'elements_prelocated', '_prelocate_seconds', 'wait_for_timeout',
+             'wait_poll_frequency', 'wait_mode', '_capture_queue', '_browser_setup', '_page_state')
+Prepared = t.Tuple[Instruction, t.Tuple[t.List[t.Any], t.Dict[str, t.Any]]]
+MacroFunction = t.Callable[[t.TextIO, int, t.Tuple[str, ...]], t.Optional[t.Iterable[Token]]]
 ActionFunction = t.Callable[[t.Any, ...], None]
 
 
+class ScriptContext(dict):
+    r"""the variables of a script. the @KEY-references are only looked up (and selenium imported) when used"""
+
+    def __missing__(self, key: str) -> str:
+        if key.startswith('@'):
+            return keys_context()[key]
+        raise KeyError(key)
+
+
 class ScriptEngine:
-    _browser: t.Optional[BrowserType] = None
-    _web_element: t.Optional[WebElement] = None
-    delay_between_actions: t.Optional[t.Union[float, t.Tuple[float, float]]] = 0.0
+    _browser: t.Optional['BrowserType'] = None
+    _browser_key: t.Optional[BrowserKey] = None
+    browser_pool: t.Optional[BrowserPool] = None
+    profiler: t.Optional[Profiler] = None
+    _web_element: t.Optional['WebElement'] = None  # selected or cached active element
+    element_lookups: int = 0
+    element_lookups_saved: int = 0
+    delay_between_actions: Delay = 0.0
+    _prelocated: t.Optional[t.Tuple[t.Tuple[str, str], 'WebElement']] = None  # ((by, value), element)
+    elements_prelocated: int = 0
+    _prelocate_seconds: float = 0.0  # duration of the last look-up ahead (skipped if it doesn't fit the rest of the delay)
     wait_for_timeout: float = 60
+    wait_poll_frequency: float = 0.5
+    wait_mode: t.Literal["poll", "event"] = "poll"
+    _capture_queue: t.Optional[CaptureQueue] = None  # started by the first SCREENSHOT/SNAPSHOT
+    checkpoints: t.Optional[CheckpointFile] = None  # --checkpoint
+    resume_state: t.Optional[t.Dict[str, t.Any]] = None  # --resume: the checkpoint to continue after
+    has_checkpoint_lines: bool = False  # checkpoints are only written at the CHECKPOINT lines
+    _browser_setup: t.Optional[t.Dict[str, t.Any]] = None  # arguments of INIT and the timeouts (for --resume)
+    _page_state: t.Optional[t.Dict[str, t.Any]] = None  # url and cookies of the last written checkpoint
+    _source_digest: t.Optional[str] = None
 
     debug_mode: bool
     source: str
-    tokens: t.List[Token]
+    tokens: t.Optional[Program]  # None while streaming
+    instructions: t.Optional[t.List[Instruction]]  # one per line of `tokens` (None while streaming)
+    _functions: t.Dict[str, ActionFunction]  # the bound action-/control-methods by action-name
+    loops: t.List[Loop]  # the active REPEAT/FOR-EACH blocks
+    action_delays: t.Dict[str, Delay]  # ACTION-DELAY ... --kind <class> (overrides delay_between_actions)
+    dependencies: t.Dict[str, str]
+    compile_errors: int
+    include_chain: t.List[str]  # real-paths of the scripts that are currently compiled
+    include_cache: t.Dict[t.Tuple[str, int], Program]  # (real-path, mtime) -> compiled include
+    outputs: t.Dict[str, RowWriter]  # files of EXTRACT (open until the script ends)
     context: t.Dict[str, t.Any]
+    _given_context: t.Dict[str, t.Any]  # the context of the caller (--var), it wins over the one of a checkpoint
 
-    def __init__(self, source: str, *, debug: bool = False, context: t.Dict[str, t.Any] = None):
+    def __init__(self, source: str, *, debug: bool = False, context: t.Dict[str, t.Any] = None,
+                 use_cache: bool = True, tokens: t.Iterable[Token] = None, browser_pool: BrowserPool = None,
+                 streaming: bool = False, lookahead: int = 1000):
         self.debug_mode = debug
+        self.browser_pool = browser_pool
         self.source = source
-        with open(source) as source_file:
-            self.tokens = self.compile(source_file)
-        self.context = dict()
-        self.context.update(KEYS_CONTEXT)
+        self.dependencies = {}
+        self.compile_errors = 0
+        self.include_chain = []
+        self.include_cache = {}
+        self._functions = {}
+        self._stream = None
+        if streaming and tokens is None:
+            self.tokens = None
+            self.instructions = None
+            self._stream = self.stream(source, lookahead=lookahead)
+        else:
+            if tokens is None:
+                self.tokens = self.load(source, use_cache=use_cache)
+            else:
+                self.tokens = tokens if isinstance(tokens, Program) else Program(tokens)
+            self.instructions = self.link(self.tokens)
+        self.reset_run(context)
+
+    def reset_run(self, context: t.Dict[str, t.Any] = None):
+        r"""
+        prepares a new run of the linked instructions (eg. the next row of --data):
+        the settings, loops and counters go back to their defaults and the context is fresh
+        """
+        for name in RUN_STATE:
+            self.__dict__.pop(name, None)
+        self.loops = []
+        self.action_delays = {}
+        self.outputs = {}
+        self._given_context = dict(context) if context else {}
+        self.context = ScriptContext()
         self.context.update(os.environ)
         if context:
             self.context.update(context)
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
-    def compile(self, source: t.TextIO) -> t.List[Token]:
-        tokens: t.List[Token] = []
-        any_error = False
+    def load(self, source: str, *, use_cache: bool = True) -> Program:
+        r"""compiles the script or loads it from the cache"""
+        if use_cache:
+            cached = load_cached(source)
+            if cached is not None:
+                return cached
+        with open(source) as source_file:
+            program = self.compile(source_file)
+        if use_cache:
+            store_cached(source, dependencies=self.dependencies, program=program)
+        return program
+
+    def compile(self, source: t.TextIO) -> Program:
+        program = Program(self.compile_iter(source))
+        if self.compile_errors:
+            logging.critical("Script failed during compilation")
+            raise QuietExit(1)
+        return program
+
+    def compile_iter(self, source: t.TextIO) -> t.Iterator[Token]:
+        r"""
+        yields the tokens line by line (included scripts are expanded inline)
+
+        errors are logged and counted in `compile_errors` so all of them get reported
+        """
+        if not hasattr(source, 'name'):
+            yield from lower_blocks(self._compile_lines(source), self._compile_error)
+            return
+        self.dependencies[os.path.abspath(source.name)] = file_digest(source.name)
+        self.include_chain.append(os.path.realpath(source.name))
+        try:
+            yield from lower_blocks(self._compile_lines(source), self._compile_error)
+        finally:
+            self.include_chain.pop()
 
+    def _compile_error(self, message: str) -> None:
+        self.compile_errors += 1
+        logging.error(message)
+
+    def _compile_lines(self, source: t.TextIO) -> t.Iterator[Token]:
         for line_index, line in enumerate(source):
             line_number = line_index + 1
             line: str = line.strip()
@@ -84,103 +213,514 @@ class ScriptEngine:
                 macro: MacroFunction = getattr(self, f'macro_{macro_name}')
                 macro_tokens = macro(source, line_number, args)
                 if macro_tokens is not None:
-                    tokens.extend(macro_tokens)
+                    yield from macro_tokens
                 else:
-                    any_error = True
+                    self.compile_errors += 1
+                continue
+
+            if action_name in BLOCK_KEYWORDS:  # lowered by lower_blocks()
+                yield Token(os.path.basename(source.name), line_number, action_name, tuple(args))
                 continue
 
             action: ActionFunction = getattr(self, f'action_{action_name}', None)
             if action is None:
-                any_error = True
+                self.compile_errors += 1
                 logging.error(f"line {line_number}: unknown action {action_raw!r}")
                 continue
-            signature = inspect.signature(action)
-            if (
-                len(args) > len(signature.parameters)
-                and not any(param.kind == param.VAR_POSITIONAL for param in signature.parameters.values())
-            ):
-                any_error = True
+            plan = binding_plan(action)
+            positional, _ = split_list(args)  # '--option value' are two arguments but one parameter
+            if len(positional) > len(plan.positional) and plan.var_positional is None:
+                self.compile_errors += 1
                 logging.error(f"line {line_number}: too many parameters "
-                              f"({action_name} {' '.join(signature.parameters.keys())})")
+                              f"({action_name} {' '.join(plan.parameters)})")
                 continue
             # this transforms '\\n' to '\n'
             args = tuple(arg.encode('utf-8', 'replace').decode('unicode_escape') for arg in args)
-            tokens.append(Token(os.path.basename(source.name), line_number, action_name, args))
-
-        if any_error:
-            logging.critical("Script failed during compilation")
-            raise QuietExit(1)
-        return tokens
+            yield Token(os.path.basename(source.name), line_number, action_name, args)
 
-    def macro_include(self, source: t.TextIO, line_number: int, args: t.Tuple[str, ...]) -> t.Optional[t.List[Token]]:
-        tokens: t.List[Token] = []
+    def macro_include(self, source: t.TextIO, line_number: int,
+                      args: t.Tuple[str, ...]) -> t.Optional[t.Iterable[Token]]:
+        r"""
+        included scripts are compiled once and reused (keyed by path and modification-time)
+        """
         include_fp = os.path.join(os.path.dirname(source.name), *args)
         try:
-            with open(include_fp) as included_script:
-                tokens.extend(self.compile(included_script))
-        except FileNotFoundError:
+            real_path = os.path.realpath(include_fp)
+            key = (real_path, os.stat(real_path).st_mtime_ns)
+        except OSError:
             logging.error(f"line {line_number}: script {include_fp!r} not found")
             return None
-        except QuietExit:
+        if real_path in self.include_chain:
+            root = os.path.dirname(self.include_chain[0])
+            chain = [os.path.relpath(path, root) for path in [*self.include_chain, real_path]]
+            logging.error(f"line {line_number}: include cycle {' -> '.join(chain)}")
             return None
-        return tokens
+        cached = self.include_cache.get(key)
+        if cached is not None:
+            return cached
+        errors = self.compile_errors
+        with open(include_fp) as included_script:
+            program = Program(self.compile_iter(included_script))
+        if self.compile_errors == errors:
+            self.include_cache[key] = program
+        return program
+
+    def stream(self, source: str, *, lookahead: int = 1000) -> t.Iterator[t.List[Instruction]]:
+        r"""
+        compiles and links the script while it gets executed (memory stays bounded for huge scripts)
+
+        the next `lookahead` lines are validated before the current one is executed.
+        yields self-contained segments: a single instruction or a whole block with all its jump-targets
+        """
+        with open(source) as source_file:
+            tokens = self.compile_iter(source_file)
+            window: t.Deque[t.Tuple[Token, Instruction]] = deque()
+            exhausted = False
+            while True:
+                segment = Program()
+                instructions: t.List[Instruction] = []
+                reach = 1  # the segment needs at least this many instructions
+                while len(instructions) < reach:
+                    while not exhausted and len(window) <= lookahead:
+                        token = next(tokens, None)
+                        if self.compile_errors:
+                            logging.critical("Script failed during compilation")
+                            raise QuietExit(1)
+                        if token is None:
+                            exhausted = True
+                        else:
+                            window.append((token, self.link_line(token.action, token.arguments)))
+                    if not window:
+                        break
+                    token, instruction = window.popleft()
+                    offset = jump_offset(instruction)
+                    if offset is not None:
+                        reach = max(reach, len(instructions) + offset)
+                    segment.append(token)
+                    instructions.append(instruction)
+                if not instructions:
+                    return
+                yield segment, instructions
+
+    def segments(self) -> t.Iterable[Segment]:
+        r"""the lines and their instructions in self-contained pieces (all at once unless streaming)"""
+        if self.instructions is None:
+            return self._stream
+        return ((self.tokens, self.instructions),)
+
+    def link(self, program: Program) -> t.List[Instruction]:
+        r"""
+        resolves the program into executable instructions (one per line).
+        the lines with the same action and arguments are linked once and share the instruction
+        """
+        linked: t.Dict[t.Tuple[int, ...], Instruction] = {}
+        instructions = []
+        for index in range(len(program)):
+            key = program.line_key(index)
+            instruction = linked.get(key)
+            if instruction is None:
+                _, _, action, arguments = program[index]
+                instruction = linked[key] = self.link_line(action, arguments)
+            instructions.append(instruction)
+        return instructions
+
+    def link_line(self, action: str, arguments: t.Tuple[str, ...]) -> Instruction:
+        r"""
+        arguments are split into literals and templates with $VAR/@KEY references.
+        if all arguments are literals they are parsed once here (`bound`) instead of on every execution
+        """
+        control = action.startswith(CONTROL_PREFIX)
+        function = self._functions.get(action)
+        if function is None:  # one bound method per action (not per line)
+            name = f'control_{action.removeprefix(CONTROL_PREFIX)}' if control else f'action_{action}'
+            function = self._functions[action] = getattr(self, name)
+        if control:
+            delay = None
+        else:
+            delay = DELAY_CLASSES.get(function.__name__.removeprefix('action_'))  # aliases share the class
+            if action == "checkpoint":
+                self.has_checkpoint_lines = True
+        plan = binding_plan(function)
+        templates = [compile_template(argument) for argument in arguments]
+        arguments = tuple(template.string if template.is_constant else template for template in templates)
+        bound = None
+        if all(isinstance(argument, str) for argument in arguments):
+            try:
+                bound = plan.bind(list(arguments))
+            except ScriptRuntimeError:
+                pass  # reported when the line gets executed
+        return Instruction(action, function, plan, arguments, bound, control, delay)
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
     def execute(self):
         try:
-            for script_name, current_line, action_name, args in self.tokens:
-                with LoggingContext(scriptName=script_name, scriptLine=current_line):
-                    try:
-                        self.call_action(action_name=action_name, arguments=args, context=self.context)
-                    except ScriptRuntimeError as error:
-                        logging.critical(f"{type(error).__name__}: {error}")
-                        raise QuietExit(1)
-                    # except Exception as error:
-                    #     logging.critical(f"Internal Error: {type(error).__name__} ({error})", exc_info=error)
-                    #     raise QuietExit(1)
-                self.wait_action_delay()
+            offset = 0  # index of the first instruction of the segment
+            for tokens, instructions in self.segments():
+                start = 0 if self.resume_state is None else self.resume_in(tokens, offset)
+                if start is not None:
+                    self.execute_segment(tokens, instructions, offset=offset, start=start)
+                offset += len(instructions)
+            if self.resume_state is not None:
+                raise ScriptRuntimeError(f"the checkpoint is after the end of the script ({offset} instructions)")
+            if self.checkpoints is not None:
+                self.checkpoints.remove()
         except BaseException as exception:
+            if self.checkpoints is not None:
+                self.flush_checkpoint()
             if self.debug_mode:
                 import traceback
                 traceback.print_exception(type(exception), exception, exception.__traceback__)
             raise exception
         finally:
+            if self.element_lookups or self.element_lookups_saved:
+                logging.debug(f"element-cache: {self.element_lookups} active-element lookups, "
+                              f"{self.element_lookups_saved} lookups saved")
+            if self.elements_prelocated:
+                logging.debug(f"{self.elements_prelocated} elements were looked up during the action-delay")
+            self.close_outputs()
+            self.close_captures()
             if self._browser is not None:
                 logging.warning("Abnormally quitting the browser")
-                self._browser.quit()
+                self.release_browser()
 
-    def call_action(self, action_name: str, arguments: t.Tuple[str, ...], context: t.Dict[str, t.Any]):
-        function = getattr(self, f'action_{action_name}')
-        filled_arguments = [fill(arg, context=context) for arg in arguments]
-        call_function_with_arguments(function=function, arguments=filled_arguments)
+    def execute_segment(self, tokens: Program, instructions: t.List[Instruction], *, offset: int = 0, start: int = 0):
+        r"""
+        runs the instructions by following the instruction-pointer (`tokens` has the positions of the lines)
 
-    def wait_action_delay(self):
-        if self.delay_between_actions is None:
+        offset: index of the first instruction in the whole script (for the checkpoints)
+        start: pointer of the first instruction that runs (--resume)
+        """
+        profiler = self.profiler
+        checkpoints = self.checkpoints
+        prepared: t.Optional[Prepared] = None
+        pointer, end = start, len(instructions)
+        while pointer < end:
+            instruction = instructions[pointer]
+            location = tokens.location(pointer)
+            arguments = prepared[1] if prepared is not None and prepared[0] is instruction else None
+            position = script_position.set((*location, time.time()))
+            try:
+                if profiler is None:
+                    result = self.run_instruction(instruction, arguments)
+                else:
+                    result = self.run_instruction_profiled(instruction, location, profiler, arguments)
+            except ScriptRuntimeError as error:
+                logging.critical(f"{type(error).__name__}: {error}")
+                raise QuietExit(1)
+            # except Exception as error:
+            #     logging.critical(f"Internal Error: {type(error).__name__} ({error})", exc_info=error)
+            #     raise QuietExit(1)
+            finally:
+                script_position.reset(position)
+            if instruction.control:
+                pointer += 1 if result is None else result
+                prepared = None
+            else:
+                pointer += 1
+                prepared = None
+                if checkpoints is not None and (not self.has_checkpoint_lines or instruction.action == "checkpoint"):
+                    self.write_checkpoint(offset + pointer - 1, location)
+                if instruction.delay is not None:
+                    prepare = None if pointer >= end else functools.partial(
+                        self.prepare_ahead, instructions[pointer], tokens.location(pointer),
+                    )
+                    prepared = self.wait_action_delay(instruction.delay, prepare=prepare)
+
+    def write_checkpoint(self, index: int, location: Location):
+        r"""
+        keeps the state after the instruction (the url and the cookies are only read when it gets written:
+        when the script failed that is after the failed line, CHECKPOINT lines write it right away)
+
+        a checkpoint that can't be written is only logged (the script itself is fine)
+        """
+        if self._source_digest is None:
+            self._source_digest = file_digest(self.source)
+        filename, line, action = location
+        setup = self._browser_setup
+        settings = {name: getattr(self, name) for name in CHECKPOINT_SETTINGS}
+        settings['action_delays'] = dict(self.action_delays)
+        with_browser = self._browser is not None and setup is not None
+        try:
+            self.checkpoints.save(dict(
+                script=self.source,
+                digest=self._source_digest,
+                done=index,
+                line=[os.path.basename(filename), line, action],
+                context=dict(self.context),
+                loops=[loop_state(loop) for loop in self.loops],
+                settings=settings,
+                browser=dict(setup, timeouts=dict(setup['timeouts'])) if with_browser else None,
+            ), page=self.page_state if with_browser else None, force=action == "checkpoint")
+        except OSError as error:
+            logging.warning(f"checkpoint could not be written: {error}")
+
+    def page_state(self) -> t.Optional[t.Dict[str, t.Any]]:
+        r"""url and cookies of the current page (the last known ones if the browser doesn't answer)"""
+        if self._browser is not None:
+            try:
+                self._page_state = dict(url=self._browser.current_url, cookies=self._browser.get_cookies())
+            except WebDriverException as error:
+                logging.debug(f"checkpoint with the last known page ({type(error).__name__})")
+        return self._page_state
+
+    def flush_checkpoint(self):
+        r"""writes the state after the last successful line (the script failed)"""
+        try:
+            self.checkpoints.flush()
+        except OSError as error:
+            logging.warning(f"checkpoint could not be written: {error}")
+        if os.path.isfile(self.checkpoints.path):
+            logging.info(f"the script can be continued with --checkpoint {self.checkpoints.path} --resume")
+
+    def resume_in(self, segment: Program, offset: int) -> t.Optional[int]:
+        r"""
+        pointer where the segment continues after the checkpoint of --resume
+        (None for the segments that finished before the checkpoint)
+        """
+        state = self.resume_state
+        index = state['done']
+        if index >= offset + len(segment):
+            return None
+        filename, line, action = state['line']
+        current_filename, current_line, current_action = segment.location(index - offset)
+        if [os.path.basename(current_filename), current_line, current_action] != state['line']:
+            raise ScriptRuntimeError(f"the script changed before the checkpoint: line {line} of {filename!r} "
+                                     f"({action}) isn't instruction #{index} any more")
+        if state.get('digest') != file_digest(self.source):
+            logging.warning("the script changed since the checkpoint (resuming after the same line)")
+        logging.info(f"Resuming after line {line} of {filename!r} ({action})")
+        self.restore_checkpoint(state)
+        self.resume_state = None
+        return index - offset + 1
+
+    def restore_checkpoint(self, state: t.Dict[str, t.Any]):
+        r"""variables (the given ones, eg. --var, are kept), loops, settings and the browser of the checkpoint"""
+        self.context.update(state['context'])
+        self.context.update(self._given_context)
+        self.loops = [restore_loop(loop) for loop in state['loops']]
+        for name, value in state['settings'].items():
+            if name in CHECKPOINT_SETTINGS:
+                setattr(self, name, value)
+        if state['browser'] is not None:
+            self.restore_browser(state['browser'])
+
+    def restore_browser(self, setup: t.Dict[str, t.Any]):
+        r"""INIT with the same arguments, the timeouts and the page with its cookies"""
+        self.action_init(**setup['init'])
+        for name, seconds in setup['timeouts'].items():
+            self.set_browser_timeout(name, seconds)
+        page = setup.get('page')
+        if not page or not page['url'] or page['url'] == "about:blank":
             return
+        self.browser.get(page['url'])
+        restored = 0
+        for cookie in page['cookies']:
+            try:
+                self.browser.add_cookie(cookie)
+            except WebDriverException as error:  # eg. set for another domain
+                logging.debug(f"cookie {cookie.get('name')!r} could not be restored ({type(error).__name__})")
+            else:
+                restored += 1
+        if restored:
+            self.browser.get(page['url'])  # again with the cookies
+        logging.info(f"Restored {page['url']!r} with {restored} cookie(s)")
+        self.invalidate_web_element()
+
+    def prepare_ahead(self, instruction: Instruction, location: Location, deadline: float) -> t.Optional[Prepared]:
+        r"""
+        prepares the next instruction while the action-delay runs:
+        the arguments are filled and parsed and the element of a SELECT/SELECT-NAME/SELECT-XPATH is looked up
+        (only if the look-up is expected to end before the `deadline` of the delay)
 
-        if isinstance(self.delay_between_actions, (tuple, list)):
-            time.sleep(random.uniform(*self.delay_between_actions))
-        else:
-            time.sleep(self.delay_between_actions)
+        the time is recorded as `prepare` of the next line (--profile)
+        """
+        if instruction.control:
+            return None
+        start = time.perf_counter()
+        try:
+            args, kwargs = self.prepare_arguments(instruction)
+        except ScriptRuntimeError:
+            return None  # reported when the line runs
+        by = PRELOCATE_BY.get(instruction.function.__name__)
+        if by is not None and self._browser is not None and time.perf_counter() + self._prelocate_seconds < deadline:
+            value = ' '.join(map(str, args))
+            lookup = time.perf_counter()
+            try:
+                element = self._browser.execute_script(PRELOCATE_SCRIPTS[by], value)
+            except WebDriverException:
+                element = None  # eg. an invalid selector. reported when the line runs
+            self._prelocate_seconds = time.perf_counter() - lookup
+            # a missing element is looked up again by the line (it might appear during the rest of the delay)
+            self._prelocated = None if element is None else ((by, value), element)
+        if self.profiler is not None:
+            self.profiler.line(*location).prepare += time.perf_counter() - start
+        return instruction, (args, kwargs)
+
+    def prepare_arguments(self, instruction: Instruction) -> t.Tuple[t.List[t.Any], t.Dict[str, t.Any]]:
+        r"""fills and parses the arguments of the instruction"""
+        if instruction.bound is not None:
+            return instruction.bound
+        return instruction.plan.bind([
+            argument if isinstance(argument, str) else argument.render(self.context)
+            for argument in instruction.arguments
+        ])
+
+    def run_instruction(self, instruction: Instruction, arguments: t.Tuple[t.List[t.Any], t.Dict[str, t.Any]] = None):
+        args, kwargs = self.prepare_arguments(instruction) if arguments is None else arguments
+        return instruction.function(*args, **kwargs)
+
+    def run_instruction_profiled(self, instruction: Instruction, location: Location, profiler: Profiler,
+                                 arguments: t.Tuple[t.List[t.Any], t.Dict[str, t.Any]] = None):
+        stats = profiler.enter(*location)
+        start = time.perf_counter()
+        args, kwargs = self.prepare_arguments(instruction) if arguments is None else arguments
+        prepared = time.perf_counter()
+        stats.prepare += prepared - start
+        waited_before = stats.wait + stats.delay
+        try:
+            return instruction.function(*args, **kwargs)
+        finally:
+            # waits and delays inside the action are recorded separately
+            stats.action += time.perf_counter() - prepared - (stats.wait + stats.delay - waited_before)
+
+    def action_delay(self, kind: str) -> t.Optional[float]:
+        r"""seconds to wait after an action of the delay-class (a random value for a range)"""
+        delay = self.action_delays.get(kind, self.delay_between_actions)
+        if isinstance(delay, (tuple, list)):
+            return random.uniform(*delay)
+        return delay
+
+    def wait_action_delay(self, kind: str = "input", prepare: t.Callable[[float], t.Any] = None) -> t.Any:
+        r"""
+        waits the delay after an action of the delay-class
+
+        `prepare` runs inside of the delay (only the rest is slept) and its result is returned.
+        it gets the perf_counter() at which the delay ends
+        """
+        delay = self.action_delay(kind)
+        if not delay:
+            return None
+        start = time.perf_counter()
+        result = prepare(start + delay) if prepare is not None else None
+        prepared = time.perf_counter()
+        remaining = delay - (prepared - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        if self.profiler is not None:
+            self.profiler.add('delay', time.perf_counter() - prepared)  # the prepare-time belongs to the next line
+        return result
+
+    def wait_until(self, condition: t.Callable[['BrowserType'], t.Any], *, negate: bool = False, message: str = ""):
+        r"""WebDriverWait with the wait-for-timeout and poll-frequency of the script"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        wait = WebDriverWait(self.browser, timeout=self.wait_for_timeout, poll_frequency=self.wait_poll_frequency)
+        start = time.perf_counter()
+        try:
+            if negate:
+                return wait.until_not(condition, message=message)
+            else:
+                return wait.until(condition, message=message)
+        finally:
+            if self.profiler is not None:
+                self.profiler.add('wait', time.perf_counter() - start)
+
+    def wait_event(self, condition: Condition, query: t.Optional[str], *, negate: bool = False, message: str = ""):
+        r"""
+        waits event-driven inside the page for the condition
+
+        the script is re-injected in slices so a navigation or a short script-timeout doesn't break the wait
+        """
+        element = self.web_element if condition.uses_element and not query else None
+        initial = condition.initial(self) if condition.initial is not None else None
+        script = condition.event_script()
+        start = time.perf_counter()
+        deadline = start + self.wait_for_timeout
+        try:
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise TimeoutException(message)
+                try:
+                    if self.browser.execute_async_script(
+                            script, query, element, initial, negate, round(min(remaining, 5) * 1000)
+                    ):
+                        return
+                except (JavascriptException, TimeoutException):
+                    time.sleep(min(self.wait_poll_frequency, 0.05))  # page is probably navigating
+        finally:
+            if self.profiler is not None:
+                self.profiler.add('wait', time.perf_counter() - start)
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
     @property
-    def browser(self) -> BrowserType:
+    def browser(self) -> 'BrowserType':
         if self._browser is None:
             raise ScriptRuntimeError("you need to run `INIT browser` to initialize the browser")
         return self._browser
 
+    def close_outputs(self):
+        r"""flushes and closes the files of EXTRACT"""
+        outputs, self.outputs = self.outputs, {}
+        for writer in outputs.values():
+            writer.close()
+            logging.debug(f"EXTRACT: {writer.rows} rows written to {writer.path!r}")
+
+    @property
+    def capture_queue(self) -> CaptureQueue:
+        if self._capture_queue is None:
+            self._capture_queue = CaptureQueue()
+        return self._capture_queue
+
+    def flush_captures(self):
+        r"""waits for the pending SCREENSHOT/SNAPSHOT writes (a failed write fails the script)"""
+        if self._capture_queue is None:
+            return
+        errors = self._capture_queue.flush()
+        if errors:
+            raise ScriptRuntimeError(f"{len(errors)} capture(s) couldn't be written ({errors[0]})")
+
+    def close_captures(self):
+        r"""flushes and stops the capture-workers (the errors are only logged)"""
+        queue, self._capture_queue = self._capture_queue, None
+        if queue is None:
+            return
+        for error in queue.close():
+            logging.error(f"capture failed: {error}")
+        logging.debug(f"captures: {queue.captured} written, {queue.duplicates} identical to an earlier one")
+
+    def release_browser(self):
+        r"""quits the browser or returns it into the browser-pool"""
+        browser, key = self._browser, self._browser_key
+        self._browser = self._browser_key = None
+        self._browser_setup = self._page_state = None
+        self.invalidate_web_element()
+        if self.browser_pool is not None and key is not None:
+            self.browser_pool.release(key, browser)
+        else:
+            browser.quit()
+
     @property
-    def web_element(self) -> WebElement:
+    def web_element(self) -> 'WebElement':
+        r"""
+        the selected/focused element
+
+        the element is cached till something could move the focus
+        (navigation, window-switch, SELECT, focus-changing keys). see `invalidate_web_element()`
+        """
+        if self._web_element is not None:
+            self.element_lookups_saved += 1
+            return self._web_element
         try:
-            return self.browser.switch_to.active_element
+            self._web_element = self.browser.switch_to.active_element
         except NoSuchWindowException:
             raise ScriptRuntimeError("Browser is already closed")
+        self.element_lookups += 1
+        return self._web_element
 
     @web_element.setter
-    def web_element(self, value: t.Optional[WebElement]):
+    def web_element(self, value: t.Optional['WebElement']):
         r"""sets the current element and focuses it"""
         self._web_element = value
         if self._web_element:
@@ -188,6 +728,102 @@ class ScriptEngine:
         else:
             self.browser.execute_script("document.documentElement.focus()")
 
+    def invalidate_web_element(self):
+        r"""forget the cached element (the next access asks the browser for the active element)"""
+        self._web_element = None
+        self._prelocated = None
+
+    def retry_stale(self, function: t.Callable[[], t.Any]) -> t.Any:
+        r"""
+        runs the function that uses the cached `web_element`
+
+        if the cached element got stale (the page rendered it again) it is looked up again and the function repeated once
+        """
+        cached = self._web_element is not None
+        try:
+            return function()
+        except StaleElementReferenceException:
+            if not cached:
+                raise
+            logging.debug("cached element got stale")
+            self.invalidate_web_element()
+            return function()
+
+    def send_keys(self, *keys: str):
+        r"""sends the keys to the current element"""
+        self.retry_stale(lambda: self.web_element.send_keys(*keys))
+        focus_keys = focus_changing_keys()
+        if any(char in focus_keys for key in keys for char in key):  # "name@TAB" is a single argument
+            self.invalidate_web_element()
+
+    def press_key(self, key: str):
+        r"""presses the key on whatever is focused (no element is needed, not even the active one)"""
+        from selenium.webdriver import ActionChains
+        ActionChains(self.browser).send_keys(key).perform()
+        if self._web_element is None:  # sending it to the element would have looked up the active element
+            self.element_lookups_saved += 1
+        self.invalidate_web_element()
+
+    ####################################################################################################################
+    # Control-Flow (generated by controlflow.lower_blocks)
+    ####################################################################################################################
+
+    def check_condition(self, what: str, query: t.Optional[str] = None) -> bool:
+        r"""
+        checks a WAIT-TILL condition once (without waiting)
+
+        the javascript predicate is tested in the page: a missing element doesn't block for the implicit-wait
+        """
+        condition, negate = lookup_check(what)
+        if condition.script is None:  # alert
+            try:
+                result = bool(condition.poll(self, query)(self.browser))
+            except (NoSuchElementException, StaleElementReferenceException):
+                result = False
+            return result != negate
+
+        def check():
+            element = self.web_element if condition.uses_element and not query else None
+            return bool(self.browser.execute_script(condition.poll_script(), query, element, None))
+
+        result = self.retry_stale(check) if condition.uses_element and not query else check()
+        return result != negate
+
+    def check_variable(self, name: str) -> bool:
+        r"""a variable is false if it is missing, empty or false/no/off/0"""
+        negate = name.startswith("!")
+        value = self.context.get(name.lstrip("!"))
+        result = value is not None and str(value).strip().lower() not in {"", "false", "no", "off", "0"}
+        return result != negate
+
+    def control_jump(self, offset: int) -> int:
+        return offset
+
+    def control_if_not(self, offset: int, what: str, query: str = None) -> int:
+        return 1 if self.check_condition(what, query) else offset
+
+    def control_if_not_var(self, offset: int, name: str) -> int:
+        return 1 if self.check_variable(name) else offset
+
+    def control_repeat_init(self, count: int):
+        self.loops.append(Loop(range(count)))
+
+    def control_for_init(self, *values: str, split: str = None):
+        if split is not None:
+            values = [part for value in values for part in value.split(split) if part]
+        self.loops.append(Loop(values))
+
+    def control_loop_next(self, offset: int, name: str = None) -> int:
+        loop = self.loops[-1]
+        if loop.index >= len(loop.values):
+            self.loops.pop()
+            return offset
+        value = loop.values[loop.index]
+        loop.index += 1
+        if name:
+            self.context[name] = value
+        return 1
+
     ####################################################################################################################
     # Actions
     ####################################################################################################################
@@ -234,15 +870,20 @@ class ScriptEngine:
         if not os.path.isfile(filepath):
             raise ScriptRuntimeError(f"Missing dotenv file: {filepath!r}")
         logging.info(f"Loading: {filepath!r}")
+        from dotenv import dotenv_values
         self.context.update(dotenv_values(filepath))
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
-    def action_init(self, browser: str, *, headless: bool = False):
+    def action_init(self, browser: str, *, headless: bool = False, remote: str = None, page_load: str = "normal",
+                    block: str = None, block_url: str = None, disable_extensions: bool = False,
+                    disable_background_networking: bool = False):
         r"""
         initialize the browser
 
         INIT Firefox --headless
+        INIT Chrome --remote http://localhost:4444
+        INIT Chrome --page-load eager --block images,fonts
 
         possible browser options are
         - chrome
@@ -252,82 +893,160 @@ class ScriptEngine:
 
         common arguments could be:
         --headless
+        --remote URL  (start the session on a selenium-grid or standalone webdriver-server)
+        --page-load normal|eager|none  (when VISIT returns: page loaded, DOM ready or immediately)
+        --block images,media,fonts,stylesheets  (resource-types that aren't loaded)
+        --block-url PATTERN,...  (urls that aren't loaded, eg. *://*.doubleclick.net/*)
+        --disable-extensions
+        --disable-background-networking
         """
-        logging.info(f"Initializing {'headless' if headless else ''} {browser!r} browser")
-        browsers = dict(
-            chrome=(ChromeBrowser, ChromeOptions),
-            firefox=(FirefoxBrowser, FirefoxOptions),
-            safari=(SafariBrowser, SafariOptions),
-            edge=(EdgeBrowser, EdgeOptions),
+        settings = browser_settings(
+            headless=headless, page_load=page_load, block=block, block_url=block_url,
+            disable_extensions=disable_extensions, disable_background_networking=disable_background_networking,
         )
+        logging.info(f"Initializing {'headless' if headless else ''} {browser!r} browser"
+                     + (f" on {remote}" if remote else ""))
+        if self._browser is not None:
+            self.release_browser()
+        key, factory = self.browser_factory(browser, settings, remote)
+        if self.browser_pool is None:
+            self._browser = factory()
+        else:
+            self._browser = self.browser_pool.checkout(key, factory)
+            self._browser_key = key
+        self._browser_setup = dict(init=dict(
+            browser=browser, headless=headless, remote=remote, page_load=page_load, block=block, block_url=block_url,
+            disable_extensions=disable_extensions, disable_background_networking=disable_background_networking,
+        ), timeouts={})
+
+    def browser_factory(self, browser: str, settings: BrowserSettings,
+                        remote: t.Optional[str]) -> t.Tuple[BrowserKey, t.Callable[[], 'BrowserType']]:
+        r"""the key of the browser in the browser-pool and the function that launches it"""
+        if remote:
+            from .remote import create_remote_browser
+            factory = functools.partial(create_remote_browser, remote, browser, settings)
+        else:
+            factory = functools.partial(self.create_browser, browser, settings)
+        return (browser.lower(), (('settings', settings), ('remote', remote))), factory
+
+    def prewarm_browsers(self, count: int = None) -> int:
+        r"""
+        launches the browsers of the INIT-lines into the browser-pool before the script runs
+        (`count` per configuration, default: the size of the pool). returns the number of configurations
+
+        INIT-lines with variables are skipped (they are only known when the line runs)
+        """
+        if self.browser_pool is None or self.instructions is None:
+            return 0
+        keys = set()
+        for instruction in self.instructions:
+            if instruction.control or instruction.action != "init" or instruction.bound is None:
+                continue
+            (browser, *_), options = instruction.bound
+            options = dict(options)
+            remote = options.pop('remote', None)
+            try:
+                key, factory = self.browser_factory(browser, browser_settings(**options), remote)
+            except ScriptRuntimeError:
+                continue  # reported when the line runs
+            if key in keys:
+                continue
+            keys.add(key)
+            try:
+                self.browser_pool.prewarm(key, factory, count)
+            except (WebDriverException, ScriptRuntimeError) as error:
+                logging.warning(f"could not launch {browser!r} ahead of time ({error})")
+        return len(keys)
+
+    @staticmethod
+    def create_browser(browser: str, settings: BrowserSettings = BrowserSettings()) -> 'BrowserType':
         try:
-            browser_class, options_class = browsers[browser.lower()]
-            browser_class: t.Type[ChromeBrowser]
-            options_class: t.Type[ChromeOptions]
+            browser_class = browser_classes()[browser.lower()]
         except KeyError:
-            raise ScriptValueParsingError(f"unknown browser {browser!r} ({'|'.join(browsers.keys())})")
-        options = options_class()
-        if headless:
-            options.add_argument('--headless')
-        self._browser = browser_class(
-            options=options,
+            raise ScriptValueParsingError(f"unknown browser {browser!r} ({'|'.join(BROWSER_NAMES)})")
+        driver = browser_class(
+            options=build_options(browser, settings),
         )
+        apply_blocking(driver, settings)
+        return driver
 
     def action_new_tab(self):
         r"""opens a new tab"""
         logging.info("Opening a new tab")
         self.browser.switch_to.new_window("tab")
+        self.invalidate_web_element()
 
     def action_new_window(self):
         r"""opens a new window"""
         logging.info("Opening a new window")
         self.browser.switch_to.new_window("window")
+        self.invalidate_web_element()
 
     def action_close(self):
         r"""close the current window/tab"""
         logging.info("Closing the current window")
         self.browser.close()
+        self.invalidate_web_element()
 
     def action_quit(self):
         r"""quit the current browser (session)"""
         logging.info("Quitting the browser")
-        self.browser.quit()
-        self._browser = None
+        if self._browser is None:
+            raise ScriptRuntimeError("you need to run `INIT browser` to initialize the browser")
+        self.release_browser()
+        self.flush_captures()
 
     def action_visit(self, url: str):
         r"""visit a certain url"""
         logging.info(f"Visiting {url!r}")
         self.browser.get(url)
+        self.invalidate_web_element()
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
+    def select(self, by: str, value: str):
+        r"""finds and focuses the element (it might already be looked up during the last action-delay)"""
+        prelocated, self._prelocated = self._prelocated, None
+        if prelocated is not None and prelocated[0] == (by, value):
+            self.elements_prelocated += 1
+            try:
+                self.web_element = prelocated[1]
+                return
+            except StaleElementReferenceException:
+                logging.debug("pre-located element got stale")
+        self.web_element = self.browser.find_element(by=by, value=value)
+
     def action_select(self, query: str, *extra: str):
         r"""select an element"""
-        query = ' '.join((query,) + extra)
-        self.web_element = self.browser.find_element(by=By.CSS_SELECTOR, value=query)
+        self.select(By.CSS_SELECTOR, ' '.join((query,) + extra))
 
     def action_waiting_select(self, query: str, *extra: str):
         r"""Like SELECT but waits for the element"""
         query = ' '.join((query,) + extra)
-        self.web_element = WebDriverWait(self.browser, timeout=self.wait_for_timeout).until(
+        from selenium.webdriver.support import expected_conditions
+        self.web_element = self.wait_until(
             expected_conditions.presence_of_element_located((By.CSS_SELECTOR, query))
         )
 
     def action_select_name(self, name: str):
         r"""SELECT '[name="value"]'"""
-        self.web_element = self.browser.find_element(by=By.NAME, value=name)
+        self.select(By.NAME, name)
 
     def action_select_xpath(self, xpath: str):
         r"""select element by xpath"""
-        self.web_element = self.browser.find_element(by=By.XPATH, value=xpath)
+        self.select(By.XPATH, xpath)
 
     def action_select_link_text(self, *text: str):
         r"""Select link that contains text"""
-        self.web_element.find_element(by=By.LINK_TEXT, value=' '.join(text))
+        self.web_element = self.retry_stale(
+            lambda: self.web_element.find_element(by=By.LINK_TEXT, value=' '.join(text))
+        )
 
     def action_select_link_partial_text(self, *text: str):
         r"""select link that contains partially text"""
-        self.web_element.find_element(by=By.PARTIAL_LINK_TEXT, value=' '.join(text))
+        self.web_element = self.retry_stale(
+            lambda: self.web_element.find_element(by=By.PARTIAL_LINK_TEXT, value=' '.join(text))
+        )
 
     def action_unselect(self, *, unfocus: bool = True):
         r"""unselect the current element"""
@@ -340,13 +1059,15 @@ class ScriptEngine:
         r"""select a child element"""
         if not query:
             raise ScriptSyntaxError("Missing query selector for SELECT-CHILD")
-        self.web_element = self.web_element.find_element(by=By.CSS_SELECTOR, value=' '.join(query))
+        self.web_element = self.retry_stale(
+            lambda: self.web_element.find_element(by=By.CSS_SELECTOR, value=' '.join(query))
+        )
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
     def action_type(self, *keys: str):
         r"""type some keys"""
-        self.web_element.send_keys(*keys)
+        self.send_keys(*keys)
 
     def action_hotkey(self, *keys: str):
         r"""
@@ -356,22 +1077,22 @@ class ScriptEngine:
         - HOTKEY CONTROL SHIFT p
         """
         # maybe switch to ActionChains
-        self.web_element.send_keys(*(getattr(Keys, key.upper(), key.lower()) for key in keys))
+        self.send_keys(*(getattr(keys_class(), key.upper(), key.lower()) for key in keys))
 
     def action_return(self):
         r"""type @RETURN"""
-        self.web_element.send_keys(Keys.RETURN)
+        self.send_keys(keys_class().RETURN)
 
     def action_space(self):
         r"""type @SPACE"""
-        self.web_element.send_keys(Keys.SPACE)
+        self.send_keys(keys_class().SPACE)
 
     def action_backspace(self, times: int = 1):
         r"""type @BACKSPACE x times"""
         for i in range(times):
             if i > 0:
                 self.wait_action_delay()
-            self.web_element.send_keys(Keys.BACKSPACE)
+            self.send_keys(keys_class().BACKSPACE)
 
     action_back_space = action_backspace
 
@@ -380,11 +1101,11 @@ class ScriptEngine:
         for i in range(times):
             if i > 0:
                 self.wait_action_delay()
-            self.web_element.send_keys(Keys.TAB)
+            self.press_key(keys_class().TAB)
 
     def action_escape(self):
         r"""type @ESCAPE"""
-        self.web_element.send_keys(Keys.ESCAPE)
+        self.send_keys(keys_class().ESCAPE)
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
@@ -393,6 +1114,7 @@ class ScriptEngine:
         if self.debug_mode:
             logging.debug("Breakpoint")
             input("Press return to continue.")
+            self.invalidate_web_element()
 
     def action_wait_for_user_interrupt(self):
         r"""
@@ -410,6 +1132,7 @@ class ScriptEngine:
                     raise KeyboardInterrupt("Window got closed")
         except KeyboardInterrupt:
             pass
+        self.invalidate_web_element()
 
     action_wait_for_user = action_wait_for_user_interrupt
 
@@ -427,15 +1150,18 @@ class ScriptEngine:
         - m  - minutes
         - h  - hours (why the hell would you need that? but I don't care)
         """
-        line = ''.join(deltas)
-        if line.count('-') == 1:
-            minimum, maximum = map(parse_timedelta, line.split('-', 1))
-            total = random.uniform(minimum.total_seconds(), maximum.total_seconds())
-        else:
-            total = parse_timedelta(line).total_seconds()
+        total = ScriptEngine.sleep_duration(*deltas)
         logging.info(f"Sleeping for {total:.3}s")
         time.sleep(total)
 
+    @staticmethod
+    def sleep_duration(*deltas: str) -> float:
+        r"""seconds of `200ms` or a random value of `200ms - 400ms`"""
+        minimum, maximum = parse_timedelta_range(''.join(deltas))
+        if minimum == maximum:
+            return minimum.total_seconds()
+        return random.uniform(minimum.total_seconds(), maximum.total_seconds())
+
     def action_wait_till(self, what: str, query: str = None):
         r"""
         WAIT-TILL ALERT
@@ -452,63 +1178,70 @@ class ScriptEngine:
         WAIT-TILL LOADED
         WAIT-TILL PAGE-LOADED
         """
-        web_element = (By.CSS_SELECTOR, query) if query else self.web_element
-
-        timeout_message = shlex.join(("WAIT-TILL", what.upper(), query))
-
-        negate = False
-        if what.startswith("!"):
-            negate = True
-            what = what[2:]
-
-        condition = dict(
-            element=expected_conditions.presence_of_element_located(web_element),
-            alert=expected_conditions.alert_is_present(),
-            new_window=expected_conditions.new_window_is_opened(self.browser.window_handles),
-            clickable=expected_conditions.element_to_be_clickable(web_element),
-            visible=expected_conditions.visibility_of(web_element),
-            visibility=expected_conditions.visibility_of(web_element),
-            invisibility=expected_conditions.invisibility_of_element(web_element),
-            url_change=expected_conditions.url_changes(self.browser.current_url),
-            url=expected_conditions.url_to_be(query),
-            url_to_be=expected_conditions.url_to_be(query),
-            interactive=lambda driver: driver.execute_script("return document.readyState") == "interactive",
-            page_interactive=lambda driver: driver.execute_script("return document.readyState") == "interactive",
-            loaded=lambda driver: driver.execute_script("return document.readyState") == "complete",
-            page_loaded=lambda driver: driver.execute_script("return document.readyState") == "complete",
-        )[what.lower().replace('-', '_')]
-
-        wait = WebDriverWait(self.browser, timeout=self.wait_for_timeout)
-        if negate:
-            wait.until_not(condition, message=timeout_message)
+        timeout_message = shlex.join(("WAIT-TILL", what.upper()) + ((query,) if query else ()))
+        condition, negate = lookup_condition(what)
+
+        def wait():
+            if self.wait_mode == "event" and condition.script is not None:
+                self.wait_event(condition, query, negate=negate, message=timeout_message)
+            else:
+                self.wait_until(condition.poll(self, query), negate=negate, message=timeout_message)
+
+        if condition.uses_element and not query:
+            self.retry_stale(wait)
         else:
-            wait.until(condition, message=timeout_message)
+            wait()
+
+    def action_wait_mode(self, mode: str):
+        r"""
+        how WAIT-TILL waits for the condition
+
+        - WAIT-MODE POLL   check the condition every WAIT-POLL-FREQUENCY (default)
+        - WAIT-MODE EVENT  listen for changes in the page and return as soon as the condition is true
+                           (ALERT and NEW-WINDOW are always polled)
+        """
+        mode = mode.lower()
+        if mode not in {"poll", "event"}:
+            raise ScriptValueParsingError(f"unknown wait-mode {mode!r} (poll|event)")
+        self.wait_mode = mode
 
-    def action_action_delay(self, *parts: str):
+    def action_wait_poll_frequency(self, *deltas: str):
+        r"""set how often the condition of WAIT-TILL is checked (default 500ms)"""
+        self.wait_poll_frequency = parse_timedelta(''.join(deltas)).total_seconds()
+
+    def action_action_delay(self, *parts: str, kind: str = None):
         r"""
-        sets the delay between actions
+        sets the delay after the actions that interact with the page
+        (nothing is delayed after SET, INFO, SLEEP, WAIT-MODE, ...)
 
         - ACTION-DELAY OFF
         - ACTION-DELAY RANDOM
         - ACTION-DELAY 100ms
         - ACTION-DELAY 100ms - 200ms
+        - ACTION-DELAY 1s - 2s --kind navigation  (only for one class: navigation|select|input|wait)
         """
+        delay = self.parse_delay(*parts)
+        if kind is None:
+            self.delay_between_actions = delay
+            return
+        kind = kind.lower()
+        if kind not in DELAY_CLASS_NAMES:
+            raise ScriptValueParsingError(f"unknown delay-class {kind!r} ({'|'.join(sorted(DELAY_CLASS_NAMES))})")
+        self.action_delays[kind] = delay
+
+    @staticmethod
+    def parse_delay(*parts: str) -> Delay:
+        r"""OFF, RANDOM, 100ms or 100ms - 200ms"""
         if len(parts) == 1:
             first = parts[0].lower()
             if first == "off":
-                self.delay_between_actions = None
-                return
+                return None
             elif first == "random":
-                self.delay_between_actions = (0.2, 1)  # between 0.2 and 1.0 second
-                return
-
-        joined = ''.join(parts)
-
-        if joined.count('-') == 1:
-            minimum, maximum = map(parse_timedelta, joined.split('-', 1))
-            self.delay_between_actions = (minimum.total_seconds(), maximum.total_seconds())
-        else:
-            self.delay_between_actions = parse_timedelta(joined).total_seconds()
+                return 0.2, 1  # between 0.2 and 1.0 second
+        minimum, maximum = parse_timedelta_range(''.join(parts))
+        if minimum == maximum:
+            return minimum.total_seconds()
+        return minimum.total_seconds(), maximum.total_seconds()
 
     def action_page_load_timeout(self, *deltas: str):
         r"""
@@ -516,7 +1249,7 @@ class ScriptEngine:
 
         should only be called once
         """
-        self.browser.set_page_load_timeout(parse_timedelta(''.join(deltas)).total_seconds())
+        self.set_browser_timeout("page_load", parse_timedelta(''.join(deltas)).total_seconds())
 
     def action_implicitly_wait(self, *deltas: str):
         r"""
@@ -524,7 +1257,22 @@ class ScriptEngine:
 
         should only be called once
         """
-        self.browser.implicitly_wait(parse_timedelta(''.join(deltas)).total_seconds())
+        self.set_browser_timeout("implicit", parse_timedelta(''.join(deltas)).total_seconds())
+
+    def set_browser_timeout(self, name: str, seconds: float):
+        r"""sets the timeout of the browser and remembers it for --resume"""
+        getattr(self.browser, TIMEOUT_SETTERS[name])(seconds)
+        if self._browser_setup is not None:
+            self._browser_setup['timeouts'][name] = seconds
+
+    def action_checkpoint(self):
+        r"""
+        with --checkpoint: the state after this line is stored (--resume continues after it)
+
+        scripts with CHECKPOINT lines only write their checkpoints there (otherwise after every line)
+        """
+        if self.checkpoints is None:
+            logging.debug("CHECKPOINT without --checkpoint (ignored)")
 
     def action_wait_for_timeout(self, *deltas: str):
         self.wait_for_timeout = parse_timedelta(''.join(deltas)).total_seconds()
@@ -535,16 +1283,19 @@ class ScriptEngine:
         r"""refresh the current page"""
         logging.info("Refreshing the Page")
         self.browser.refresh()
+        self.invalidate_web_element()
 
     def action_forward(self):
         r"""go forwards on page"""
         logging.debug("Going one step forward in the browser history")
         self.browser.forward()
+        self.invalidate_web_element()
 
     def action_back(self):
         r"""go backwards on page"""
         logging.debug("Going one step backward in the browser history")
         self.browser.back()
+        self.invalidate_web_element()
 
     # ---------------------------------------------------------------------------------------------------------------- #
 
@@ -552,9 +1303,78 @@ class ScriptEngine:
         r"""clicks the current element"""
         if query:
             logging.debug(f"CLICK {' '.join(query)!r}")
-            web_element = self.browser.find_element(by=By.CSS_SELECTOR, value=' '.join(query))
+            self.browser.find_element(by=By.CSS_SELECTOR, value=' '.join(query)).click()
         else:
-            web_element = self.web_element
-        web_element.click()
+            self.retry_stale(lambda: self.web_element.click())
+        self.invalidate_web_element()  # clicking moves the focus (or navigates)
 
     action_press = action_click
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def action_screenshot(self, path: str, *, element: bool = False):
+        r"""
+        saves a screenshot of the page (or with --element of the selected element) as png
+
+        only the image is grabbed here, the file is written in the background (a path ending with .gz is compressed)
+        """
+        if element:
+            payload = self.retry_stale(lambda: self.web_element.screenshot_as_base64)
+        else:
+            payload = self.browser.get_screenshot_as_base64()
+        self.capture_queue.capture(path, payload, encoding="base64")
+
+    def action_snapshot(self, path: str):
+        r"""saves the html of the current page (written in the background, a path ending with .gz is compressed)"""
+        self.capture_queue.capture(path, self.browser.page_source, encoding="text")
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def action_extract(self, *query: str, to: str, fields: str = "text", chunk: int = 500, next_page: str = None,
+                       pages: int = None, append: bool = False):
+        r"""
+        writes the matches of the query into a .csv/.jsonl file (one row per element)
+
+        EXTRACT .result a --fields text,href,attr:data-id --to links.jsonl
+        EXTRACT tr.item --fields text --to items.csv --next-page a.next --pages 10
+
+        - fields: text, html, attr:<attribute> or any property of the element (default: text)
+        - chunk: elements per execute_script call (default 500)
+        - next-page: element that is clicked for the next page (until it's missing/disabled or --pages are done)
+        - append: append to an existing file (otherwise the first EXTRACT into a file truncates it)
+
+        the number of extracted rows is stored in $EXTRACTED
+        """
+        self.run_steps(self.extract_steps(' '.join(query), to=to, fields=fields, chunk=chunk, next_page=next_page,
+                                          pages=pages, append=append))
+
+    def extract_steps(self, query: str, *, to: str, fields: str, chunk: int, next_page: t.Optional[str],
+                      pages: t.Optional[int], append: bool) -> t.Generator[Step, t.Any, None]:
+        r"""the extraction with the bookkeeping of the engine (shared with the async engine)"""
+        selectors, columns = parse_fields(fields)
+        writer = open_row_writer(self.outputs, to, columns, append=append)
+        logging.info(f"Extracting {query!r} into {to!r}")
+        extracted = yield from extraction(query, selectors, writer, chunk=chunk, next_page=next_page, pages=pages,
+                                          timeout=self.wait_for_timeout, poll_frequency=self.wait_poll_frequency)
+        self.context['EXTRACTED'] = str(extracted)
+        logging.debug(f"EXTRACT: {extracted} rows of {query!r}")
+        if next_page is not None:
+            self.invalidate_web_element()
+
+    def run_steps(self, steps: t.Generator[Step, t.Any, t.Any]) -> t.Any:
+        r"""executes the scripts that the generator yields and returns its result"""
+        try:
+            script, arguments = next(steps)
+            while True:
+                try:
+                    if script is None:
+                        time.sleep(*arguments)
+                        result = None
+                    else:
+                        result = self.browser.execute_script(script, *arguments)
+                except WebDriverException as error:
+                    script, arguments = steps.throw(error)
+                else:
+                    script, arguments = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
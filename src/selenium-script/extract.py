@@ -0,0 +1,181 @@
+# -*- coding=utf-8 -*-
+r"""
+EXTRACT: bulk-scraping of elements
+
+all matches of the query are read in one execute_script call per chunk (not one round-trip per element)
+and the rows are streamed through a buffered writer into a .csv or .jsonl file so memory stays flat.
+
+the extraction is written as a generator that yields the scripts to run (and pauses) so the same logic drives the
+blocking and the asyncio engine
+"""
+import os
+import csv
+import json
+import time
+import typing as t
+from .exceptions import ScriptValueParsingError, ScriptRuntimeError
+
+
+__all__ = [
+    'EXTRACT_SCRIPT', 'NEXT_PAGE_SCRIPT', 'PAGE_CHANGED_SCRIPT',
+    'Step', 'RowWriter', 'open_row_writer', 'output_extension', 'check_chunk', 'parse_fields', 'extraction',
+]
+
+
+Step = t.Tuple[t.Optional[str], t.Tuple[t.Any, ...]]  # (script, arguments) or (None, (seconds,)) for a pause
+WRITE_BUFFER = 1 << 20
+ATTRIBUTE_PREFIX = "attr:"
+EXTENSIONS = (".csv", ".jsonl", ".ndjson")
+
+
+EXTRACT_SCRIPT = r"""
+var query = arguments[0], fields = arguments[1], offset = arguments[2], size = arguments[3];
+var elements = document.querySelectorAll(query), rows = [];
+var end = Math.min(elements.length, offset + size);
+for (var i = offset; i < end; i++) {
+    var element = elements[i], row = [];
+    for (var j = 0; j < fields.length; j++) {
+        var field = fields[j], value;
+        if (field === "text") value = (element.innerText || element.textContent || "").trim();
+        else if (field === "html") value = element.innerHTML;
+        else if (field.charAt(0) === "@") value = element.getAttribute(field.slice(1));
+        else value = element[field];
+        row.push(value === undefined || value === null ? null : typeof value === "object" ? String(value) : value);
+    }
+    rows.push(row);
+}
+if (offset === 0 && elements.length) {  // markers to detect the next page
+    document.documentElement.__seleniumScriptPage = true;
+    elements[0].__seleniumScriptSeen = true;
+}
+return {total: elements.length, rows: rows};
+"""
+NEXT_PAGE_SCRIPT = r"""
+var next = document.querySelector(arguments[0]);
+if (!next || next.disabled || next.getAttribute("aria-disabled") === "true") return false;
+next.click();
+return true;
+"""
+PAGE_CHANGED_SCRIPT = r"""
+var first = document.querySelector(arguments[0]);
+if (!document.documentElement.__seleniumScriptPage) return document.readyState !== "loading" && first !== null;
+return first !== null && !first.__seleniumScriptSeen;
+"""
+
+
+def output_extension(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ScriptValueParsingError(f"can't write {path!r} ({'|'.join(EXTENSIONS)})")
+    return extension
+
+
+def check_chunk(chunk: int) -> None:
+    if chunk < 1:
+        raise ScriptValueParsingError(f"--chunk has to be at least 1 (got {chunk})")
+
+
+class RowWriter:
+    r"""buffered .csv/.jsonl writer (the header of a csv is written when the file is created)"""
+
+    def __init__(self, path: str, fields: t.Sequence[str], *, append: bool = False):
+        self.path = path
+        self.fields = tuple(fields)
+        self.rows = 0
+        extension = output_extension(path)
+        exists = append and os.path.isfile(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER)
+        self._csv = csv.writer(self._file) if extension == ".csv" else None
+        if self._csv is not None and not exists:
+            self._csv.writerow(self.fields)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.path!r} rows={self.rows}>"
+
+    def write_rows(self, rows: t.Sequence[t.Sequence[t.Any]]) -> None:
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            fields = self.fields
+            self._file.writelines(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n" for row in rows)
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def open_row_writer(outputs: t.Dict[str, RowWriter], path: str, fields: t.Sequence[str], *,
+                    append: bool = False) -> RowWriter:
+    r"""
+    the writer stays open in `outputs` for the next EXTRACT into the same file (eg. in a loop) which appends.
+    the first EXTRACT of a script truncates the file unless `append` is set
+    """
+    path = os.path.abspath(path)
+    writer = outputs.get(path)
+    if writer is None:
+        writer = outputs[path] = RowWriter(path, fields, append=append)
+    elif writer.fields != tuple(fields):
+        raise ScriptValueParsingError(f"{path!r} is already written with the fields {','.join(writer.fields)}")
+    return writer
+
+
+def parse_fields(fields: str) -> t.Tuple[t.List[str], t.List[str]]:
+    r"""
+    `text,href,attr:data-id` -> (javascript-fields, column-names)
+
+    attributes are prefixed with `attr:` because `@name` in a line is a key-reference (@TAB, @ENTER, ...)
+    """
+    selectors, columns = [], []
+    for field in fields.split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if field.lower().startswith(ATTRIBUTE_PREFIX):
+            name = field[len(ATTRIBUTE_PREFIX):]
+            if not name:
+                raise ScriptValueParsingError(f"missing name of the attribute in {fields!r}")
+            selectors.append(f"@{name}")
+            columns.append(name)
+        else:
+            selectors.append(field)
+            columns.append(field)
+    if not selectors:
+        raise ScriptValueParsingError("EXTRACT needs at least one field (--fields text,href,attr:name)")
+    return selectors, columns
+
+
+def extraction(query: str, fields: t.List[str], writer: RowWriter, *, chunk: int, next_page: t.Optional[str],
+               pages: t.Optional[int], timeout: float, poll_frequency: float) -> t.Generator[Step, t.Any, int]:
+    r"""
+    yields the scripts to execute (the result is sent back) and returns the number of extracted rows
+
+    every page is read in chunks of `chunk` elements. with `next_page` the element is clicked after a page is
+    done and the extraction continues once the new page (or the changed list) is there
+    """
+    check_chunk(chunk)
+    extracted, page = 0, 1
+    while True:
+        offset = 0
+        while True:
+            result = yield EXTRACT_SCRIPT, (query, fields, offset, chunk)
+            rows = result['rows'] if result else []
+            writer.write_rows(rows)
+            offset += len(rows)
+            if not rows or offset >= result['total']:
+                break
+        extracted += offset
+        if next_page is None or (pages is not None and page >= pages):
+            return extracted
+        if not (yield NEXT_PAGE_SCRIPT, (next_page,)):
+            return extracted
+        page += 1
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if (yield PAGE_CHANGED_SCRIPT, (query,)):
+                    break
+            except Exception:  # noqa: the page is probably navigating
+                pass
+            if time.monotonic() > deadline:
+                raise ScriptRuntimeError(f"Timeout: EXTRACT --next-page {next_page!r} (page {page} didn't load)")
+            yield None, (poll_frequency,)
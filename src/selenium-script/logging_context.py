@@ -1,30 +1,52 @@
 # -*- coding=utf-8 -*-
 r"""
+context-variables for the log-records (eg. scriptName and scriptLine)
 
-
+the context is stored in a ContextVar so threads and asyncio-tasks each have their own.
+the position in the script changes for every executed line and is therefore kept as a plain tuple
+in its own ContextVar (`script_position`) instead of a merged dictionary
 """
 import logging
-import threading
+import typing as t
+import contextvars
+
+
+__all__ = [
+    'CONTEXT_DEFAULTS', 'NO_POSITION', 'ScriptPosition', 'logging_context_data', 'script_position',
+    'LoggingContextFilter', 'LoggingContext',
+]
 
 
-logging_context_data = threading.local()
+CONTEXT_DEFAULTS: t.Dict[str, t.Any] = dict(workerName="main", dataRow="---")
+ScriptPosition = t.Tuple[str, t.Any, str, t.Optional[float]]  # (scriptName, scriptLine, scriptAction, start-time)
+NO_POSITION: ScriptPosition = ("<unknown>", "---", "", None)
+
+logging_context_data: contextvars.ContextVar[t.Dict[str, t.Any]] = \
+    contextvars.ContextVar("logging_context_data", default=CONTEXT_DEFAULTS)
+script_position: contextvars.ContextVar[ScriptPosition] = \
+    contextvars.ContextVar("script_position", default=NO_POSITION)
 
 
 class LoggingContextFilter(logging.Filter):
+    r"""
+    adds scriptName, scriptLine, scriptAction, lineDuration (seconds since the line started),
+    workerName and dataRow to the record
+    """
+
     def filter(self, record):
-        for key, value in vars(logging_context_data).items():
-            setattr(record, key, value)
+        record.scriptName, record.scriptLine, record.scriptAction, start = script_position.get()
+        record.lineDuration = None if start is None else record.created - start
+        record.__dict__.update(logging_context_data.get())
         return True
 
 
 class LoggingContext:
     def __init__(self, **context):
         self.context = context
+        self._token = None
 
     def __enter__(self):
-        for key, value in self.context.items():
-            setattr(logging_context_data, key, value)
+        self._token = logging_context_data.set({**logging_context_data.get(), **self.context})
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        for key in self.context.keys():
-            delattr(logging_context_data, key)
+        logging_context_data.reset(self._token)
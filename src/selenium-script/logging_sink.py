@@ -0,0 +1,140 @@
+# -*- coding=utf-8 -*-
+r"""
+background writing of the log-records
+
+the interpreter only puts the records into a queue (QueueHandler), a QueueListener-thread formats and writes them
+so a slow terminal or log-file never blocks the actions.
+the records keep their exception (they never leave the process) so the handlers format the traceback themselves.
+forked batch-workers start their own listener because the thread of the parent doesn't exist in the child
+"""
+import os
+import copy
+import json
+import queue
+import atexit
+import logging
+import typing as t
+from logging.handlers import QueueHandler, QueueListener
+
+
+__all__ = ['JsonLinesFormatter', 'text_formatter', 'start_background_logging', 'stop_background_logging']
+
+
+class _TextFormatter(logging.Formatter):
+    def formatException(self, exc_info) -> str:
+        import better_exceptions  # only imported when a traceback gets logged
+        return ''.join(better_exceptions.format_exception(*exc_info)).rstrip("\n")
+
+
+def text_formatter(*, worker: bool = False) -> logging.Formatter:
+    r"""
+    the human-readable format (`worker`: with the worker- and row-columns of the batch-mode)
+
+    tracebacks are formatted by better_exceptions
+    """
+    return _TextFormatter(
+        "{asctime} | {levelname:.3} | "
+        + ("{workerName:>4} | {dataRow:>4} | " if worker else "")
+        + "{scriptName:>15} | {scriptLine:>3} | {message}",
+        style="{",
+    )
+
+
+class JsonLinesFormatter(logging.Formatter):
+    r"""one json-object per record with the position in the script (needs the LoggingContextFilter)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = getattr(record, 'scriptLine', None)
+        duration = getattr(record, 'lineDuration', None)
+        row = getattr(record, 'dataRow', None)
+        entry = dict(
+            time=f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03}",
+            level=record.levelname,
+            script=getattr(record, 'scriptName', None),
+            line=line if isinstance(line, int) else None,
+            action=getattr(record, 'scriptAction', None) or None,
+            duration=None if duration is None else round(duration, 6),
+            worker=getattr(record, 'workerName', None),
+            row=row if isinstance(row, int) else None,
+            message=record.getMessage(),
+        )
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RecordQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        r"""
+        merges the message with its arguments (they could change till the record is written)
+        but keeps `exc_info` (QueueHandler would format it into the message for a pickled queue)
+        """
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _Background:
+    queue_handler: QueueHandler
+    listener: QueueListener
+    handlers: t.Tuple[logging.Handler, ...]
+
+
+_active: t.Optional[_Background] = None
+
+
+def start_background_logging(*handlers: logging.Handler, level: int = logging.INFO,
+                             filters: t.Iterable[logging.Filter] = ()) -> QueueHandler:
+    r"""
+    replaces the handlers of the root-logger with a QueueHandler that passes the records to `handlers`
+
+    the `filters` run before the record is queued (the logging-context only exists in the calling thread/task)
+    """
+    global _active
+    stop_background_logging()
+    background = _Background()
+    background.handlers = handlers
+    background.queue_handler = _RecordQueueHandler(queue.SimpleQueue())
+    for log_filter in filters:
+        background.queue_handler.addFilter(log_filter)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(background.queue_handler)
+    root.setLevel(level)
+    _start_listener(background)
+    _active = background
+    return background.queue_handler
+
+
+def stop_background_logging() -> None:
+    r"""writes the remaining records and stops the listener-thread"""
+    global _active
+    if _active is None:
+        return
+    background, _active = _active, None
+    background.listener.stop()
+    for handler in background.handlers:
+        handler.flush()
+
+
+def _start_listener(background: _Background) -> None:
+    background.listener = QueueListener(background.queue_handler.queue, *background.handlers,
+                                        respect_handler_level=True)
+    background.listener.start()
+
+
+def _after_fork_in_child() -> None:
+    if _active is None:
+        return
+    _active.queue_handler.queue = queue.SimpleQueue()  # the records queued in the parent are written there
+    _start_listener(_active)
+    # worker-processes don't run atexit but the finalizers of multiprocessing (only imported in forked children)
+    import multiprocessing.util
+    multiprocessing.util.Finalize(None, stop_background_logging, exitpriority=0)
+
+
+atexit.register(stop_background_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,114 @@
+# -*- coding=utf-8 -*-
+r"""
+per-line execution profiler (--profile)
+
+every executed line records its wall-time split into
+- prepare: filling and parsing of the arguments (also when it runs ahead during the delay of the previous line)
+- action:  the action itself (without the following)
+- wait:    time spent in WebDriverWait (WAIT-TILL, WAITING-SELECT, ...)
+- delay:   the action-delay
+"""
+import json
+import typing as t
+from collections import namedtuple
+
+
+__all__ = ['Profiler', 'LineKey', 'LineStats', 'PHASES']
+
+
+PHASES = ('prepare', 'action', 'wait', 'delay')
+LineKey = namedtuple("LineKey", ('filename', 'line', 'action'))
+
+
+class LineStats:
+    __slots__ = ('calls',) + PHASES
+
+    def __init__(self):
+        self.calls = 0
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+
+    @property
+    def total(self) -> float:
+        return self.prepare + self.action + self.wait + self.delay
+
+    def as_dict(self) -> t.Dict[str, float]:
+        return dict(calls=self.calls, total=self.total, phases={phase: getattr(self, phase) for phase in PHASES})
+
+
+def action_label(action: str) -> str:
+    return action.upper().replace('_', '-')
+
+
+class Profiler:
+    root: str
+    stats: t.Dict[LineKey, LineStats]
+    current: t.Optional[LineStats]
+
+    def __init__(self, root: str = "script"):
+        self.root = root
+        self.stats = {}
+        self.current = None
+
+    def line(self, filename: str, line: int, action: str) -> LineStats:
+        r"""stats of a line (without counting a call)"""
+        key = LineKey(filename, line, action)
+        try:
+            return self.stats[key]
+        except KeyError:
+            stats = self.stats[key] = LineStats()
+            return stats
+
+    def enter(self, filename: str, line: int, action: str) -> LineStats:
+        r"""marks the start of a line. time of nested waits and delays is added to this line"""
+        stats = self.line(filename, line, action)
+        stats.calls += 1
+        self.current = stats
+        return stats
+
+    def add(self, phase: str, seconds: float) -> None:
+        if self.current is not None:
+            setattr(self.current, phase, getattr(self.current, phase) + seconds)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def hot_spots(self) -> t.List[t.Tuple[LineKey, LineStats]]:
+        return sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True)
+
+    def report(self, limit: t.Optional[int] = 20) -> str:
+        r"""sorted hot-spot table"""
+        total = sum(stats.total for stats in self.stats.values()) or 1
+        lines = [
+            f"{'location':>24} {'action':<20} {'calls':>6} {'total':>9} {'%':>5} "
+            + ' '.join(f"{phase:>9}" for phase in PHASES),
+        ]
+        for key, stats in self.hot_spots()[:limit]:
+            lines.append(
+                f"{key.filename + ':' + str(key.line):>24} {action_label(key.action):<20.20} {stats.calls:>6} "
+                f"{stats.total:>8.3f}s {stats.total / total * 100:>5.1f} "
+                + ' '.join(f"{getattr(stats, phase):>8.3f}s" for phase in PHASES)
+            )
+        return '\n'.join(lines)
+
+    def collapsed_stacks(self) -> t.Iterator[str]:
+        r"""the collapsed-stack format of flamegraph.pl/speedscope/inferno (values in microseconds)"""
+        for key, stats in self.stats.items():
+            frame = f"{key.filename}:{key.line} {action_label(key.action)}"
+            for phase in PHASES:
+                microseconds = round(getattr(stats, phase) * 1_000_000)
+                if microseconds:
+                    yield f"{self.root};{frame};{phase} {microseconds}"
+
+    def as_json(self) -> t.List[t.Dict[str, t.Any]]:
+        return [
+            dict(filename=key.filename, line=key.line, action=key.action, **stats.as_dict())
+            for key, stats in self.hot_spots()
+        ]
+
+    def write(self, path: str) -> None:
+        r"""writes json if the path ends with .json otherwise collapsed-stacks"""
+        with open(path, 'w') as file:
+            if path.lower().endswith(".json"):
+                json.dump(self.as_json(), file, indent=2)
+            else:
+                file.writelines(f"{line}\n" for line in self.collapsed_stacks())
@@ -0,0 +1,145 @@
+# -*- coding=utf-8 -*-
+r"""
+compact storage of a compiled script
+
+instead of one Token-tuple per line the program keeps
+- the filenames and action-names in interned tables
+- the opcode (index into the action-table), file-index and line-number of every line in typed arrays
+- all argument-strings once in a deduplicated string-pool
+the (filename, line, action, arguments) view is created on access
+"""
+import sys
+import typing as t
+from array import array
+from collections import namedtuple
+
+
+__all__ = ['Token', 'Program', 'ProgramState']
+
+
+Token = namedtuple("Tokens", ('filename', 'line', 'action', 'arguments'))
+ProgramState = t.Tuple[t.List[str], t.List[str], t.List[str], bytes, bytes, bytes, bytes, bytes]
+
+
+class Program(t.Sequence[Token]):
+    r"""append-only sequence of tokens"""
+    __slots__ = ('files', 'actions', 'strings', '_index', 'opcodes', 'file_ids', 'lines', 'arg_offsets', 'arg_ids')
+
+    files: t.List[str]
+    actions: t.List[str]
+    strings: t.List[str]
+    opcodes: array  # H: index into actions
+    file_ids: array  # H: index into files
+    lines: array  # I: line-number
+    arg_offsets: array  # I: arguments of line i are arg_ids[arg_offsets[i]:arg_offsets[i+1]]
+    arg_ids: array  # I: index into strings
+
+    def __init__(self, tokens: t.Iterable[Token] = ()):
+        self.files, self.actions, self.strings = [], [], []
+        self._index: t.Tuple[t.Dict[str, int], ...] = ({}, {}, {})  # string -> index per table
+        self.opcodes = array('H')
+        self.file_ids = array('H')
+        self.lines = array('I')
+        self.arg_offsets = array('I', [0])
+        self.arg_ids = array('I')
+        self.extend(tokens)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} lines={len(self)} files={len(self.files)} strings={len(self.strings)}>"
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    @t.overload
+    def __getitem__(self, index: int) -> Token: ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> t.List[Token]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        strings = self.strings
+        return Token(
+            self.files[self.file_ids[index]],
+            self.lines[index],
+            self.actions[self.opcodes[index]],
+            tuple(strings[i] for i in self.arg_ids[self.arg_offsets[index]:self.arg_offsets[index + 1]]),
+        )
+
+    def __iter__(self) -> t.Iterator[Token]:
+        return map(self.__getitem__, range(len(self)))
+
+    def location(self, index: int) -> t.Tuple[str, int, str]:
+        r"""(filename, line, action) of a line without creating its Token"""
+        return self.files[self.file_ids[index]], self.lines[index], self.actions[self.opcodes[index]]
+
+    def line_key(self, index: int) -> t.Tuple[int, ...]:
+        r"""opcode and argument-ids of a line (equal for the lines with the same action and arguments)"""
+        return self.opcodes[index], *self.arg_ids[self.arg_offsets[index]:self.arg_offsets[index + 1]]
+
+    def __eq__(self, other):
+        if isinstance(other, Program):
+            return self.to_state() == other.to_state()
+        return NotImplemented
+
+    def __reduce__(self):
+        return self.from_state, (self.to_state(),)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def _intern(self, table: int, table_list: t.List[str], string: str) -> int:
+        index_map = self._index[table]
+        index = index_map.get(string)
+        if index is None:
+            index = index_map[string] = len(table_list)
+            table_list.append(sys.intern(string) if table != 2 else string)
+        return index
+
+    def append(self, token: Token) -> None:
+        filename, line, action, arguments = token
+        self.file_ids.append(self._intern(0, self.files, filename))
+        self.opcodes.append(self._intern(1, self.actions, action))
+        self.lines.append(line)
+        self.arg_ids.extend(self._intern(2, self.strings, argument) for argument in arguments)
+        self.arg_offsets.append(len(self.arg_ids))
+
+    def extend(self, tokens: t.Iterable[Token]) -> None:
+        for token in tokens:
+            self.append(token)
+
+    def nbytes(self) -> int:
+        r"""approximate memory used by the program (tables, string-pool and arrays)"""
+        arrays = (self.opcodes, self.file_ids, self.lines, self.arg_offsets, self.arg_ids)
+        size = sum(sys.getsizeof(a) for a in arrays)
+        for table in (self.files, self.actions, self.strings):
+            size += sys.getsizeof(table) + sum(map(sys.getsizeof, table))
+        return size + sum(map(sys.getsizeof, self._index))
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def to_state(self) -> ProgramState:
+        r"""plain (marshal-able) representation for the cache"""
+        return (
+            self.files, self.actions, self.strings,
+            self.opcodes.tobytes(), self.file_ids.tobytes(), self.lines.tobytes(),
+            self.arg_offsets.tobytes(), self.arg_ids.tobytes(),
+        )
+
+    @classmethod
+    def from_state(cls, state: ProgramState) -> 'Program':
+        files, actions, strings, opcodes, file_ids, lines, arg_offsets, arg_ids = state
+        program = cls()
+        program.files, program.actions, program.strings = list(files), list(actions), list(strings)
+        program._index = tuple(
+            {string: index for index, string in enumerate(table_list)}
+            for table_list in (program.files, program.actions, program.strings)
+        )
+        for name, data in (('opcodes', opcodes), ('file_ids', file_ids), ('lines', lines),
+                           ('arg_offsets', arg_offsets), ('arg_ids', arg_ids)):
+            values = array(getattr(program, name).typecode)
+            values.frombytes(data)
+            setattr(program, name, values)
+        return program
@@ -0,0 +1,167 @@
+# -*- coding=utf-8 -*-
+r"""
+connections to a selenium-grid or standalone webdriver-server
+
+all remote sessions of the process share one keep-alive HTTP connection-pool
+so the commands don't pay the connection setup again and again
+
+selenium has no public way to share a pool between sessions before 4.26, so PooledRemoteConnection hooks into
+the internals of its RemoteConnection (`_get_connection_manager`, `_request`, `_conn`, `_proxy_url`).
+the Pipfile pins selenium below 4.26 where these changed (ClientConfig).
+a newer selenium gets a ClientConfig per session with the timeout instead (nothing shared, no retries)
+"""
+import os
+import logging
+import functools
+import threading
+import typing as t
+from .exceptions import *
+from .browser_options import BrowserSettings, build_options, apply_blocking
+if t.TYPE_CHECKING:
+    import urllib3
+    from selenium.webdriver import Remote as BrowserType
+
+
+__all__ = ['PoolOptions', 'configure_pool', 'pool_options', 'connection_arguments', 'shared_pool', 'close_pool',
+           'PooledRemoteConnection', 'pooled_connection_class', 'create_remote_browser']
+
+
+class PoolOptions(t.NamedTuple):
+    r"""
+    pool_size: max number of kept-alive connections per host
+    block: wait for a free connection instead of opening a throw-away one when all are in use
+    connect_timeout: timeout for opening a connection in seconds
+    read_timeout: timeout for the response of a command in seconds
+    retries: how often a failed connection is retried
+    keep_alive: reuse the connections (otherwise a new connection per command)
+    """
+    pool_size: int = 16
+    block: bool = False
+    connect_timeout: float = 10
+    read_timeout: float = 120
+    retries: int = 3
+    keep_alive: bool = True
+
+
+_lock = threading.Lock()
+_options = PoolOptions()
+_pool: t.Optional['urllib3.PoolManager'] = None
+
+
+def configure_pool(**options) -> PoolOptions:
+    r"""changes the options of the shared pool (an existing pool is closed and recreated on next use)"""
+    global _options
+    with _lock:
+        _options = _options._replace(**options)
+    close_pool()
+    return _options
+
+
+def pool_options() -> PoolOptions:
+    return _options
+
+
+def connection_arguments() -> t.Dict[str, t.Any]:
+    r"""the timeouts and retries of the connections (shared pool, per-command connections and proxies)"""
+    import urllib3
+    return dict(
+        timeout=urllib3.Timeout(connect=_options.connect_timeout, read=_options.read_timeout),
+        retries=urllib3.Retry(total=_options.retries, redirect=False),
+    )
+
+
+def shared_pool() -> 'urllib3.PoolManager':
+    r"""returns the process-wide connection-pool (created on first use)"""
+    import urllib3
+    global _pool
+    with _lock:
+        if _pool is None:
+            logging.debug(f"Creating remote connection-pool {_options}")
+            _pool = urllib3.PoolManager(maxsize=_options.pool_size, block=_options.block, **connection_arguments())
+        return _pool
+
+
+def close_pool() -> None:
+    r"""closes all connections of the shared pool"""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.clear()
+
+
+def _forget_pool_after_fork() -> None:
+    # the sockets of the parent must not be used by a forked child (eg batch-workers)
+    global _pool, _lock
+    _lock = threading.Lock()
+    _pool = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+
+
+class _PooledConnectionMixin:
+    r"""RemoteConnection that sends its commands over the shared connection-pool"""
+
+    def __init__(self, remote_server_addr: str, ignore_proxy: bool = False):
+        super().__init__(remote_server_addr.rstrip('/'), keep_alive=_options.keep_alive, ignore_proxy=ignore_proxy)
+
+    def _get_connection_manager(self):
+        if self._proxy_url or not self.keep_alive:  # per-command managers are closed after use
+            manager = super()._get_connection_manager()
+            manager.connection_pool_kw.update(connection_arguments())  # selenium only sets its global timeout
+            return manager
+        return shared_pool()
+
+    def _request(self, method, url, body=None):
+        if self.keep_alive and not self._proxy_url:
+            self._conn = shared_pool()  # the pool could have been recreated by configure_pool()
+        return super()._request(method, url, body=body)
+
+    def close(self):
+        r"""the shared pool stays open for the other sessions"""
+        if self._proxy_url:
+            super().close()
+
+
+@functools.cache
+def pooled_connection_class() -> t.Optional[t.Type]:
+    r"""
+    PooledRemoteConnection (the RemoteConnection of selenium is only imported when a remote session starts)
+    or None if the internals it hooks into aren't there (selenium 4.26 and newer)
+    """
+    import inspect
+    import selenium
+    from selenium.webdriver.remote.remote_connection import RemoteConnection
+    if 'client_config' in inspect.signature(RemoteConnection.__init__).parameters \
+            or not all(hasattr(RemoteConnection, name) for name in ('_get_connection_manager', '_request')):
+        logging.warning(f"selenium {selenium.__version__} isn't supported by the shared connection-pool "
+                        f"(only --remote-timeout is used, see the Pipfile)")
+        return None
+    return type("PooledRemoteConnection", (_PooledConnectionMixin, RemoteConnection), {'__module__': __name__})
+
+
+def __getattr__(name: str):
+    if name == "PooledRemoteConnection":
+        return pooled_connection_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_remote_browser(url: str, browser: str, settings: BrowserSettings = BrowserSettings()) -> 'BrowserType':
+    r"""starts a new session of `browser` on the grid/server at `url`"""
+    from selenium.webdriver import Remote
+    options = build_options(browser, settings)
+    logging.debug(f"Connecting to remote webdriver {url}")
+    connection_class = pooled_connection_class()
+    if connection_class is not None:
+        driver = Remote(command_executor=connection_class(url), options=options)
+    else:
+        from selenium.webdriver.remote.client_config import ClientConfig
+        config = ClientConfig(url.rstrip('/'), keep_alive=_options.keep_alive, timeout=_options.read_timeout)
+        driver = Remote(command_executor=url.rstrip('/'), options=options, client_config=config)
+    apply_blocking(driver, settings)
+    return driver
@@ -0,0 +1,69 @@
+# -*- coding=utf-8 -*-
+r"""
+the parts of selenium that are needed everywhere, imported on first use
+
+importing anything from `selenium.webdriver` loads every browser-driver and urllib3 (>100ms)
+so the interpreter only does it when a line needs the browser (INIT, WAIT-TILL, @KEY, ...).
+scripts that never touch a browser (SET, INFO, SLEEP) never import it.
+the exceptions of `selenium.common` are cheap and imported directly where they are needed
+"""
+import functools
+import typing as t
+
+
+__all__ = ['By', 'BROWSER_NAMES', 'keys_class', 'keys_context', 'focus_changing_keys', 'browser_classes',
+           'options_classes']
+
+
+class By:
+    r"""the locator-strategies of selenium.webdriver.common.by.By (plain strings)"""
+    ID = "id"
+    XPATH = "xpath"
+    LINK_TEXT = "link text"
+    PARTIAL_LINK_TEXT = "partial link text"
+    NAME = "name"
+    TAG_NAME = "tag name"
+    CLASS_NAME = "class name"
+    CSS_SELECTOR = "css selector"
+
+
+BROWSER_NAMES = ("chrome", "firefox", "safari", "edge")
+
+
+@functools.cache
+def keys_class() -> t.Type:
+    r"""selenium.webdriver.Keys"""
+    from selenium.webdriver import Keys
+    return Keys
+
+
+@functools.cache
+def keys_context() -> t.Dict[str, str]:
+    r"""@NAME -> key of the @KEY-references"""
+    keys = keys_class()
+    return {
+        f'@{name}': getattr(keys, name)
+        for name in dir(keys)
+        if name.isupper()
+    }
+
+
+@functools.cache
+def focus_changing_keys() -> t.FrozenSet[str]:
+    r"""the characters that can move the focus (the selenium keys and the plain control-characters of typed text)"""
+    keys = keys_class()
+    return frozenset({keys.TAB, keys.RETURN, keys.ENTER, keys.ESCAPE, keys.SPACE, "\n", "\t", "\r"})
+
+
+@functools.cache
+def browser_classes() -> t.Dict[str, t.Type]:
+    r"""name -> webdriver-class of the local browsers"""
+    from selenium.webdriver import Chrome, Firefox, Safari, Edge
+    return dict(chrome=Chrome, firefox=Firefox, safari=Safari, edge=Edge)
+
+
+@functools.cache
+def options_classes() -> t.Dict[str, t.Type]:
+    r"""name -> options-class of the browsers"""
+    from selenium.webdriver import ChromeOptions, FirefoxOptions, SafariOptions, EdgeOptions
+    return dict(chrome=ChromeOptions, firefox=FirefoxOptions, safari=SafariOptions, edge=EdgeOptions)
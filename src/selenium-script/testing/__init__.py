@@ -0,0 +1,11 @@
+# -*- coding=utf-8 -*-
+r"""
+stand-ins for browsers and WebDriver-servers (tests and benchmarks)
+"""
+from .fake_webdriver import *
+from .fake_browser import *
+
+__all__ = [
+    'FakeWebDriverServer', 'FakeSession',
+    'FakeBrowser', 'FakeElement', 'FakeBrowserEngine',
+]
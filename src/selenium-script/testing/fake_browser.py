@@ -0,0 +1,273 @@
+# -*- coding=utf-8 -*-
+r"""
+in-process fake of the selenium WebDriver API
+
+implements the subset of `selenium.webdriver.Remote` that the actions use so scripts can run
+without a browser, driver or network (interpreter benchmarks and tests).
+
+engine = FakeBrowserEngine("script.ss")
+engine.execute()
+"""
+import time
+import uuid
+import base64
+import hashlib
+import typing as t
+from selenium.webdriver.remote.command import Command
+from selenium.common.exceptions import (
+    NoSuchElementException, NoSuchWindowException, NoAlertPresentException, InvalidCookieDomainException,
+)
+from ..engine import ScriptEngine, PRELOCATE_SCRIPTS
+from ..browser_options import BrowserSettings
+from ..extract import EXTRACT_SCRIPT, NEXT_PAGE_SCRIPT, PAGE_CHANGED_SCRIPT
+from .fake_webdriver import SCRIPT_RESULTS
+
+
+__all__ = ['FakeBrowser', 'FakeElement', 'FakeBrowserEngine']
+
+
+PRELOCATE_BY_SCRIPT = {script: by for by, script in PRELOCATE_SCRIPTS.items()}
+
+
+class FakeElement:
+    def __init__(self, browser: 'FakeBrowser', by: str, value: str):
+        self.parent = browser
+        self.id = uuid.uuid4().hex
+        self.by = by
+        self.value = value
+        self.text = ""
+        self.typed: t.List[str] = []
+        self.clicks = 0
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.by}={self.value!r}>"
+
+    def send_keys(self, *keys: str) -> None:
+        self.parent.delay()
+        self.typed.extend(keys)
+
+    def click(self) -> None:
+        self.parent.delay()
+        self.clicks += 1
+
+    def find_element(self, by: str = "css selector", value: str = None) -> 'FakeElement':
+        return self.parent.find_element(by, value)
+
+    def find_elements(self, by: str = "css selector", value: str = None) -> t.List['FakeElement']:
+        return self.parent.find_elements(by, value)
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def get_attribute(self, name: str) -> t.Optional[str]:
+        return None
+
+    @property
+    def screenshot_as_base64(self) -> str:
+        self.parent.delay()
+        return self.parent.screenshot(f"{self.by}={self.value}")
+
+
+class _SwitchTo:
+    def __init__(self, browser: 'FakeBrowser'):
+        self._browser = browser
+
+    @property
+    def active_element(self) -> FakeElement:
+        self._browser.delay()
+        return self._browser.focused
+
+    @property
+    def alert(self):
+        raise NoAlertPresentException()
+
+    def new_window(self, type_hint: str = None) -> None:
+        self._browser.delay()
+        handle = uuid.uuid4().hex
+        self._browser.window_handles.append(handle)
+        self._browser.current_window_handle = handle
+
+    def window(self, handle: str) -> None:
+        self._browser.delay()
+        if handle not in self._browser.window_handles:
+            raise NoSuchWindowException(handle)
+        self._browser.current_window_handle = handle
+
+
+class FakeBrowser:
+    r"""
+    latency: simulated round-trip per command in seconds
+    missing: css-selectors that are never found (NoSuchElementException, false conditions)
+    items: elements that EXTRACT finds on every one of the `pages`
+    screenshot_size: bytes of a screenshot (the same for the same url)
+    """
+
+    def __init__(self, *, latency: float = 0.0, missing: t.Iterable[str] = (), items: int = 0, pages: int = 1,
+                 screenshot_size: int = 64 * 1024):
+        self.session_id = uuid.uuid4().hex
+        self.latency = latency
+        self.missing = set(missing)
+        self.items = items
+        self.pages = pages
+        self.page = 1
+        self.screenshot_size = screenshot_size
+        self.current_url = "about:blank"
+        self.history: t.List[str] = [self.current_url]
+        self.window_handles: t.List[str] = [uuid.uuid4().hex]
+        self.current_window_handle = self.window_handles[0]
+        self.switch_to = _SwitchTo(self)
+        self.focused = FakeElement(self, "css selector", "body")
+        self.pressed: t.List[str] = []
+        self.cookies: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self.cdp_commands: t.List[t.Tuple[str, t.Dict[str, t.Any]]] = []
+        self.commands = 0
+        self.quit_called = False
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.session_id}>"
+
+    def delay(self) -> None:
+        self.commands += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def get(self, url: str) -> None:
+        self.delay()
+        self.current_url = url
+        self.history.append(url)
+
+    def refresh(self) -> None:
+        self.delay()
+
+    def back(self) -> None:
+        self.delay()
+        if len(self.history) > 1:
+            self.history.pop()
+        self.current_url = self.history[-1]
+
+    def forward(self) -> None:
+        self.delay()
+
+    def close(self) -> None:
+        self.delay()
+        self.window_handles.remove(self.current_window_handle)
+        if self.window_handles:
+            self.current_window_handle = self.window_handles[0]
+
+    def quit(self) -> None:
+        self.delay()
+        self.quit_called = True
+
+    def find_element(self, by: str = "css selector", value: str = None) -> FakeElement:
+        self.delay()
+        if value in self.missing:
+            raise NoSuchElementException(f"{by}={value!r}")
+        return FakeElement(self, by, value)
+
+    def find_elements(self, by: str = "css selector", value: str = None) -> t.List[FakeElement]:
+        self.delay()
+        return [] if value in self.missing else [FakeElement(self, by, value)]
+
+    def screenshot(self, content: str) -> str:
+        r"""base64 of a fake png (incompressible bytes that only depend on `content`)"""
+        seed = hashlib.sha512(content.encode()).digest()
+        body = (seed * (self.screenshot_size // len(seed) + 1))[:self.screenshot_size]
+        return base64.b64encode(b"\x89PNG\r\n\x1a\n" + body).decode('ascii')
+
+    def get_screenshot_as_base64(self) -> str:
+        self.delay()
+        return self.screenshot(self.current_url)
+
+    @property
+    def page_source(self) -> str:
+        self.delay()
+        return f"<html><head><title>Fake Page</title></head><body>{self.current_url}</body></html>"
+
+    def execute_script(self, script: str, *args: t.Any) -> t.Any:
+        self.delay()
+        if ".focus()" in script:
+            self.focused = args[0] if args and isinstance(args[0], FakeElement) else self.focused
+            return None
+        if script is EXTRACT_SCRIPT:
+            query, fields, offset, size = args
+            items = 0 if query in self.missing else self.items
+            return dict(total=items, rows=[
+                [f"{field} {self.page}.{index}" for field in fields]
+                for index in range(offset, min(items, offset + size))
+            ])
+        if script is NEXT_PAGE_SCRIPT:
+            if self.page >= self.pages:
+                return False
+            self.page += 1
+            return True
+        if script is PAGE_CHANGED_SCRIPT:
+            return True
+        if script in PRELOCATE_BY_SCRIPT:
+            return None if args[0] in self.missing else FakeElement(self, PRELOCATE_BY_SCRIPT[script], args[0])
+        if "predicate(" in script and args and args[0] in self.missing:  # WAIT-TILL/IF condition of a query
+            return False
+        for marker, result in SCRIPT_RESULTS.items():
+            if marker in script:
+                return self.current_url if marker == "location.href" else result
+        return None
+
+    def execute_async_script(self, script: str, *args: t.Any) -> t.Any:
+        return self.execute_script(script, *args)
+
+    def execute(self, command: str, params: t.Dict[str, t.Any] = None) -> t.Dict[str, t.Any]:
+        r"""raw WebDriver commands (used by ActionChains)"""
+        self.delay()
+        if command == Command.W3C_ACTIONS:
+            for source in (params or {}).get('actions', []):
+                for action in source.get('actions', []):
+                    if action.get('type') == "keyDown":
+                        self.pressed.append(action.get('value', ""))
+        return {'value': None}
+
+    def execute_cdp_cmd(self, command: str, params: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+        r"""the devtools-commands of a local chromium (recorded in `cdp_commands`)"""
+        self.delay()
+        self.cdp_commands.append((command, params))
+        if command == "Page.getNavigationHistory":
+            return dict(currentIndex=len(self.history) - 1, entries=[dict(url=url) for url in self.history])
+        if command == "Page.resetNavigationHistory":
+            self.history = [self.current_url]
+        elif command == "Network.clearBrowserCookies":
+            self.cookies.clear()
+        return {}
+
+    def set_page_load_timeout(self, seconds: float) -> None:
+        self.delay()
+
+    def implicitly_wait(self, seconds: float) -> None:
+        self.delay()
+
+    def set_script_timeout(self, seconds: float) -> None:
+        self.delay()
+
+    def get_cookies(self) -> t.List[t.Dict[str, t.Any]]:
+        self.delay()
+        return list(self.cookies.values())
+
+    def add_cookie(self, cookie: t.Dict[str, t.Any]) -> None:
+        self.delay()
+        if self.current_url == "about:blank":
+            raise InvalidCookieDomainException("no page is loaded")
+        self.cookies[cookie['name']] = dict(cookie)
+
+    def delete_all_cookies(self) -> None:
+        self.delay()
+        self.cookies.clear()
+
+
+class FakeBrowserEngine(ScriptEngine):
+    r"""ScriptEngine whose INIT creates a FakeBrowser (`browser_options` are passed to it)"""
+    browser_options: t.Dict[str, t.Any] = {}
+
+    def create_browser(self, browser: str, settings: BrowserSettings = BrowserSettings()) -> FakeBrowser:
+        return FakeBrowser(**self.browser_options)
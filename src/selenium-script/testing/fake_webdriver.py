@@ -0,0 +1,339 @@
+# -*- coding=utf-8 -*-
+r"""
+fake WebDriver HTTP server (stand-in for chromedriver/geckodriver/selenium-grid)
+
+implements the subset of the W3C WebDriver protocol the actions use. there is no real page:
+every css-selector matches (except if it contains `missing`) and scripts return canned results.
+useful for tests and benchmarks of the interpreter-overhead without a browser.
+
+python3 -m selenium-script.testing.fake_webdriver --port 4444 [--latency 0.001]
+"""
+import re
+import json
+import uuid
+import base64
+import hashlib
+import asyncio
+import threading
+import typing as t
+import argparse as ap
+
+
+__all__ = ['FakeWebDriverServer', 'FakeSession']
+
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+SCRIPT_RESULTS: t.Dict[str, t.Any] = {
+    "readyState": "complete",
+    "predicate(": True,  # conditions of WAIT-TILL
+    "location.href": "about:blank",
+}
+
+
+class FakeSession:
+    def __init__(self, capabilities: t.Dict[str, t.Any]):
+        self.id = uuid.uuid4().hex
+        self.capabilities = capabilities
+        self.url = "about:blank"
+        self.history: t.List[str] = [self.url]
+        self.history_index = 0
+        self.windows: t.List[str] = [uuid.uuid4().hex]
+        self.current_window = self.windows[0]
+        self.elements: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self.active_element = self.new_element("body")
+        self.typed: t.List[str] = []
+        self.lookups: t.List[t.Tuple[t.Optional[str], str, str]] = []  # (parent-element or None, using, value)
+        self.commands = 0
+
+    def new_element(self, selector: str) -> str:
+        element_id = uuid.uuid4().hex
+        self.elements[element_id] = dict(selector=selector, value="")
+        return element_id
+
+
+Response = t.Tuple[int, t.Any]
+
+
+class FakeWebDriverServer:
+    r"""
+    latency: simulated processing time per command in seconds
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.sessions: t.Dict[str, FakeSession] = {}
+        self.requests = 0
+        self.connections = 0
+        self._server: t.Optional[asyncio.AbstractServer] = None
+        self._connections: t.Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._thread: t.Optional[threading.Thread] = None
+        self._loop: t.Optional[asyncio.AbstractEventLoop] = None
+        self._routes: t.List[t.Tuple[str, re.Pattern, t.Callable[..., Response]]] = [
+            (method, re.compile(pattern), handler) for method, pattern, handler in (
+                ("GET", r"/status", self._status),
+                ("POST", r"/session", self._new_session),
+                ("DELETE", r"/session/(?P<sid>[^/]+)", self._delete_session),
+                ("POST", r"/session/(?P<sid>[^/]+)/url", self._navigate),
+                ("GET", r"/session/(?P<sid>[^/]+)/url", self._current_url),
+                ("POST", r"/session/(?P<sid>[^/]+)/(?P<direction>back|forward|refresh)", self._history),
+                ("GET", r"/session/(?P<sid>[^/]+)/title", lambda session, body: (200, "Fake Page")),
+                ("GET", r"/session/(?P<sid>[^/]+)/window", lambda session, body: (200, session.current_window)),
+                ("POST", r"/session/(?P<sid>[^/]+)/window", self._switch_window),
+                ("DELETE", r"/session/(?P<sid>[^/]+)/window", self._close_window),
+                ("GET", r"/session/(?P<sid>[^/]+)/window/handles", lambda session, body: (200, session.windows)),
+                ("POST", r"/session/(?P<sid>[^/]+)/window/new", self._new_window),
+                ("POST", r"/session/(?P<sid>[^/]+)/timeouts", lambda session, body: (200, None)),
+                ("POST", r"/session/(?P<sid>[^/]+)/(?:element/(?P<eid>[^/]+)/)?element", self._find_element),
+                ("POST", r"/session/(?P<sid>[^/]+)/(?:element/(?P<eid>[^/]+)/)?elements", self._find_elements),
+                ("GET", r"/session/(?P<sid>[^/]+)/element/active", self._active_element),
+                ("POST", r"/session/(?P<sid>[^/]+)/element/(?P<eid>[^/]+)/value", self._send_keys),
+                ("POST", r"/session/(?P<sid>[^/]+)/element/(?P<eid>[^/]+)/click", self._click),
+                ("POST", r"/session/(?P<sid>[^/]+)/element/(?P<eid>[^/]+)/clear", self._clear),
+                ("GET", r"/session/(?P<sid>[^/]+)/element/(?P<eid>[^/]+)/(?:text|name|attribute/[^/]+|property/[^/]+)",
+                 lambda session, body, eid: (200, "")),
+                ("POST", r"/session/(?P<sid>[^/]+)/execute/(?:sync|async)", self._execute),
+                ("POST", r"/session/(?P<sid>[^/]+)/actions", self._actions),
+                ("DELETE", r"/session/(?P<sid>[^/]+)/actions", lambda session, body: (200, None)),
+                ("GET", r"/session/(?P<sid>[^/]+)/(?:element/(?P<eid>[^/]+)/)?screenshot", self._screenshot),
+                ("GET", r"/session/(?P<sid>[^/]+)/source",
+                 lambda session, body: (200, f"<html><body>{session.url}</body></html>")),
+                ("GET", r"/session/(?P<sid>[^/]+)/cookie", lambda session, body: (200, [])),
+                ("DELETE", r"/session/(?P<sid>[^/]+)/cookie", lambda session, body: (200, None)),
+                ("GET", r"/session/(?P<sid>[^/]+)/alert/text",
+                 lambda session, body: (404, dict(error="no such alert", message="no alert open"))),
+            )
+        ]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections.keys(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def start_in_thread(self) -> str:
+        r"""runs the server in a background thread (for synchronous clients like selenium). returns the url"""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="fake-webdriver", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.url
+
+    def stop_thread(self) -> None:
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = self._thread = None
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode('latin-1').partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, value = await self._dispatch(method, path, body)
+                payload = json.dumps({"value": value}).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode('latin-1') + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = path.split("?", 1)[0].rstrip('/')
+        data = json.loads(body) if body else {}
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if route_method != method or match is None:
+                continue
+            params = match.groupdict()
+            if 'sid' in params:
+                session = self.sessions.get(params.pop('sid'))
+                if session is None:
+                    return 404, dict(error="invalid session id", message="unknown session")
+                session.commands += 1
+                return handler(session, data, **params)
+            return handler(data, **params)
+        return 404, dict(error="unknown command", message=f"{method} {path}")
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+
+    def _status(self, body) -> Response:
+        return 200, dict(ready=True, message="fake webdriver ready")
+
+    def _new_session(self, body) -> Response:
+        capabilities = body.get('capabilities', {}).get('alwaysMatch', {})
+        session = FakeSession(capabilities)
+        self.sessions[session.id] = session
+        return 200, dict(sessionId=session.id, capabilities=dict(capabilities, browserVersion="0.0-fake"))
+
+    def _delete_session(self, session: FakeSession, body) -> Response:
+        self.sessions.pop(session.id, None)
+        return 200, None
+
+    def _navigate(self, session: FakeSession, body) -> Response:
+        session.history[session.history_index + 1:] = [body['url']]
+        session.history_index = len(session.history) - 1
+        session.url = body['url']
+        session.active_element = session.new_element("body")
+        return 200, None
+
+    def _current_url(self, session: FakeSession, body) -> Response:
+        return 200, session.url
+
+    def _history(self, session: FakeSession, body, direction: str) -> Response:
+        if direction == "back":
+            session.history_index = max(0, session.history_index - 1)
+        elif direction == "forward":
+            session.history_index = min(len(session.history) - 1, session.history_index + 1)
+        session.url = session.history[session.history_index]
+        return 200, None
+
+    def _switch_window(self, session: FakeSession, body) -> Response:
+        if body.get('handle') not in session.windows:
+            return 404, dict(error="no such window", message=str(body.get('handle')))
+        session.current_window = body['handle']
+        return 200, None
+
+    def _close_window(self, session: FakeSession, body) -> Response:
+        session.windows.remove(session.current_window)
+        return 200, session.windows
+
+    def _new_window(self, session: FakeSession, body) -> Response:
+        handle = uuid.uuid4().hex
+        session.windows.append(handle)
+        return 200, dict(handle=handle, type=body.get('type', "tab"))
+
+    def _find_element(self, session: FakeSession, body, eid: str = None) -> Response:
+        session.lookups.append((eid, body.get('using'), body.get('value')))
+        if "missing" in body.get('value', ""):
+            return 404, dict(error="no such element", message=f"no element matches {body.get('value')!r}")
+        return 200, {ELEMENT_KEY: session.new_element(body.get('value', ""))}
+
+    def _find_elements(self, session: FakeSession, body, eid: str = None) -> Response:
+        session.lookups.append((eid, body.get('using'), body.get('value')))
+        if "missing" in body.get('value', ""):
+            return 200, []
+        return 200, [{ELEMENT_KEY: session.new_element(body.get('value', ""))} for _ in range(3)]
+
+    def _active_element(self, session: FakeSession, body) -> Response:
+        return 200, {ELEMENT_KEY: session.active_element}
+
+    def _send_keys(self, session: FakeSession, body, eid: str) -> Response:
+        if eid not in session.elements:
+            return 404, dict(error="stale element reference", message=eid)
+        text = body.get('text', "".join(body.get('value', [])))
+        session.elements[eid]['value'] += text
+        session.typed.append(text)
+        return 200, None
+
+    def _click(self, session: FakeSession, body, eid: str) -> Response:
+        if eid not in session.elements:
+            return 404, dict(error="stale element reference", message=eid)
+        session.active_element = eid
+        return 200, None
+
+    def _clear(self, session: FakeSession, body, eid: str) -> Response:
+        session.elements.get(eid, {})['value'] = ""
+        return 200, None
+
+    def _execute(self, session: FakeSession, body) -> Response:
+        script = body.get('script', "")
+        for element in body.get('args', []):
+            if isinstance(element, dict) and ELEMENT_KEY in element and "focus()" in script:
+                session.active_element = element[ELEMENT_KEY]
+        for marker, result in SCRIPT_RESULTS.items():
+            if marker in script:
+                return 200, (session.url if marker == "location.href" else result)
+        return 200, None
+
+    def _screenshot(self, session: FakeSession, body, eid: str = None) -> Response:
+        content = f"{session.url} {eid or ''}".encode()
+        return 200, base64.b64encode(b"\x89PNG\r\n\x1a\n" + hashlib.sha512(content).digest()).decode('ascii')
+
+    def _actions(self, session: FakeSession, body) -> Response:
+        for source in body.get('actions', []):
+            for action in source.get('actions', []):
+                if action.get('type') == "keyDown":
+                    session.typed.append(action.get('value', ""))
+        return 200, None
+
+
+def main():
+    parser = ap.ArgumentParser(description=__doc__, formatter_class=ap.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=4444)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per command")
+    args = parser.parse_args()
+
+    async def serve():
+        server = FakeWebDriverServer(args.host, args.port, latency=args.latency)
+        await server.start()
+        print(f"fake webdriver listening on {server.url}")
+        while True:
+            await asyncio.sleep(3600)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,6 @@ from .fill import *
 from .fmt import *
 
 __all__ = [
-    'fill',
+    'fill', 'Template', 'compile_template',
     'format_action',
 ]
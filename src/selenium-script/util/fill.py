@@ -4,10 +4,11 @@ r"""
 """
 import re
 import typing as t
+import functools
 from ..exceptions import ScriptUnknownVariableError
 
 
-__all__ = ['fill']
+__all__ = ['fill', 'Template', 'compile_template']
 
 
 __RE_CONTEXT = re.compile(
@@ -32,3 +33,58 @@ def fill(string: str, context: t.Dict[str, t.Any]) -> str:
             return "" if value is None else str(value)
 
     return __RE_CONTEXT.sub(repl=repl, string=string)
+
+
+class Template:
+    r"""
+    a string that was split into literal and variable segments
+
+    segments are `(is_variable, text)` where text is either the literal or the variable-name
+    """
+    __slots__ = ('string', 'segments')
+
+    string: str
+    segments: t.Tuple[t.Tuple[bool, str], ...]
+
+    def __init__(self, string: str, segments: t.Tuple[t.Tuple[bool, str], ...]):
+        self.string = string
+        self.segments = segments
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.string!r}>"
+
+    @property
+    def is_constant(self) -> bool:
+        return not any(is_variable for is_variable, _ in self.segments)
+
+    @property
+    def variables(self) -> t.Tuple[str, ...]:
+        return tuple(text for is_variable, text in self.segments if is_variable)
+
+    def render(self, context: t.Dict[str, t.Any]) -> str:
+        parts = []
+        for is_variable, text in self.segments:
+            if is_variable:
+                try:
+                    value = context[text]
+                except KeyError:
+                    raise ScriptUnknownVariableError(text)
+                parts.append("" if value is None else str(value))
+            else:
+                parts.append(text)
+        return ''.join(parts)
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_template(string: str) -> Template:
+    r"""splits the string once so the regex doesn't has to run for every execution"""
+    segments = []
+    position = 0
+    for match in __RE_CONTEXT.finditer(string):
+        if match.start() > position:
+            segments.append((False, string[position:match.start()]))
+        segments.append((True, match.group(match.lastindex)))
+        position = match.end()
+    if position < len(string):
+        segments.append((False, string[position:]))
+    return Template(string, tuple(segments))
@@ -0,0 +1,44 @@
+# -*- coding=utf-8 -*-
+r"""
+fixtures of the tests (the package is imported from src/ like the benchmarks do)
+
+python3 -m pytest tests/
+"""
+import os
+import sys
+import importlib
+import typing as t
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+testing = importlib.import_module("selenium-script.testing")
+remote = importlib.import_module("selenium-script.remote")
+
+
+@pytest.fixture
+def write_script(tmp_path) -> t.Callable[[str], str]:
+    r"""writes the source into a script-file and returns its path"""
+    def write(content: str, filename: str = "script.ss") -> str:
+        path = tmp_path / filename
+        path.write_text(content)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def webdriver_server() -> t.Iterator['testing.FakeWebDriverServer']:
+    r"""fake WebDriver-server in a background thread (for the synchronous selenium-client)"""
+    server = testing.FakeWebDriverServer()
+    server.start_in_thread()
+    try:
+        yield server
+    finally:
+        server.stop_thread()
+
+
+@pytest.fixture(autouse=True)
+def remote_pool() -> t.Iterator[None]:
+    r"""every test starts with the default options of the shared connection-pool and without connections"""
+    options = remote.pool_options()
+    yield
+    remote.configure_pool(**options._asdict())
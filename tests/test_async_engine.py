@@ -0,0 +1,126 @@
+# -*- coding=utf-8 -*-
+r"""
+AsyncScriptEngine: many sessions on one event-loop against the fake WebDriver-server
+"""
+import time
+import asyncio
+import importlib
+import typing as t
+aio = importlib.import_module("selenium-script.aio")
+testing = importlib.import_module("selenium-script.testing")
+
+
+SCRIPT = """\
+ACTION-DELAY OFF
+INIT Chrome --headless
+VISIT https://example.com/$NAME
+SELECT 'input[name="q"]'
+TYPE "hello $NAME"
+SLEEP 200ms
+QUIT
+"""
+
+
+class CountingServer(testing.FakeWebDriverServer):
+    r"""remembers the most sessions that were open at the same time and the visited urls"""
+
+    def __init__(self):
+        super().__init__()
+        self.peak_sessions = 0
+        self.visited: t.List[str] = []
+
+    def _new_session(self, body):
+        response = super()._new_session(body)
+        self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+        return response
+
+    def _navigate(self, session, body):
+        self.visited.append(body['url'])
+        return super()._navigate(session, body)
+
+
+async def run_sessions(source: str, count: int, *, concurrency: int = None, pool_size: int = 16):
+    async with CountingServer() as server:
+        async with aio.HttpClient(server.url, pool_size=pool_size) as client:
+            engines = [
+                aio.AsyncScriptEngine(source, client=client, context=dict(NAME=f"n{index}"), use_cache=False)
+                for index in range(count)
+            ]
+            start = time.perf_counter()
+            codes = await aio.run_engines(engines, concurrency=concurrency)
+            duration = time.perf_counter() - start
+    return server, client, codes, duration
+
+
+def test_sessions_run_concurrently(write_script):
+    server, client, codes, duration = asyncio.run(run_sessions(write_script(SCRIPT), 8))
+    assert codes == [0] * 8
+    assert server.peak_sessions == 8
+    assert not server.sessions  # every session was quit
+    assert sorted(server.visited) == sorted(f"https://example.com/n{index}" for index in range(8))
+    assert duration < 1.0  # the SLEEPs of 8 sessions one after another take 1.6s
+
+
+def test_concurrency_limit(write_script):
+    server, client, codes, duration = asyncio.run(run_sessions(write_script(SCRIPT), 6, concurrency=2))
+    assert codes == [0] * 6
+    assert server.peak_sessions == 2
+
+
+def test_sessions_share_the_connections(write_script):
+    server, client, codes, duration = asyncio.run(run_sessions(write_script(SCRIPT), 8, pool_size=4))
+    assert codes == [0] * 8
+    assert client.connections_opened == server.connections <= 4
+    assert client.requests == server.requests > server.connections
+
+
+def test_failed_session_does_not_stop_the_others(write_script):
+    source = write_script(SCRIPT.replace("SLEEP 200ms", "SLEEP $WAIT"))
+    contexts = [dict(NAME="ok", WAIT="10ms"), dict(NAME="broken", WAIT="never")]
+
+    async def run():
+        async with CountingServer() as server:
+            async with aio.HttpClient(server.url) as client:
+                codes = await aio.run_engines([
+                    aio.AsyncScriptEngine(source, client=client, context=context, use_cache=False)
+                    for context in contexts
+                ])
+        return server, codes
+
+    server, codes = asyncio.run(run())
+    assert codes == [0, 1]
+    assert not server.sessions  # the failed session was quit too
+
+
+class LookupServer(testing.FakeWebDriverServer):
+    r"""remembers the element look-ups of all sessions"""
+
+    def __init__(self):
+        super().__init__()
+        self.lookups: t.List[t.Tuple[t.Optional[str], str, str]] = []
+
+    def _find_element(self, session, body, eid=None):
+        response = super()._find_element(session, body, eid)
+        self.lookups.append(session.lookups[-1])
+        return response
+
+
+def test_select_actions_match_the_sync_engine(write_script):
+    source = write_script(
+        "ACTION-DELAY OFF\nINIT Chrome\nSELECT nav.pages\nSELECT-LINK-TEXT Next page\nTYPE a\n"
+        "SELECT-NAME 'user\"name'\nQUIT\n"
+    )
+
+    async def run():
+        async with LookupServer() as server:
+            async with aio.HttpClient(server.url) as client:
+                engine = aio.AsyncScriptEngine(source, client=client, use_cache=False)
+                await engine.execute()
+        return server, engine
+
+    server, engine = asyncio.run(run())
+    (_, _, nav), (parent, using, text), (_, _, name) = server.lookups
+    assert (using, text) == ("link text", "Next page")
+    assert parent is not None  # looked up under the selected nav
+    assert engine.element_lookups == 0  # TYPE used the found link
+    assert name == r'[name="user\22 name"]'
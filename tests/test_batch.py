@@ -0,0 +1,70 @@
+# -*- coding=utf-8 -*-
+r"""
+batch mode (--data): the script is linked once per worker and every row runs with a fresh context
+"""
+import logging
+import importlib
+selenium_script = importlib.import_module("selenium-script")
+batch = importlib.import_module("selenium-script.batch")
+testing = importlib.import_module("selenium-script.testing")
+LoggingContextFilter = importlib.import_module("selenium-script.logging_context").LoggingContextFilter
+
+SCRIPT = """\
+DEFAULT SEEN no
+INFO $NAME $SEEN
+SET SEEN yes
+ACTION-DELAY 5ms
+"""
+
+
+def count_links(monkeypatch) -> list:
+    links = []
+    link = selenium_script.ScriptEngine.link
+
+    def counting_link(self, program):
+        links.append(self)
+        return link(self, program)
+    monkeypatch.setattr(selenium_script.ScriptEngine, 'link', counting_link)
+    return links
+
+
+def test_rows_share_the_linked_engine(write_script, monkeypatch, caplog):
+    engine = selenium_script.ScriptEngine(write_script(SCRIPT), use_cache=False)
+    links = count_links(monkeypatch)
+    caplog.handler.addFilter(LoggingContextFilter())
+    with caplog.at_level(logging.INFO):
+        results = batch.run_batch(engine, [dict(NAME="a"), dict(NAME="b"), dict(NAME="c")])
+    assert [result.return_code for result in results] == [0, 0, 0]
+    assert len(links) == 1  # the worker, not per row
+    assert [record.getMessage() for record in caplog.records if record.scriptAction == "info"] == [
+        "'a no'", "'b no'", "'c no'",  # nothing of the previous row is left
+    ]
+    assert batch._worker.engine.delay_between_actions == 0.005  # set by the last row
+
+
+def test_reset_run_restores_the_defaults(write_script):
+    engine = selenium_script.ScriptEngine(write_script("WAIT-MODE EVENT\nACTION-DELAY 1s --kind input\n"),
+                                          use_cache=False, context=dict(A="1"))
+    engine.execute()
+    assert (engine.wait_mode, engine.action_delays) == ("event", dict(input=1.0))
+    instructions = engine.instructions
+    engine.reset_run(dict(B="2"))
+    assert (engine.wait_mode, engine.action_delays, engine.loops) == ("poll", {}, [])
+    assert "A" not in engine.context and engine.context["B"] == "2"
+    assert engine.instructions is instructions
+
+
+def test_async_rows_share_an_engine_per_session(write_script, monkeypatch):
+    source = write_script("INIT Chrome\nVISIT https://example.com/$NAME\nQUIT\n")
+    engine = selenium_script.ScriptEngine(source, use_cache=False)
+    links = count_links(monkeypatch)
+    server = testing.FakeWebDriverServer()
+    url = server.start_in_thread()
+    try:
+        results = batch.run_batch_async(engine, [dict(NAME=str(index)) for index in range(6)],
+                                        webdriver_url=url, concurrency=2)
+    finally:
+        server.stop_thread()
+    assert [result.return_code for result in results] == [0] * 6
+    assert len(links) == 2
+    assert not server.sessions
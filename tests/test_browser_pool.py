@@ -0,0 +1,69 @@
+# -*- coding=utf-8 -*-
+r"""
+BrowserPool: INIT/QUIT reuse a warm session (fake browsers and the fake WebDriver-server)
+"""
+import importlib
+selenium_script = importlib.import_module("selenium-script")
+testing = importlib.import_module("selenium-script.testing")
+BrowserPool = importlib.import_module("selenium-script.browser_pool").BrowserPool
+
+
+SCRIPT = "ACTION-DELAY OFF\nINIT Chrome --headless\nVISIT https://example.com/login\nQUIT\n"
+
+
+class RecordingEngine(testing.FakeBrowserEngine):
+    r"""keeps every browser that INIT gets (created or from the pool)"""
+    browsers = []
+
+    def action_init(self, *args, **kwargs):
+        super().action_init(*args, **kwargs)
+        self.browsers.append(self._browser)
+
+
+def test_session_is_reused(write_script):
+    source = write_script(SCRIPT)
+    pool = BrowserPool(1)
+    browsers = RecordingEngine.browsers = []
+    for _ in range(3):
+        RecordingEngine(source, use_cache=False, browser_pool=pool).execute()
+    assert (pool.created, pool.reused) == (1, 2)
+    assert browsers[0] is browsers[1] is browsers[2]
+    assert not browsers[0].quit_called
+    # reset between the runs: the cookies and the storage of the visited site
+    assert ("Network.clearBrowserCookies", {}) in browsers[0].cdp_commands
+    assert ("Storage.clearDataForOrigin", dict(origin="https://example.com", storageTypes="all")) \
+        in browsers[0].cdp_commands
+    pool.close()
+    assert browsers[0].quit_called
+
+
+def test_max_uses(write_script):
+    source = write_script(SCRIPT)
+    pool = BrowserPool(1, max_uses=2)
+    browsers = RecordingEngine.browsers = []
+    for _ in range(3):
+        RecordingEngine(source, use_cache=False, browser_pool=pool).execute()
+    assert (pool.created, pool.reused) == (2, 1)
+    assert browsers[0].quit_called and browsers[2] is not browsers[0]
+    pool.close()
+
+
+def test_prewarm(write_script):
+    pool = BrowserPool(2)
+    engine = testing.FakeBrowserEngine(write_script(SCRIPT), use_cache=False, browser_pool=pool)
+    assert engine.prewarm_browsers() == 1
+    assert (pool.created, pool.reused) == (2, 0)
+    engine.execute()
+    assert (pool.created, pool.reused) == (2, 1)
+    pool.close()
+
+
+def test_remote_session_is_not_kept(write_script, webdriver_server):
+    # a remote session can't clear the storage of other sites (no DevTools-protocol): it is quit instead of reused
+    source = write_script(SCRIPT.replace("--headless", f"--remote {webdriver_server.url}"))
+    pool = BrowserPool(1)
+    for _ in range(2):
+        selenium_script.ScriptEngine(source, use_cache=False, browser_pool=pool).execute()
+        assert not webdriver_server.sessions
+    assert (pool.created, pool.reused) == (2, 0)
+    pool.close()
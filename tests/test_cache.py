@@ -0,0 +1,28 @@
+# -*- coding=utf-8 -*-
+r"""
+__sscache__: compiled scripts are stored next to the script and outdated entries are removed
+"""
+import os
+import importlib
+selenium_script = importlib.import_module("selenium-script")
+cache = importlib.import_module("selenium-script.cache")
+
+
+def test_store_removes_the_entries_of_other_versions(write_script, tmp_path):
+    source = write_script("INFO a\n")
+    directory = tmp_path / cache.CACHE_DIRNAME
+    directory.mkdir()
+    outdated = [
+        "script.ss.d76ee5eb77fb779a.ss0.1.0-cpython-311.cache",  # before the format was part of the tag
+        f"script.ss.0123456789abcdef.{cache.CACHE_TAG}.cache",  # older content
+    ]
+    kept = [
+        "script.ss.bak.ss.0123456789abcdef.ss0.1.0-cpython-311.cache",  # another script
+        "other.ss.0123456789abcdef.ss0.1.0-cpython-311.cache",
+    ]
+    for filename in outdated + kept:
+        (directory / filename).write_bytes(b"")
+    selenium_script.ScriptEngine(source, use_cache=True)
+    current = os.path.basename(cache.cache_path(source, cache.file_digest(source)))
+    assert sorted(os.listdir(directory)) == sorted(kept + [current])
+    assert cache.load_cached(source) is not None
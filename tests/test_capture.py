@@ -0,0 +1,53 @@
+# -*- coding=utf-8 -*-
+r"""
+SCREENSHOT/SNAPSHOT: identical frames become hard-links and overwriting a path keeps the linked copies
+"""
+import os
+import gzip
+import base64
+import importlib
+testing = importlib.import_module("selenium-script.testing")
+CaptureQueue = importlib.import_module("selenium-script.capture").CaptureQueue
+
+FRAME_A = base64.b64encode(b"frame a").decode('ascii')
+FRAME_B = base64.b64encode(b"frame b").decode('ascii')
+
+
+def test_identical_screenshots_are_linked(write_script, tmp_path):
+    source = write_script(
+        f"ACTION-DELAY OFF\nINIT Chrome\nVISIT https://example.com\n"
+        f"SCREENSHOT {tmp_path / 'a.png'}\nSCREENSHOT {tmp_path / 'b.png'}\n"
+        f"VISIT https://example.com/next\nSCREENSHOT {tmp_path / 'c.png'}\nQUIT\n"
+    )
+    testing.FakeBrowserEngine(source, use_cache=False).execute()
+    a, b, c = (os.stat(tmp_path / name) for name in ("a.png", "b.png", "c.png"))
+    assert a.st_ino == b.st_ino != c.st_ino
+    assert (tmp_path / "a.png").read_bytes().startswith(b"\x89PNG")
+
+
+def test_duplicates_are_counted(tmp_path):
+    queue = CaptureQueue()
+    for name in ("a.png", "b.png", "c.png"):
+        queue.capture(str(tmp_path / name), FRAME_A, encoding="base64")
+    queue.capture(str(tmp_path / "d.png"), FRAME_B, encoding="base64")
+    assert queue.close() == []
+    assert (queue.captured, queue.duplicates) == (2, 2)
+
+
+def test_overwriting_a_path_keeps_its_links(tmp_path):
+    first, linked, other = (str(tmp_path / name) for name in ("first.png", "linked.png", "other.png"))
+    queue = CaptureQueue(workers=1)
+    queue.capture(first, FRAME_A, encoding="base64")
+    queue.capture(linked, FRAME_A, encoding="base64")
+    queue.capture(first, FRAME_B, encoding="base64")  # a new file, `linked` keeps frame a
+    queue.capture(other, FRAME_A, encoding="base64")  # not a link of `first` anymore
+    assert queue.close() == []
+    assert open(first, 'rb').read() == b"frame b"
+    assert open(linked, 'rb').read() == open(other, 'rb').read() == b"frame a"
+
+
+def test_snapshot_is_compressed(write_script, tmp_path):
+    path = tmp_path / "page.html.gz"
+    source = write_script(f"ACTION-DELAY OFF\nINIT Chrome\nVISIT https://example.com\nSNAPSHOT {path}\nQUIT\n")
+    testing.FakeBrowserEngine(source, use_cache=False).execute()
+    assert b"https://example.com" in gzip.decompress(path.read_bytes())
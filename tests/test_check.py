@@ -0,0 +1,50 @@
+# -*- coding=utf-8 -*-
+r"""
+--check: the errors of the lines with literal arguments and the estimated minimum runtime
+"""
+import importlib
+import pytest
+selenium_script = importlib.import_module("selenium-script")
+check = importlib.import_module("selenium-script.check")
+
+
+def check_source(write_script, source: str) -> 'check.CheckReport':
+    engine = selenium_script.ScriptEngine(write_script(source), use_cache=False)
+    return check.check_script(engine.tokens, engine.instructions)
+
+
+def test_errors(write_script):
+    report = check_source(write_script, "INIT Chrome\nTAB four\nSLEEP 2x\nTAB 2\nWAIT-TILL VISBLE .x\nINIT Opera\n")
+    assert [(error.line, error.action) for error in report.errors] == [
+        (2, "tab"), (3, "sleep"), (5, "wait_till"), (6, "init"),
+    ]
+    assert "Can't parse to integer: 'four'" in report.errors[0].message
+    assert "Can't parse to timedelta: '2x'" in report.errors[1].message
+    assert (report.ok, report.checked, report.unchecked) == (False, 6, 0)
+
+
+def test_lines_with_variables_are_unchecked(write_script):
+    report = check_source(write_script, "TAB $COUNT\nSLEEP ${WAIT}\nTYPE hello\n")
+    assert (report.ok, report.checked, report.unchecked) == (True, 1, 2)
+
+
+@pytest.mark.parametrize('source, seconds', [
+    ("SLEEP 1s\nSLEEP 1s - 2s\n", 2.0),
+    # the delay only follows the actions that interact with the page (not SLEEP or INFO)
+    ("ACTION-DELAY 200ms\nVISIT https://example.com\nSLEEP 1s\nINFO a\n", 1.2),
+    # TAB 3 waits the input-delay between its keys
+    ("ACTION-DELAY 100ms\nTAB 3\n", 0.3),
+    ("ACTION-DELAY 1s\nACTION-DELAY 100ms --kind input\nTAB\nVISIT https://example.com\n", 1.1),
+    ("REPEAT 10\n    SLEEP 500ms\nEND\n", 5.0),
+    ("FOR-EACH X a,b,c --split ,\n    SLEEP 1s\nEND\n", 3.0),
+    # IF/ELSE takes the cheaper branch, IF without ELSE and WHILE can be skipped
+    ("ACTION-DELAY 100ms\nREPEAT 10\n    SLEEP 500ms\n    IF ELEMENT-EXISTS .a\n        SLEEP 10s\n"
+     "    ELSE\n        TAB\n    END\nEND\n", 6.0),
+    ("IF $SLOW\n    SLEEP 10s\nEND\nWHILE $MORE\n    SLEEP 5s\nEND\nSLEEP 1s\n", 1.0),
+    # REPEAT $N is only known at runtime
+    ("REPEAT $N\n    SLEEP 1s\nEND\nSLEEP 2s\n", 2.0),
+])
+def test_minimum_runtime(write_script, source, seconds):
+    report = check_source(write_script, source)
+    assert report.ok
+    assert report.minimum_runtime == pytest.approx(seconds)
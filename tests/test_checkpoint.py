@@ -0,0 +1,81 @@
+# -*- coding=utf-8 -*-
+r"""
+--checkpoint/--resume with the fake browser: a failed run continues inside of its loops
+"""
+import json
+import importlib
+import pytest
+testing = importlib.import_module("selenium-script.testing")
+CheckpointFile = importlib.import_module("selenium-script.checkpoint").CheckpointFile
+ScriptRuntimeError = importlib.import_module("selenium-script.exceptions").ScriptRuntimeError
+NoSuchElementException = testing.fake_browser.NoSuchElementException
+
+SCRIPT = """\
+ACTION-DELAY OFF
+INIT Chrome
+DEFAULT TRACE start
+DEFAULT MODE script
+REPEAT 3
+    FOR-EACH ITEM a b c
+        SELECT .item-$ITEM
+        SET TRACE ${TRACE}-$ITEM
+    END
+    VISIT https://example.com/next
+END
+QUIT
+"""
+
+
+class FlakyBrowser(testing.FakeBrowser):
+    r"""`.item-b` is missing on the first visit of the next page (the second repetition)"""
+    flaky = True
+
+    def find_element(self, by="css selector", value=None):
+        if self.flaky and value == ".item-b" and self.history.count("https://example.com/next") == 1:
+            raise NoSuchElementException(value)
+        return super().find_element(by, value)
+
+
+class FlakyEngine(testing.FakeBrowserEngine):
+    def create_browser(self, *args, **kwargs):
+        return FlakyBrowser(**self.browser_options)
+
+
+def run(source: str, path: str, *, resume: bool = False, flaky: bool = True, **kwargs) -> FlakyEngine:
+    FlakyBrowser.flaky = flaky
+    engine = FlakyEngine(source, use_cache=False, **kwargs)
+    engine.checkpoints = CheckpointFile(path, interval=0)
+    if resume:
+        engine.resume_state = engine.checkpoints.read()
+    engine.execute()
+    return engine
+
+
+def test_resume_inside_of_the_loops(write_script, tmp_path):
+    source, path = write_script(SCRIPT), str(tmp_path / "state.json")
+    with pytest.raises(NoSuchElementException):
+        run(source, path)
+    with open(path) as file:
+        state = json.load(file)
+    assert state['context']['TRACE'] == "start-a-b-c-a"
+    assert [loop[1] for loop in state['loops']] == [2, 1]  # the second repetition after the first item
+    engine = run(source, path, resume=True, flaky=False)
+    assert engine.context['TRACE'] == "start" + "-a-b-c" * 3
+    assert not (tmp_path / "state.json").exists()  # removed after the successful run
+
+
+def test_given_variables_win_over_the_checkpoint(write_script, tmp_path):
+    source, path = write_script(SCRIPT.replace("DEFAULT MODE script", "SET MODE script")), str(tmp_path / "s.json")
+    with pytest.raises(NoSuchElementException):
+        run(source, path)
+    engine = run(source, path, resume=True, flaky=False, context=dict(MODE="given", TRACE="given"))
+    assert engine.context['MODE'] == "given"
+    assert engine.context['TRACE'] == "given-b-c" + "-a-b-c"  # the loops continue with the given value
+
+
+def test_resume_of_another_script(write_script, tmp_path):
+    path = str(tmp_path / "state.json")
+    with pytest.raises(NoSuchElementException):
+        run(write_script(SCRIPT), path)
+    with pytest.raises(ScriptRuntimeError, match="the script changed before the checkpoint"):
+        run(write_script(SCRIPT.replace("REPEAT 3", "INFO changed\nREPEAT 3"), "changed.ss"), path, resume=True)
@@ -0,0 +1,67 @@
+# -*- coding=utf-8 -*-
+r"""
+IF/WHILE conditions: checked once in the page (fake browser)
+"""
+import importlib
+import pytest
+testing = importlib.import_module("selenium-script.testing")
+QuietExit = importlib.import_module("selenium-script.exceptions").QuietExit
+
+SCRIPT = """\
+ACTION-DELAY OFF
+INIT Chrome
+IF ELEMENT-EXISTS .cookie-banner
+    SET BANNER yes
+ELSE
+    SET BANNER no
+END
+"""
+
+
+class LookupBrowser(testing.FakeBrowser):
+    r"""counts the find_element(s) calls (they would block for the implicit-wait if nothing is found)"""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.lookups = 0
+
+    def find_element(self, *args, **kwargs):
+        self.lookups += 1
+        return super().find_element(*args, **kwargs)
+
+    def find_elements(self, *args, **kwargs):
+        self.lookups += 1
+        return super().find_elements(*args, **kwargs)
+
+
+class LookupEngine(testing.FakeBrowserEngine):
+    browser_used = None
+
+    def create_browser(self, *args, **kwargs):
+        self.browser_used = LookupBrowser(**self.browser_options)
+        return self.browser_used
+
+
+@pytest.mark.parametrize('missing, banner', [((), "yes"), ((".cookie-banner",), "no")])
+def test_element_exists_does_not_wait(write_script, monkeypatch, missing, banner):
+    monkeypatch.setattr(LookupEngine, 'browser_options', dict(missing=missing))
+    engine = LookupEngine(write_script(SCRIPT), use_cache=False)
+    engine.execute()
+    assert engine.context["BANNER"] == banner
+    assert engine.browser_used.lookups == 0
+
+
+@pytest.mark.parametrize('condition', ["NEW-WINDOW", "!NEW-WINDOW", "URL-CHANGE"])
+def test_conditions_of_a_wait_are_rejected(write_script, caplog, condition):
+    with pytest.raises(QuietExit):
+        testing.FakeBrowserEngine(write_script(SCRIPT.replace("ELEMENT-EXISTS .cookie-banner", condition)),
+                                  use_cache=False)
+    assert "can only be waited for (WAIT-TILL" in caplog.text
+
+
+def test_conditions_of_a_wait_are_rejected_at_runtime(write_script, caplog):
+    source = write_script(SCRIPT.replace("ELEMENT-EXISTS .cookie-banner", "NEW-$KIND"))
+    engine = testing.FakeBrowserEngine(source, use_cache=False, context=dict(KIND="WINDOW"))
+    with pytest.raises(QuietExit):
+        engine.execute()
+    assert "NEW-WINDOW can only be waited for" in caplog.text
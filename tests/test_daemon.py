@@ -0,0 +1,102 @@
+# -*- coding=utf-8 -*-
+r"""
+`selenium-script serve` and the `--server` client over a unix-socket
+"""
+import io
+import os
+import json
+import stat
+import logging
+import threading
+import importlib
+import typing as t
+import pytest
+ScriptEngine = importlib.import_module("selenium-script").ScriptEngine
+daemon = importlib.import_module("selenium-script.daemon")
+LoggingContextFilter = importlib.import_module("selenium-script.logging_context").LoggingContextFilter
+client = importlib.import_module("selenium-script.client")
+
+
+def test_socket_is_private_from_the_start(tmp_path, monkeypatch):
+    modes = []
+    bind = daemon._UnixHTTPServer.server_bind
+
+    def recording_bind(server):
+        bind(server)
+        modes.append(stat.S_IMODE(os.stat(server.server_address).st_mode))
+    monkeypatch.setattr(daemon._UnixHTTPServer, 'server_bind', recording_bind)
+    umask = os.umask(0o022)
+    try:
+        server = daemon.ScriptDaemon(f"unix:{tmp_path / 'd.sock'}", concurrency=1)
+        assert os.umask(0o022) == 0o022  # restored
+    finally:
+        os.umask(umask)
+    server.close()
+    assert [mode & 0o077 for mode in modes] == [0]  # no access for the group and the others
+
+
+def test_client_only_sends_the_referenced_environment(write_script):
+    write_script("INFO ${INCLUDED} $$\n", "inc.ss")
+    source = write_script("# $COMMENTED\nVISIT ${URL}/login\n@INCLUDE inc.ss\nTYPE $USER\n")
+    environment = dict(URL="https://example.com", INCLUDED="yes", USER="admin", COMMENTED="no", SECRET="token")
+    assert client.script_environment(source, environment) == dict(URL="https://example.com", INCLUDED="yes",
+                                                                 USER="admin")
+
+
+@pytest.fixture
+def running_daemon(tmp_path) -> t.Iterator['daemon.ScriptDaemon']:
+    r"""daemon on a unix-socket in a background thread (its job-records are streamed to the clients)"""
+    server = daemon.ScriptDaemon(f"unix:{tmp_path / 'd.sock'}", concurrency=2)
+    handler = logging.StreamHandler(io.StringIO())  # like `serve`: the filters of its handler pass the job-records
+    handler.addFilter(LoggingContextFilter())
+    handler.addFilter(daemon.JobLogFilter(logging.CRITICAL))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    level = root.level
+    root.setLevel(logging.DEBUG)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        thread.join()
+        root.removeHandler(handler)
+        root.setLevel(level)
+
+
+def test_submit_streams_the_log_and_the_exit_code(write_script, running_daemon):
+    source = write_script("INFO hello $NAME\nSET NAME other\n")
+    for name in ("a", "b"):
+        output = io.StringIO()
+        assert client.submit_job(running_daemon.address, source, context=dict(NAME=name), output=output) == 0
+        assert f"'hello {name}'" in output.getvalue()  # the second job doesn't see the SET of the first
+    status = client.server_status(running_daemon.address)
+    assert (status['finished'], status['failed'], status['running']) == (2, 0, 0)
+
+
+def test_failed_script(write_script, running_daemon):
+    output = io.StringIO()
+    code = client.submit_job(running_daemon.address, write_script("INFO $MISSING\n"), output=output, log_format="jsonl")
+    assert code == 1
+    record = json.loads(output.getvalue().splitlines()[-1])
+    assert (record['level'], record['line']) == ("CRITICAL", 1)
+    assert client.server_status(running_daemon.address)['failed'] == 1
+
+
+def test_program_cache_is_invalidated_by_an_include(write_script):
+    include = write_script("INFO included\n", "inc.ss")
+    source = write_script("@INCLUDE inc.ss\nINFO main\n")
+    programs = daemon.ProgramCache()
+    programs.store(source, ScriptEngine(source, use_cache=False))
+    assert programs.get(source) is not None
+    stat_result = os.stat(include)
+    os.utime(include, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+    assert programs.get(source) is None
+
+
+def test_client_gets_the_exit_code_of_a_broken_job(write_script, running_daemon, monkeypatch):
+    def broken(job):
+        raise RuntimeError("broken")
+    monkeypatch.setattr(running_daemon, 'execute', broken)
+    assert client.submit_job(running_daemon.address, write_script("INFO a\n"), output=io.StringIO()) == 1
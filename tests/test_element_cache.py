@@ -0,0 +1,40 @@
+# -*- coding=utf-8 -*-
+r"""
+element-cache: the current element is kept till something could move the focus (fake browser)
+"""
+import importlib
+import pytest
+testing = importlib.import_module("selenium-script.testing")
+
+
+class RecordingEngine(testing.FakeBrowserEngine):
+    r"""keeps the browser after the run"""
+    browser_used = None
+
+    def action_init(self, *args, **kwargs):
+        super().action_init(*args, **kwargs)
+        self.browser_used = self._browser
+
+
+def run(write_script, source: str) -> RecordingEngine:
+    engine = RecordingEngine(write_script(f"ACTION-DELAY OFF\nINIT Chrome\n{source}"), use_cache=False)
+    engine.execute()
+    return engine
+
+
+def test_typing_keeps_the_element(write_script):
+    engine = run(write_script, "SELECT 'input.a'\nTYPE hello\nTYPE world\n")
+    assert (engine.element_lookups, engine.element_lookups_saved) == (0, 2)
+
+
+@pytest.mark.parametrize('typed', ["name@TAB", r"'a\tb'", r"'a\nb'", r"'a\rb'", "@RETURN", "a @ENTER"])
+def test_focus_changing_keys_inside_an_argument(write_script, typed):
+    engine = run(write_script, f"SELECT 'input.a'\nTYPE {typed}\nTYPE more\n")
+    assert engine.element_lookups == 1  # the second TYPE asks the browser for the active element
+
+
+def test_selected_link_is_the_current_element(write_script):
+    engine = run(write_script, "SELECT-LINK-TEXT Next page\nTYPE a\nSELECT-LINK-PARTIAL-TEXT Next\nTYPE b\n")
+    focused = engine.browser_used.focused
+    assert (focused.by, focused.value, focused.typed) == ("partial link text", "Next", ["b"])
+    assert engine.element_lookups == 1  # only the scope of the first search, TYPE used the found links
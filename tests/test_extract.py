@@ -0,0 +1,81 @@
+# -*- coding=utf-8 -*-
+r"""
+EXTRACT against the fake browser: chunked reads, the next page and the written rows
+"""
+import csv
+import json
+import importlib
+import pytest
+testing = importlib.import_module("selenium-script.testing")
+extract = importlib.import_module("selenium-script.extract")
+
+
+class ExtractBrowser(testing.FakeBrowser):
+    r"""counts the calls of the extract- and the next-page-script"""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.chunks = self.clicks = 0
+
+    def execute_script(self, script, *args):
+        if script is extract.EXTRACT_SCRIPT:
+            self.chunks += 1
+        elif script is extract.NEXT_PAGE_SCRIPT:
+            self.clicks += 1
+        return super().execute_script(script, *args)
+
+
+class ExtractEngine(testing.FakeBrowserEngine):
+    browser_used = None
+
+    def create_browser(self, *args, **kwargs):
+        self.browser_used = ExtractBrowser(**self.browser_options)
+        return self.browser_used
+
+
+def run(write_script, monkeypatch, line: str, **options) -> ExtractEngine:
+    monkeypatch.setattr(ExtractEngine, 'browser_options', options)
+    engine = ExtractEngine(write_script(f"ACTION-DELAY OFF\nINIT Chrome\n{line}\nQUIT\n"), use_cache=False)
+    engine.execute()
+    return engine
+
+
+def test_chunks(write_script, monkeypatch, tmp_path):
+    output = tmp_path / "items.csv"
+    engine = run(write_script, monkeypatch, f"EXTRACT li.item --fields text,attr:data-id --chunk 3 --to {output}",
+                 items=7)
+    assert engine.browser_used.chunks == 3  # 3 + 3 + 1
+    with open(output, newline='') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["text", "data-id"]
+    assert rows[1:] == [[f"text 1.{index}", f"@data-id 1.{index}"] for index in range(7)]
+    assert engine.context["EXTRACTED"] == "7"
+
+
+def test_chunk_that_fits_exactly(write_script, monkeypatch, tmp_path):
+    engine = run(write_script, monkeypatch, f"EXTRACT li --chunk 3 --to {tmp_path / 'items.csv'}", items=6)
+    assert engine.browser_used.chunks == 2  # the total tells that there is nothing left
+    assert engine.context["EXTRACTED"] == "6"
+
+
+def test_next_page_stops_at_the_last_page(write_script, monkeypatch, tmp_path):
+    output = tmp_path / "items.jsonl"
+    engine = run(write_script, monkeypatch, f"EXTRACT li --next-page a.next --to {output}", items=2, pages=3)
+    assert engine.browser_used.clicks == 3  # the third click finds no next page
+    with open(output) as file:
+        rows = [json.loads(line) for line in file]
+    assert [row["text"] for row in rows] == [f"text {page}.{index}" for page in (1, 2, 3) for index in (0, 1)]
+    assert engine.context["EXTRACTED"] == "6"
+
+
+def test_next_page_stops_after_the_pages(write_script, monkeypatch, tmp_path):
+    engine = run(write_script, monkeypatch, f"EXTRACT li --next-page a.next --pages 2 --to {tmp_path / 'i.csv'}",
+                 items=2, pages=5)
+    assert engine.browser_used.clicks == 1
+    assert engine.context["EXTRACTED"] == "4"
+
+
+@pytest.mark.parametrize('chunk', [0, -1])
+def test_chunk_has_to_be_positive(chunk):
+    with pytest.raises(extract.ScriptValueParsingError):
+        extract.check_chunk(chunk)
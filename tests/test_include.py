@@ -0,0 +1,41 @@
+# -*- coding=utf-8 -*-
+r"""
+@INCLUDE: an included script is compiled once per engine and include cycles are reported
+"""
+import os
+import importlib
+import pytest
+selenium_script = importlib.import_module("selenium-script")
+QuietExit = importlib.import_module("selenium-script.exceptions").QuietExit
+
+
+def test_include_is_compiled_once(write_script, monkeypatch):
+    write_script("INFO included\nSET X 1\n", "inc.ss")
+    source = write_script("@INCLUDE inc.ss\nINFO main\n@INCLUDE inc.ss\n")
+    compiled = []
+    compile_lines = selenium_script.ScriptEngine._compile_lines
+
+    def counting(self, file):
+        compiled.append(os.path.basename(file.name))
+        return compile_lines(self, file)
+    monkeypatch.setattr(selenium_script.ScriptEngine, '_compile_lines', counting)
+    engine = selenium_script.ScriptEngine(source, use_cache=False)
+    assert compiled == ["script.ss", "inc.ss"]
+    assert [(line, action) for _, line, action in map(engine.tokens.location, range(len(engine.tokens)))] == [
+        (1, "info"), (2, "set"), (2, "info"), (1, "info"), (2, "set"),
+    ]
+
+
+def test_include_cycle_is_reported(write_script, caplog):
+    write_script("INFO b\n@INCLUDE c.ss\n", "b.ss")
+    write_script("INFO c\n@INCLUDE b.ss\n", "c.ss")
+    source = write_script("INFO a\n@INCLUDE b.ss\n", "a.ss")
+    with pytest.raises(QuietExit):
+        selenium_script.ScriptEngine(source, use_cache=False)
+    assert "line 2: include cycle a.ss -> b.ss -> c.ss -> b.ss" in caplog.text
+
+
+def test_self_include(write_script, caplog):
+    with pytest.raises(QuietExit):
+        selenium_script.ScriptEngine(write_script("INFO a\n@INCLUDE script.ss\n"), use_cache=False)
+    assert "include cycle script.ss -> script.ss" in caplog.text
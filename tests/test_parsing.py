@@ -0,0 +1,47 @@
+# -*- coding=utf-8 -*-
+r"""
+value-parser: one regex classifies the literal (int, number, bool, timedelta or string)
+"""
+import datetime as dt
+import importlib
+import pytest
+parsing = importlib.import_module("selenium-script.callutil.parsing")
+ScriptValueParsingError = importlib.import_module("selenium-script.exceptions").ScriptValueParsingError
+
+
+@pytest.mark.parametrize('string, value', [
+    ("0", 0),
+    ("12", 12),
+    ("1.5", 1.5),
+    (".5", 0.5),
+    ("true", True), ("yes", True), ("on", True),
+    ("false", False), ("no", False), ("off", False),
+    ("500ms", dt.timedelta(milliseconds=500)),
+    ("1.5s", dt.timedelta(seconds=1.5)),
+    ("1m30s", dt.timedelta(seconds=90)),
+    ("1h", dt.timedelta(hours=1)),
+    ("2m", dt.timedelta(minutes=2)),  # not 2 milliseconds
+    # strings
+    ("True", "True"), ("5.", "5."), ("-1", "-1"), ("ms", "ms"), ("1s2", "1s2"), ("2mm", "2mm"), ("", ""),
+])
+def test_parse_any(string, value):
+    result = parsing.parse_any(string)
+    assert result == value
+    assert type(result) is type(value)
+
+
+@pytest.mark.parametrize('string', ["1a5", "1-5", "1x5", "1x5s", "2 5s"])
+def test_dot_is_not_any_character(string):
+    # the `.` of the amounts was an unescaped wildcard: `1a5` went to float() and failed
+    assert parsing.parse_any(string) == string
+
+
+@pytest.mark.parametrize('string', ["1x5s", "2x", "s", "1.s"])
+def test_parse_timedelta_errors(string):
+    with pytest.raises(ScriptValueParsingError, match="Can't parse to timedelta"):
+        parsing.parse_timedelta(string)
+
+
+def test_parse_timedelta_range():
+    assert parsing.parse_timedelta_range("200ms-1s") == (dt.timedelta(milliseconds=200), dt.timedelta(seconds=1))
+    assert parsing.parse_timedelta_range("3s") == (dt.timedelta(seconds=3),) * 2
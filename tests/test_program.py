@@ -0,0 +1,36 @@
+# -*- coding=utf-8 -*-
+r"""
+Program and linking: the lines keep their positions while equal lines share one instruction
+"""
+import logging
+import importlib
+selenium_script = importlib.import_module("selenium-script")
+Program = importlib.import_module("selenium-script.program").Program
+LoggingContextFilter = importlib.import_module("selenium-script.logging_context").LoggingContextFilter
+
+
+def test_equal_lines_share_their_instruction(write_script):
+    engine = selenium_script.ScriptEngine(write_script("INFO a\nINFO b\nINFO a\nSET X 1\nINFO a\n"), use_cache=False)
+    first, second, third, _, fifth = engine.instructions
+    assert first is third is fifth
+    assert first is not second
+    assert [engine.tokens.location(index) for index in (0, 2, 4)] == [
+        ("script.ss", 1, "info"), ("script.ss", 3, "info"), ("script.ss", 5, "info"),
+    ]
+
+
+def test_shared_instructions_log_their_own_line(write_script, caplog):
+    engine = selenium_script.ScriptEngine(write_script("INFO a\nSET X 1\nINFO a\n"), use_cache=False)
+    caplog.handler.addFilter(LoggingContextFilter())
+    with caplog.at_level(logging.INFO):
+        engine.execute()
+    assert [record.scriptLine for record in caplog.records if record.getMessage() == "'a'"] == [1, 3]
+
+
+def test_program_state_round_trip():
+    program = Program([("a.ss", 1, "info", ("x", "y")), ("b.ss", 7, "set", ("X", "x"))])
+    restored = Program.from_state(program.to_state())
+    assert restored == program
+    assert list(restored) == list(program)
+    assert restored.line_key(0) != restored.line_key(1)
+    assert restored.location(1) == ("b.ss", 7, "set")
@@ -0,0 +1,51 @@
+# -*- coding=utf-8 -*-
+r"""
+INIT --remote: the sessions of the process share keep-alive connections to the fake WebDriver-server
+"""
+import importlib
+import pytest
+selenium_script = importlib.import_module("selenium-script")
+remote = importlib.import_module("selenium-script.remote")
+
+pytestmark = pytest.mark.skipif(remote.pooled_connection_class() is None,
+                                reason="selenium without the RemoteConnection hooks (see the Pipfile)")
+
+
+def remote_script(url: str) -> str:
+    return (
+        f"ACTION-DELAY OFF\n"
+        f"INIT Chrome --headless --remote {url}\n"
+        f"VISIT https://example.com\n"
+        f"SELECT 'input[name=\"q\"]'\n"
+        f"TYPE \"hello\" @TAB\n"
+        f"NEW-TAB\n"
+        f"CLOSE\n"
+        f"QUIT\n"
+    )
+
+
+def test_sessions_share_one_connection(write_script, webdriver_server):
+    source = write_script(remote_script(webdriver_server.url))
+    for _ in range(2):
+        selenium_script.ScriptEngine(source, use_cache=False).execute()
+    assert not webdriver_server.sessions
+    assert webdriver_server.connections == 1 < webdriver_server.requests
+
+
+def test_connection_per_command_without_keep_alive(write_script, webdriver_server):
+    remote.configure_pool(keep_alive=False)
+    selenium_script.ScriptEngine(write_script(remote_script(webdriver_server.url)), use_cache=False).execute()
+    assert webdriver_server.connections == webdriver_server.requests
+
+
+@pytest.mark.parametrize('keep_alive', [True, False])
+def test_timeouts_and_retries(webdriver_server, keep_alive):
+    remote.configure_pool(keep_alive=keep_alive, connect_timeout=3, read_timeout=7, retries=2)
+    browser = remote.create_remote_browser(webdriver_server.url, "chrome")
+    try:
+        manager = browser.command_executor._get_connection_manager()
+        options = manager.connection_pool_kw
+        assert (options['timeout'].connect_timeout, options['timeout'].read_timeout) == (3, 7)
+        assert options['retries'].total == 2
+    finally:
+        browser.quit()
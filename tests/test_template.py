@@ -0,0 +1,59 @@
+# -*- coding=utf-8 -*-
+r"""
+argument-templates: split once at link time, lines with literal arguments are parsed (folded) only once
+"""
+import logging
+import importlib
+import pytest
+selenium_script = importlib.import_module("selenium-script")
+fill = importlib.import_module("selenium-script.util.fill")
+BindingPlan = importlib.import_module("selenium-script.callutil.binding").BindingPlan
+ScriptUnknownVariableError = importlib.import_module("selenium-script.exceptions").ScriptUnknownVariableError
+
+
+@pytest.mark.parametrize('string, segments', [
+    ("plain", ((False, "plain"),)),
+    ("$NAME", ((True, "NAME"),)),
+    ("hello ${NAME}!", ((False, "hello "), (True, "NAME"), (False, "!"))),
+    ("a@TAB", ((False, "a"), (True, "@TAB"))),
+    ("${A}${B}", ((True, "A"), (True, "B"))),
+])
+def test_compile_template(string, segments):
+    template = fill.compile_template(string)
+    assert template.segments == segments
+    assert template.is_constant == (segments == ((False, string),))
+    assert template.variables == tuple(text for is_variable, text in segments if is_variable)
+
+
+def test_render():
+    template = fill.compile_template("${USER}:${HOST}")
+    assert template.render(dict(USER="admin", HOST="example.com")) == "admin:example.com"
+    assert template.render(dict(USER=None, HOST=1)) == ":1"
+    with pytest.raises(ScriptUnknownVariableError):
+        template.render(dict(USER="admin"))
+
+
+def test_literal_lines_are_folded(write_script):
+    engine = selenium_script.ScriptEngine(write_script("SLEEP 1s\nTAB 3\nTAB $COUNT\nINFO hello ${NAME}\n"),
+                                          use_cache=False)
+    sleep, tab, tab_count, info = engine.instructions
+    assert sleep.bound == (["1s"], {})  # SLEEP parses its *deltas itself
+    assert tab.bound == ([3], {})
+    assert tab_count.bound is None and tab_count.arguments[0].variables == ("COUNT",)
+    assert info.bound is None and info.arguments[0] == "hello" and info.arguments[1].variables == ("NAME",)
+
+
+def test_folded_lines_are_not_parsed_again(write_script, monkeypatch, caplog):
+    engine = selenium_script.ScriptEngine(write_script("SET NAME world\nINFO hello $NAME\nINFO done\n"),
+                                          use_cache=False)
+    bind_calls = []
+    bind = BindingPlan.bind
+
+    def counting_bind(plan, values):
+        bind_calls.append(values)
+        return bind(plan, values)
+    monkeypatch.setattr(BindingPlan, 'bind', counting_bind)
+    with caplog.at_level(logging.INFO):
+        engine.execute()
+    assert bind_calls == [["hello", "world"]]  # only the line with a variable
+    assert [record.getMessage() for record in caplog.records] == ["'hello world'", "'done'"]
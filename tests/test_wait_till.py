@@ -0,0 +1,62 @@
+# -*- coding=utf-8 -*-
+r"""
+WAIT-TILL against the fake WebDriver-server: only the chosen condition talks to the browser
+"""
+import time
+import importlib
+selenium_script = importlib.import_module("selenium-script")
+testing = importlib.import_module("selenium-script.testing")
+
+
+def run_script(write_script, url: str, body: str) -> None:
+    source = write_script(f"ACTION-DELAY OFF\nINIT Chrome --remote {url}\nVISIT https://example.com\n{body}QUIT\n")
+    selenium_script.ScriptEngine(source, use_cache=False).execute()
+
+
+def requests_of(server: 'testing.FakeWebDriverServer', run) -> int:
+    before = server.requests
+    run()
+    return server.requests - before
+
+
+def test_page_loaded_only_checks_the_ready_state(write_script, webdriver_server):
+    url = webdriver_server.url
+    plain = requests_of(webdriver_server, lambda: run_script(write_script, url, ""))
+    waiting = requests_of(webdriver_server, lambda: run_script(write_script, url, "WAIT-TILL PAGE-LOADED\n"))
+    assert waiting - plain == 1  # no window-handles or current-url
+
+
+def test_event_mode_waits_inside_of_the_page(write_script, webdriver_server):
+    url = webdriver_server.url
+    plain = requests_of(webdriver_server, lambda: run_script(write_script, url, "WAIT-MODE EVENT\n"))
+    waiting = requests_of(webdriver_server, lambda: run_script(
+        write_script, url, "WAIT-MODE EVENT\nWAIT-TILL ELEMENT .result\n",
+    ))
+    assert waiting - plain == 1  # one execute_async_script that returns when the element is there
+
+
+class LoadingServer(testing.FakeWebDriverServer):
+    r"""the page is only loaded after `polls` checks of its ready-state"""
+
+    def __init__(self, polls: int):
+        super().__init__()
+        self.polls = polls
+
+    def _execute(self, session, body):
+        if "readyState" in body.get('script', "") and self.polls > 0:
+            self.polls -= 1
+            return 200, "loading"
+        return super()._execute(session, body)
+
+
+def test_poll_frequency(write_script):
+    server = LoadingServer(polls=3)
+    url = server.start_in_thread()
+    try:
+        start = time.perf_counter()
+        run_script(write_script, url, "WAIT-POLL-FREQUENCY 10ms\nWAIT-TILL PAGE-LOADED\n")
+        duration = time.perf_counter() - start
+    finally:
+        server.stop_thread()
+    assert server.polls == 0
+    assert duration < 1.0  # three polls at the default 500ms would take 1.5s